@@ -1,9 +1,43 @@
 from djoser.email import ActivationEmail,PasswordResetEmail
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.template.context import make_context
+from backend.mailer import get_email_template, render_email, send_bulk
 
-class CustomActivationEmail(ActivationEmail):
+
+class MailerEmailMixin:
+    """
+    Renders with the process-wide compiled template cache and sends through
+    backend.mailer. `prepare(to)` renders and addresses the message itself and
+    returns it unsent, so callers holding several can pass them to send_bulk()
+    over one connection; `send(to)` sends just this one.
+    """
+
+    def render(self):
+        context = make_context(self.get_context_data(), request=self.request)
+        template = get_email_template(self.template_name)
+        with context.bind_template(template.template):
+            for node in template.template.nodelist:
+                self._process_node(node, context)
+        self._attach_body()
+
+    def prepare(self, to, **kwargs):
+        self.render()
+        self.to = [to] if isinstance(to, str) else list(to)
+        self.cc = kwargs.pop("cc", [])
+        self.bcc = kwargs.pop("bcc", [])
+        self.reply_to = kwargs.pop("reply_to", [])
+        self.from_email = kwargs.pop("from_email", settings.DEFAULT_FROM_EMAIL)
+        self.request = None
+        return self
+
+    def send(self, to, fail_silently=False, **kwargs):
+        failures = send_bulk([self.prepare(to, **kwargs)])
+        if failures and not fail_silently:
+            raise failures[0]
+        return 0 if failures else 1
+
+
+class CustomActivationEmail(MailerEmailMixin, ActivationEmail):
     template_name = "emails/activation.html"
 
     def __init__(self, request, context=None, user=None, *args, **kwargs):
@@ -19,17 +53,14 @@ class CustomActivationEmail(ActivationEmail):
         context["user"] = self.user
         try:
             frontend_url = settings.FRONTEND_URL.rstrip("/")
-        except Exception as e: 
+        except Exception as e:
             frontend_url = "http://localhost:5173"  # Fallback
         context["activation_url"] = f"{frontend_url}/activation/{context['uid']}/{context['token']}/"
         return context
 
-    def send(self, to=None, *args, **kwargs):
-        return super().send(to=to, *args, **kwargs)
-    
 
 
-class CustomPasswordResetEmail(PasswordResetEmail):
+class CustomPasswordResetEmail(MailerEmailMixin, PasswordResetEmail):
     template_name = 'emails/custom_reset_password.html'
     subject_template_name = 'emails/password_reset_subject.txt'
 
@@ -42,12 +73,9 @@ class CustomPasswordResetEmail(PasswordResetEmail):
         context["reset_url"] = f"{frontend_url}/reset-password-confirm/{context['uid']}/{context['token']}/"
         return context
 
-    def send(self, to, *args, **kwargs):
-        if isinstance(to, list):
-            to = to[0]  # Extract string from list
+    def render(self):
+        # Subject and body come from two plain templates rather than template blocks
         context = self.get_context_data()
-        subject = render_to_string(self.subject_template_name, context).strip()
-        html_body = render_to_string(self.template_name, context)
-        msg = EmailMultiAlternatives(subject, "", to=[to])  # Pass as list here
-        msg.attach_alternative(html_body, "text/html")
-        msg.send()
\ No newline at end of file
+        self.subject = render_email(self.subject_template_name, context).strip()
+        self.html = render_email(self.template_name, context)
+        self._attach_body()
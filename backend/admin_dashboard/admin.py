@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import WarehouseLog
+from .models import WarehouseLog, WarehouseLogArchive, DailyMetrics
 
 @admin.register(WarehouseLog)
 class WarehouseLogAdmin(admin.ModelAdmin):
@@ -33,4 +33,25 @@ class WarehouseLogAdmin(admin.ModelAdmin):
 
     def get_updated_by(self, obj):
         return obj.updated_by.get_full_name() if obj.updated_by else "-"
-    get_updated_by.short_description = "Updated By"
\ No newline at end of file
+    get_updated_by.short_description = "Updated By"
+
+
+@admin.register(WarehouseLogArchive)
+class WarehouseLogArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id', 'order_number', 'product_name', 'variant_name', 'action', 'updated_by_name', 'timestamp')
+    list_filter = ('action',)
+    search_fields = ('order_number', 'product_name', 'variant_name', 'updated_by_name', 'updated_by_email')
+    date_hierarchy = 'timestamp'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyMetrics)
+class DailyMetricsAdmin(admin.ModelAdmin):
+    list_display = ('date', 'orders', 'revenue', 'delivered_orders', 'returns', 'replacements', 'new_customers', 'updated_at')
+    date_hierarchy = 'date'
+    readonly_fields = ('updated_at',)
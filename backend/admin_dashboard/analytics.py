@@ -0,0 +1,138 @@
+# admin_dashboard/analytics.py
+"""
+Delivery latency analytics, computed in the database.
+
+On PostgreSQL averages and percentiles come from one GROUP BY using
+PERCENTILE_CONT; other backends get the averages in SQL and the percentiles
+from the (ordered) per-group durations as a development fallback.
+"""
+import math
+from collections import defaultdict
+from django.db import connection
+from django.db.models import Aggregate, Avg, Count, Min, Max, F, FloatField, Func, ExpressionWrapper, DurationField
+from django.db.models.functions import TruncDate, Substr
+from orders.models import OrderItem
+
+DEFAULT_PERCENTILES = (0.5, 0.9, 0.99)
+
+# Where the delivery clock starts, as an OrderItem lookup
+LATENCY_STARTS = {
+    'ordered': 'order__created_at',
+    'packed': 'packed_at',
+    'shipped': 'shipped_at',
+    'out_for_delivery': 'out_for_delivery_at',
+}
+
+LATENCY_GROUPS = ('day', 'deliveryman', 'region')
+
+
+class EpochSeconds(Func):
+    """Seconds in a PostgreSQL interval."""
+    template = 'EXTRACT(EPOCH FROM %(expressions)s)::double precision'
+    output_field = FloatField()
+
+
+class PercentileCont(Aggregate):
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+def _percentile_key(percentile):
+    return f"p{round(percentile * 100):g}_hours"
+
+
+def _hours(seconds):
+    return round(seconds / 3600, 2) if seconds is not None else None
+
+
+def _nearest_rank(sorted_values, percentile):
+    """Nearest-rank percentile of an ascending list (fallback backends)."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(percentile * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _group_expression(group_by, region_digits):
+    if group_by == 'day':
+        return TruncDate('delivered_at')
+    if group_by == 'deliveryman':
+        return F('order__delivered_by')
+    if group_by == 'region':
+        return Substr('order__shipping_address__postal_code', 1, region_digits)
+    raise ValueError(f"Unknown delivery latency grouping: {group_by}")
+
+
+def delivery_latency(items=None, start='packed', group_by=None,
+                     percentiles=DEFAULT_PERCENTILES, region_digits=3):
+    """
+    Delivery time statistics (in hours) for delivered order items, measured from
+    `start` (a LATENCY_STARTS key) to `delivered_at`.
+
+    Returns a list of {"key", "deliveries", "avg_hours", "min_hours",
+    "max_hours", "p50_hours", ...}; a single row with key None when
+    `group_by` is None, else one row per day / deliveryman id / postal region
+    (the first `region_digits` digits of the PIN code).
+    """
+    start_field = LATENCY_STARTS[start]
+    items = OrderItem.objects.all() if items is None else items
+    items = items.filter(delivered_at__isnull=False, **{f"{start_field}__isnull": False})
+
+    duration = ExpressionWrapper(F('delivered_at') - F(start_field), output_field=DurationField())
+    items = items.annotate(latency=duration)
+    if group_by:
+        items = items.annotate(group_key=_group_expression(group_by, region_digits))
+
+    postgres = connection.vendor == 'postgresql'
+    aggregates = {
+        'deliveries': Count('id'),
+        'avg_latency': Avg('latency'),
+        'min_latency': Min('latency'),
+        'max_latency': Max('latency'),
+    }
+    if postgres:
+        aggregates.update({
+            _percentile_key(p): PercentileCont(EpochSeconds('latency'), p) for p in percentiles
+        })
+
+    if group_by:
+        rows = list(items.values('group_key').annotate(**aggregates).order_by('group_key'))
+    else:
+        row = items.aggregate(**aggregates)
+        rows = [dict(row, group_key=None)] if row['deliveries'] else []
+
+    if not postgres and rows and percentiles:
+        samples = _latency_samples(items, group_by)
+        for row in rows:
+            values = samples.get(row['group_key'], [])
+            for p in percentiles:
+                row[_percentile_key(p)] = _nearest_rank(values, p)
+
+    results = []
+    for row in rows:
+        result = {
+            'key': row['group_key'],
+            'deliveries': row['deliveries'],
+            'avg_hours': _hours(row['avg_latency'].total_seconds()) if row['avg_latency'] is not None else None,
+            'min_hours': _hours(row['min_latency'].total_seconds()) if row['min_latency'] is not None else None,
+            'max_hours': _hours(row['max_latency'].total_seconds()) if row['max_latency'] is not None else None,
+        }
+        for p in percentiles:
+            result[_percentile_key(p)] = _hours(row[_percentile_key(p)])
+        results.append(result)
+    return results
+
+
+def _latency_samples(items, group_by):
+    """{group_key: ascending latency seconds}, read in database order."""
+    fields = ('group_key', 'latency') if group_by else ('latency',)
+    samples = defaultdict(list)
+    for values in items.order_by('latency').values_list(*fields):
+        key, latency = values if group_by else (None, values[0])
+        samples[key].append(latency.total_seconds())
+    return samples
+
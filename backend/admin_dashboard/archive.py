@@ -0,0 +1,227 @@
+# admin_dashboard/archive.py
+"""
+WarehouseLog archival.
+
+Logs older than the retention window are moved out of the hot WarehouseLog
+table, in id-ordered batches, either into WarehouseLogArchive (monthly
+partitions on PostgreSQL) or into gzipped JSONL files, one per month. The
+warehouse log endpoints read through `HotThenArchive`, which serves hot rows
+first and only touches the archive once a page runs past them.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from .models import WarehouseLog, WarehouseLogArchive
+from .pagination import approximate_count
+
+RETENTION_DAYS = getattr(settings, 'WAREHOUSE_LOG_RETENTION_DAYS', 90)
+
+# Hot lookup -> archive column, for filters, search and ordering
+ARCHIVE_FIELDS = {
+    'order__order_number': 'order_number',
+    'order_item__id': 'order_item_id',
+    'order_item__product_variant__product__name': 'product_name',
+    'order_item__product_variant__variant_name': 'variant_name',
+    'updated_by__id': 'updated_by_id',
+    'updated_by__email': 'updated_by_email',
+    'updated_by__first_name': 'updated_by_name',
+    'updated_by__last_name': 'updated_by_name',
+}
+
+ARCHIVE_SEARCH_FIELDS = ('order_number', 'product_name', 'variant_name', 'updated_by_name', 'updated_by_email', 'action')
+
+
+def archive_field(lookup):
+    """Archive equivalent of a hot ordering/filter lookup (keeps a leading '-')."""
+    prefix = '-' if lookup.startswith('-') else ''
+    name = lookup.lstrip('-')
+    return prefix + ARCHIVE_FIELDS.get(name, name)
+
+
+# -----------------------------
+# Moving rows out of the hot table
+# -----------------------------
+def _stale_batch(cutoff, batch_size):
+    return list(
+        WarehouseLog.objects.filter(timestamp__lt=cutoff)
+        .order_by('id')
+        .values(
+            'id', 'order_item_id', 'order_id', 'order__order_number',
+            'order_item__product_variant__product__name', 'order_item__product_variant__variant_name',
+            'order_item__quantity', 'action', 'updated_by_id', 'updated_by__first_name',
+            'updated_by__last_name', 'updated_by__email', 'comment', 'timestamp',
+        )[:batch_size]
+    )
+
+
+def _compact(row):
+    """Flat archive record for a _stale_batch() row."""
+    name = " ".join(filter(None, [row['updated_by__first_name'], row['updated_by__last_name']]))
+    return {
+        'id': row['id'],
+        'order_item_id': row['order_item_id'],
+        'order_id': row['order_id'],
+        'order_number': row['order__order_number'] or '',
+        'product_name': row['order_item__product_variant__product__name'] or '',
+        'variant_name': row['order_item__product_variant__variant_name'] or '',
+        'quantity': row['order_item__quantity'],
+        'action': row['action'],
+        'updated_by_id': row['updated_by_id'],
+        'updated_by_name': name,
+        'updated_by_email': row['updated_by__email'] or '',
+        'comment': row['comment'],
+        'timestamp': row['timestamp'],
+    }
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _next_month(value):
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def ensure_archive_partitions(timestamps):
+    """Create the monthly WarehouseLogArchive partitions covering `timestamps` (PostgreSQL only)."""
+    if connection.vendor != 'postgresql':
+        return
+    table = WarehouseLogArchive._meta.db_table
+    months = {_month_start(ts.astimezone(dt_timezone.utc)) for ts in timestamps}
+    with connection.cursor() as cursor:
+        for month in sorted(months):
+            partition = f"{table}_y{month.year}m{month.month:02d}"
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{partition}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month, _next_month(month)],
+            )
+
+
+def archive_logs_to_table(cutoff, batch_size=1000):
+    """Move logs older than `cutoff` into WarehouseLogArchive. Returns the number moved."""
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = _stale_batch(cutoff, batch_size)
+            if not rows:
+                break
+            ensure_archive_partitions(row['timestamp'] for row in rows)
+            WarehouseLogArchive.objects.bulk_create(
+                [WarehouseLogArchive(**_compact(row)) for row in rows], ignore_conflicts=True
+            )
+            WarehouseLog.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+    return moved
+
+
+def archive_logs_to_jsonl(cutoff, directory, batch_size=1000):
+    """
+    Move logs older than `cutoff` into `<directory>/warehouse_logs-YYYY-MM.jsonl.gz`
+    (appended as extra gzip members). Rows are deleted only after their batch
+    is written, so an interrupted run can repeat lines but never lose them;
+    readers should de-duplicate on "id". Returns the number moved.
+    """
+    os.makedirs(directory, exist_ok=True)
+    moved = 0
+    while True:
+        rows = _stale_batch(cutoff, batch_size)
+        if not rows:
+            break
+        by_month = {}
+        for row in rows:
+            record = _compact(row)
+            by_month.setdefault(record['timestamp'].strftime('%Y-%m'), []).append(record)
+        for month, records in by_month.items():
+            path = os.path.join(directory, f"warehouse_logs-{month}.jsonl.gz")
+            with gzip.open(path, 'at', encoding='utf-8') as fh:
+                for record in records:
+                    fh.write(json.dumps(record, default=str, separators=(',', ':')) + "\n")
+        WarehouseLog.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+    return moved
+
+
+# -----------------------------
+# Reading hot + archived logs
+# -----------------------------
+class HotThenArchive:
+    """
+    Queryset-like view over hot WarehouseLog rows followed by WarehouseLogArchive
+    rows, enough for Django's Paginator and KeysetPagination (filter, order_by,
+    count, slicing). Archived rows are all older than hot ones, so for
+    timestamp orderings the concatenation stays globally sorted; ascending
+    timestamp orderings read the archive first. Other orderings would not be
+    sorted across the two sources and are rejected.
+    """
+    ordered = True
+
+    def __init__(self, hot, archive, ordering=()):
+        self.hot = hot
+        self.archive = archive
+        self.ordering = tuple(ordering)
+        self.model = hot.model
+
+    def _clone(self, hot, archive, ordering=None):
+        return HotThenArchive(hot, archive, self.ordering if ordering is None else ordering)
+
+    def filter(self, *args, **kwargs):
+        # Only used with hot/archive-neutral lookups (timestamp, id) by keyset pagination
+        return self._clone(self.hot.filter(*args, **kwargs), self.archive.filter(*args, **kwargs))
+
+    def order_by(self, *fields):
+        if fields and fields[0].lstrip('-') != 'timestamp':
+            raise ValueError("HotThenArchive only supports orderings led by timestamp")
+        return self._clone(
+            self.hot.order_by(*fields), self.archive.order_by(*[archive_field(f) for f in fields]), fields
+        )
+
+    def _parts(self):
+        if self.ordering and self.ordering[0].lstrip('-') == 'timestamp' and not self.ordering[0].startswith('-'):
+            return self.archive, self.hot
+        return self.hot, self.archive
+
+    def count(self):
+        return self.hot.count() + self.archive.count()
+
+    def approximate_count(self):
+        # Planner estimates for both sides, for keyset pages that ask for ?count=approx
+        return approximate_count(self.hot) + approximate_count(self.archive)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            rows = self[key:key + 1]
+            if not rows:
+                raise IndexError(key)
+            return rows[0]
+        start, stop = key.start or 0, key.stop
+        first, second = self._parts()
+        rows = list(first[start:stop])
+        if stop is not None and len(rows) == stop - start:
+            return rows
+        # The first source is exhausted within this slice; continue into the second
+        first_total = start + len(rows) if rows or start == 0 else first.count()
+        offset = max(start - first_total, 0)
+        rest = second[offset:stop - first_total] if stop is not None else second[offset:]
+        return rows + list(rest)
+
+
+def archived_logs(params, search_terms=()):
+    """WarehouseLogArchive rows matching the warehouse log list filters and search terms."""
+    logs = WarehouseLogArchive.objects.all()
+    for param in ('action', 'order__order_number', 'updated_by__id'):
+        if params.get(param):
+            logs = logs.filter(**{archive_field(param): params[param]})
+    for term in search_terms:
+        condition = Q()
+        for field in ARCHIVE_SEARCH_FIELDS:
+            condition |= Q(**{f"{field}__icontains": term})
+        logs = logs.filter(condition)
+    return logs
@@ -0,0 +1,100 @@
+# admin_dashboard/customers.py
+"""
+Customer analytics annotations for the admin customer list.
+
+Order counts, lifetime spend and recency come from correlated subqueries, so a
+page of customers costs one query and the list can be sorted and filtered by
+them. RFM (recency / frequency / monetary) scores and segments are CASE
+expressions on top, filterable like any other column.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import (
+    Case, When, Value, Q, OuterRef, Subquery, Count, Sum, IntegerField, CharField, DecimalField,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from orders.models import Order
+
+# Score 5..1 for the first threshold met; customers without a delivered order score 0
+RFM_RECENCY_DAYS = (30, 60, 90, 180)  # last delivered order within N days -> 5, 4, 3, 2; older -> 1
+RFM_FREQUENCY_ORDERS = (10, 5, 3, 2)  # at least N delivered orders -> 5, 4, 3, 2; one -> 1
+RFM_MONETARY_SPEND = (50000, 20000, 10000, 5000)  # lifetime spend of at least N -> 5, 4, 3, 2; less -> 1
+
+RFM_SEGMENTS = (
+    'champions', 'loyal', 'new', 'promising', 'at_risk',
+    'needs_attention', 'cant_lose', 'lost', 'no_orders',
+)
+
+
+def _order_aggregate(aggregate, output_field, **filters):
+    orders = Order.objects.filter(user=OuterRef('pk'), **filters).order_by().values('user')
+    return Subquery(orders.annotate(value=aggregate).values('value'), output_field=output_field)
+
+
+def with_customer_stats(queryset):
+    """
+    Annotate users with total_orders (all orders), delivered_orders,
+    total_spent (delivered orders) and last_order_date (latest delivered order).
+    """
+    delivered = Order.objects.filter(user=OuterRef('pk'), status='delivered')
+    money = DecimalField(max_digits=14, decimal_places=2)
+    return queryset.annotate(
+        total_orders=Coalesce(_order_aggregate(Count('id'), IntegerField()), 0),
+        delivered_orders=Coalesce(_order_aggregate(Count('id'), IntegerField(), status='delivered'), 0),
+        total_spent=Coalesce(
+            _order_aggregate(Sum('total'), money, status='delivered'), Value(Decimal('0.00')), output_field=money
+        ),
+        last_order_date=Subquery(delivered.order_by('-created_at').values('created_at')[:1]),
+    )
+
+
+def _score(whens):
+    return Case(*whens, default=Value(1), output_field=IntegerField())
+
+
+def with_rfm(queryset, now=None):
+    """Add recency/frequency/monetary scores (0-5) and an RFM segment to with_customer_stats()."""
+    now = now or timezone.now()
+    no_orders = Q(delivered_orders=0)
+    scores = range(5, 1, -1)
+
+    queryset = queryset.annotate(
+        recency_score=_score(
+            [When(no_orders, then=Value(0))]
+            + [When(last_order_date__gte=now - timedelta(days=days), then=Value(score))
+               for score, days in zip(scores, RFM_RECENCY_DAYS)]
+        ),
+        frequency_score=_score(
+            [When(no_orders, then=Value(0))]
+            + [When(delivered_orders__gte=count, then=Value(score))
+               for score, count in zip(scores, RFM_FREQUENCY_ORDERS)]
+        ),
+        monetary_score=_score(
+            [When(no_orders, then=Value(0))]
+            + [When(total_spent__gte=spend, then=Value(score))
+               for score, spend in zip(scores, RFM_MONETARY_SPEND)]
+        ),
+    )
+    return queryset.annotate(
+        rfm_segment=Case(
+            When(no_orders, then=Value('no_orders')),
+            When(recency_score__gte=4, frequency_score__gte=4, then=Value('champions')),
+            When(recency_score__gte=3, frequency_score__gte=3, then=Value('loyal')),
+            When(recency_score__gte=4, frequency_score__lte=1, then=Value('new')),
+            When(recency_score__gte=3, then=Value('promising')),
+            When(recency_score=2, frequency_score__gte=3, then=Value('at_risk')),
+            When(recency_score=2, then=Value('needs_attention')),
+            When(frequency_score__gte=3, then=Value('cant_lose')),
+            default=Value('lost'),
+            output_field=CharField(),
+        ),
+    )
+
+
+def rfm_segment_counts(queryset):
+    """{segment: customers} for an RFM-annotated queryset, in one GROUP BY."""
+    counts = {segment: 0 for segment in RFM_SEGMENTS}
+    for row in queryset.order_by().values('rfm_segment').annotate(customers=Count('id', distinct=True)):
+        counts[row['rfm_segment']] = row['customers']
+    return counts
@@ -1,7 +1,6 @@
 # filters.py
 from django_filters import rest_framework as filters
-from django.db.models import Case, When, Value, CharField
-from .models import WarehouseLog
+from .models import WarehouseTimelineLog
 
 class WarehouseTimelineFilter(filters.FilterSet):
     status = filters.CharFilter(method='filter_status')
@@ -15,20 +14,9 @@ class WarehouseTimelineFilter(filters.FilterSet):
         if value not in valid_statuses:
             return qs.none()
 
-        # Annotate current_status dynamically
-        qs = qs.annotate(
-            current_status=Case(
-                When(delivered_at__isnull=False, then=Value('delivered')),
-                When(out_for_delivery_at__isnull=False, then=Value('out_for_delivery')),
-                When(shipped_at__isnull=False, then=Value('shipped')),
-                When(packed_at__isnull=False, then=Value('packed')),
-                When(picked_at__isnull=False, then=Value('picked')),
-                default=Value('pending'),
-                output_field=CharField()
-            )
-        )
+        # current_status is annotated by admin_dashboard.timeline.warehouse_timeline
         return qs.filter(current_status=value)
 
     class Meta:
-        model = WarehouseLog
+        model = WarehouseTimelineLog
         fields = ['order_number', 'picked_at', 'delivered_at']
\ No newline at end of file
@@ -0,0 +1,39 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from admin_dashboard.models import WarehouseLog
+from admin_dashboard.archive import RETENTION_DAYS, archive_logs_to_table, archive_logs_to_jsonl
+
+
+class Command(BaseCommand):
+    help = "Move warehouse logs older than the retention window into the archive table or gzipped JSONL files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=RETENTION_DAYS,
+                            help="Archive logs older than N days (default: WAREHOUSE_LOG_RETENTION_DAYS).")
+        parser.add_argument('--to', choices=['table', 'jsonl'], default='table')
+        parser.add_argument('--output-dir', default=getattr(settings, 'WAREHOUSE_LOG_ARCHIVE_DIR', None),
+                            help="Directory for --to jsonl (default: WAREHOUSE_LOG_ARCHIVE_DIR).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Only count the logs that would be moved")
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError("--days must be at least 1")
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            stale = WarehouseLog.objects.filter(timestamp__lt=cutoff).count()
+            self.stdout.write(f"Would archive {stale} warehouse logs older than {cutoff:%Y-%m-%d %H:%M}")
+            return
+
+        if options['to'] == 'jsonl':
+            if not options['output_dir']:
+                raise CommandError("--output-dir is required for --to jsonl")
+            moved = archive_logs_to_jsonl(cutoff, options['output_dir'], batch_size=options['batch_size'])
+            target = options['output_dir']
+        else:
+            moved = archive_logs_to_table(cutoff, batch_size=options['batch_size'])
+            target = "the archive table"
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} warehouse logs to {target}"))
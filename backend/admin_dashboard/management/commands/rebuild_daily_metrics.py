@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from admin_dashboard.metrics import rebuild_daily_metrics, first_activity_date
+
+
+class Command(BaseCommand):
+    help = "Backfill or rebuild the DailyMetrics rollups that feed the admin dashboard"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="First day to rebuild (YYYY-MM-DD). Defaults to the first recorded activity.")
+        parser.add_argument('--until', help="Last day to rebuild (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument('--days', type=int, help="Rebuild only the last N days (overrides --since).")
+        parser.add_argument('--chunk-days', type=int, default=31, help="Days aggregated per batch.")
+
+    def _parse(self, value, name):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"--{name} must be a date in YYYY-MM-DD format")
+
+    def handle(self, *args, **options):
+        until = self._parse(options['until'], 'until') if options['until'] else timezone.localdate()
+        if options['days']:
+            since = until - timedelta(days=options['days'] - 1)
+        elif options['since']:
+            since = self._parse(options['since'], 'since')
+        else:
+            since = first_activity_date()
+            if since is None:
+                self.stdout.write("No activity recorded, nothing to rebuild")
+                return
+        if since > until:
+            raise CommandError("--since must not be after --until")
+
+        chunk = max(options['chunk_days'], 1)
+        written = 0
+        start = since
+        while start <= until:
+            end = min(start + timedelta(days=chunk - 1), until)
+            written += rebuild_daily_metrics(start, end)
+            start = end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt daily metrics for {since}..{until}: {written} active days"))
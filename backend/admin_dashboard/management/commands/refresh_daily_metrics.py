@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from admin_dashboard.metrics import refresh_stale_metrics
+
+
+class Command(BaseCommand):
+    help = "Recompute the DailyMetrics days queued by order, return and customer writes (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Days claimed per transaction")
+
+    def handle(self, *args, **options):
+        refreshed = refresh_stale_metrics(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed daily metrics for {refreshed} queued days"))
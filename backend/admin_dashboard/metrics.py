@@ -0,0 +1,248 @@
+# admin_dashboard/metrics.py
+"""
+Daily rollups behind the admin dashboard.
+
+Order/return/replacement/customer writes queue the affected day after commit
+(see admin_dashboard.signals): one conflict-ignoring INSERT into
+StaleMetricsDay, nothing else on the request path. `refresh_stale_metrics`
+(the `refresh_daily_metrics` command, run from cron) claims queued days and
+re-aggregates each one, so rows are exact once the queue drains. A day
+written to again while it is being recomputed is queued again. The
+`rebuild_daily_metrics` command is for backfills and drift repair, and
+`dashboard_totals` folds the rollups for the dashboard.
+"""
+import threading
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, Sum, Q, F, ExpressionWrapper, DurationField, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from orders.models import Order, ReturnRequest, ReplacementRequest
+from promoter.analytics import schedule_promoter_stats_refresh
+from .models import DailyMetrics, StaleMetricsDay
+
+User = get_user_model()
+
+METRIC_FIELDS = [
+    'orders', 'revenue', 'delivered_orders', 'delivered_revenue',
+    'delivery_seconds', 'timed_deliveries', 'returns', 'replacements',
+    'new_customers', 'orders_by_status', 'orders_by_payment_method',
+]
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def _day_bounds(start, end):
+    """Aware [start 00:00, end+1 00:00) in the current timezone for inclusive dates."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def _empty_day():
+    return {
+        'orders': 0, 'revenue': Decimal('0'), 'delivered_orders': 0,
+        'delivered_revenue': Decimal('0'), 'delivery_seconds': 0, 'timed_deliveries': 0,
+        'returns': 0, 'replacements': 0, 'new_customers': 0,
+        'orders_by_status': {}, 'orders_by_payment_method': {},
+    }
+
+
+def _count_by_day(queryset, lower, upper):
+    return (
+        queryset.filter(created_at__gte=lower, created_at__lt=upper)
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+
+def compute_daily_metrics(start, end):
+    """Aggregate the source tables into {date: fields} for the inclusive date range (6 queries)."""
+    lower, upper = _day_bounds(start, end)
+    days = defaultdict(_empty_day)
+
+    orders = Order.objects.filter(created_at__gte=lower, created_at__lt=upper)\
+        .annotate(day=TruncDate('created_at'))
+    delivered = Q(status='delivered')
+    timed = delivered & Q(delivered_at__isnull=False)
+
+    totals = orders.values('day').annotate(
+        order_count=Count('id'),
+        revenue_total=Sum('total'),
+        delivered_count=Count('id', filter=delivered),
+        delivered_total=Sum('total', filter=delivered),
+        delivery_time=Sum(
+            ExpressionWrapper(F('delivered_at') - F('created_at'), output_field=DurationField()),
+            filter=timed,
+        ),
+        timed_count=Count('id', filter=timed),
+    ).order_by()
+    for row in totals:
+        day = days[row['day']]
+        day['orders'] = row['order_count']
+        day['revenue'] = row['revenue_total'] or Decimal('0')
+        day['delivered_orders'] = row['delivered_count']
+        day['delivered_revenue'] = row['delivered_total'] or Decimal('0')
+        day['delivery_seconds'] = int(row['delivery_time'].total_seconds()) if row['delivery_time'] else 0
+        day['timed_deliveries'] = row['timed_count']
+
+    for field, key in (('status', 'orders_by_status'), ('payment_method', 'orders_by_payment_method')):
+        for row in orders.values('day', field).annotate(count=Count('id')).order_by():
+            days[row['day']][key][row[field]] = row['count']
+
+    sources = (
+        ('returns', ReturnRequest.objects.all()),
+        ('replacements', ReplacementRequest.objects.all()),
+        ('new_customers', User.objects.filter(role='customer')),
+    )
+    for key, queryset in sources:
+        for row in _count_by_day(queryset, lower, upper):
+            days[row['day']][key] = row['count']
+
+    return dict(days)
+
+
+def rebuild_daily_metrics(start, end):
+    """
+    Recompute and upsert the rollups for the inclusive date range; days that
+    no longer have any activity lose their row. Returns the rows written.
+    """
+    computed = compute_daily_metrics(start, end)
+    with transaction.atomic():
+        DailyMetrics.objects.bulk_create(
+            [DailyMetrics(date=day, **fields) for day, fields in computed.items()],
+            update_conflicts=True,
+            unique_fields=['date'],
+            update_fields=METRIC_FIELDS + ['updated_at'],
+        )
+        DailyMetrics.objects.filter(date__gte=start, date__lte=end)\
+            .exclude(date__in=list(computed)).delete()
+    return len(computed)
+
+
+def refresh_daily_metrics(days):
+    for day in sorted(set(days)):
+        rebuild_daily_metrics(day, day)
+
+
+def refresh_stale_metrics(batch_size=100):
+    """
+    Drain the StaleMetricsDay queue: claim up to `batch_size` days at a time
+    (skipping days another worker holds), recompute them and dequeue them in
+    the same transaction. Returns the number of days refreshed.
+    """
+    refreshed = 0
+    while True:
+        with transaction.atomic():
+            queued = StaleMetricsDay.objects.order_by('date')
+            if connection.features.has_select_for_update_skip_locked:
+                queued = queued.select_for_update(skip_locked=True)
+            claimed = list(queued.values_list('id', 'date')[:batch_size])
+            if not claimed:
+                break
+            # Dequeue first: a write committing during the recompute re-queues its day
+            StaleMetricsDay.objects.filter(id__in=[row_id for row_id, _ in claimed]).delete()
+            refresh_daily_metrics(day for _, day in claimed)
+        refreshed += len(claimed)
+        if len(claimed) < batch_size:
+            break
+    return refreshed
+
+
+def first_activity_date():
+    """Earliest day with any order, return, replacement or customer signup."""
+    candidates = [
+        model.objects.aggregate(first=Min('created_at'))['first']
+        for model in (Order, ReturnRequest, ReplacementRequest, User)
+    ]
+    candidates = [_as_date(c) for c in candidates if c]
+    return min(candidates) if candidates else None
+
+
+# -----------------------------
+# Signal-driven maintenance
+# -----------------------------
+_pending = threading.local()
+
+
+def _pending_days():
+    if not hasattr(_pending, 'days'):
+        _pending.days = set()
+    return _pending.days
+
+
+def _flush_pending_days():
+    pending = _pending_days()
+    if not pending:
+        return  # an earlier callback of the same commit already did the work
+    days = set(pending)
+    pending.clear()
+    StaleMetricsDay.objects.bulk_create([StaleMetricsDay(date=day) for day in days], ignore_conflicts=True)
+
+
+def schedule_metrics_refresh(*values):
+    """
+    Queue the given days/datetimes for refresh_stale_metrics once the current
+    transaction commits. Several writes in one transaction share one INSERT;
+    a failure here is logged and never fails the committed write.
+    """
+    days = {_as_date(value) for value in values if value}
+    if not days:
+        return
+    _pending_days().update(days)
+    transaction.on_commit(_flush_pending_days, robust=True)
+
+
+def schedule_metrics_refresh_for_orders(order_ids):
+    """For set-based Order updates that bypass post_save (also refreshes the promoter rollups)."""
+    rows = list(Order.objects.filter(id__in=order_ids).values_list('created_at', 'promoter_id'))
+    schedule_metrics_refresh(*[created for created, _ in rows])
+    schedule_promoter_stats_refresh(*[(promoter_id, created) for created, promoter_id in rows])
+
+
+# -----------------------------
+# Dashboard read side
+# -----------------------------
+def _merge_counts(target, counts):
+    for key, count in (counts or {}).items():
+        target[key] = target.get(key, 0) + count
+
+
+def dashboard_totals():
+    """
+    Fold every DailyMetrics row (one query over at most one row per day)
+    into all-time totals plus the monthly and daily series.
+    """
+    totals = {
+        'orders': 0, 'revenue': Decimal('0'), 'delivered_orders': 0,
+        'delivery_seconds': 0, 'timed_deliveries': 0,
+        'returns': 0, 'replacements': 0, 'new_customers': 0,
+        'orders_by_status': {}, 'orders_by_payment_method': {},
+        'monthly_sales': {}, 'daily_sales': [], 'new_customers_monthly': {},
+    }
+    rows = DailyMetrics.objects.order_by('date').values('date', *METRIC_FIELDS)
+    for row in rows:
+        for key in ('orders', 'revenue', 'delivered_orders', 'delivery_seconds',
+                    'timed_deliveries', 'returns', 'replacements', 'new_customers'):
+            totals[key] += row[key]
+        _merge_counts(totals['orders_by_status'], row['orders_by_status'])
+        _merge_counts(totals['orders_by_payment_method'], row['orders_by_payment_method'])
+
+        month = row['date'].replace(day=1)
+        if row['delivered_orders']:
+            totals['monthly_sales'][month] = totals['monthly_sales'].get(month, 0) + row['delivered_revenue']
+            totals['daily_sales'].append((row['date'], row['delivered_revenue']))
+        if row['new_customers']:
+            totals['new_customers_monthly'][month] = totals['new_customers_monthly'].get(month, 0) + row['new_customers']
+    return totals
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0002_alter_warehouselog_action'),
+        ('orders', '0004_notification_otp_expires_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='warehouselog',
+            index=models.Index(fields=['timestamp', 'id'], name='admin_dashb_timesta_7e60d1_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0004_dailymetrics'),
+        ('orders', '0008_order_user_status_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='warehouselog',
+            index=models.Index(fields=['order', 'action', 'timestamp'], name='admin_dashb_order_i_1b5a59_idx'),
+        ),
+    ]
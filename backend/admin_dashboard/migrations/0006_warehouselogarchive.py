@@ -0,0 +1,69 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:25
+
+from django.db import migrations, models
+
+
+def create_archive_table(apps, schema_editor):
+    """Monthly range-partitioned table on PostgreSQL (partitions are added by the archiver), plain elsewhere."""
+    model = apps.get_model('admin_dashboard', 'WarehouseLogArchive')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(model)
+        return
+    qn = schema_editor.quote_name
+    columns = [
+        f"{qn(field.column)} {field.db_type(schema_editor.connection)} {'NULL' if field.null else 'NOT NULL'}"
+        for field in model._meta.local_fields
+    ]
+    # The partition key has to be part of the primary key
+    columns.append(f"PRIMARY KEY ({qn('id')}, {qn('timestamp')})")
+    schema_editor.execute(
+        f"CREATE TABLE {qn(model._meta.db_table)} ({', '.join(columns)}) PARTITION BY RANGE ({qn('timestamp')})"
+    )
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def drop_archive_table(apps, schema_editor):
+    model = apps.get_model('admin_dashboard', 'WarehouseLogArchive')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.delete_model(model)
+        return
+    # Drops the monthly partitions with the parent
+    schema_editor.execute(f"DROP TABLE IF EXISTS {schema_editor.quote_name(model._meta.db_table)} CASCADE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0005_warehouselog_timeline_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='WarehouseLogArchive',
+                    fields=[
+                        ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                        ('order_item_id', models.BigIntegerField(null=True)),
+                        ('order_id', models.BigIntegerField(null=True)),
+                        ('order_number', models.CharField(blank=True, default='', max_length=50)),
+                        ('product_name', models.CharField(blank=True, default='', max_length=200)),
+                        ('variant_name', models.CharField(blank=True, default='', max_length=200)),
+                        ('quantity', models.PositiveIntegerField(null=True)),
+                        ('action', models.CharField(choices=[('picked', 'Picked'), ('packed', 'Packed'), ('shipped', 'Shipped'), ('out_for_delivery', 'Out for Delivery'), ('failed', 'Failed'), ('cancelled', 'Cancelled'), ('delivered', 'Delivered')], max_length=50)),
+                        ('updated_by_id', models.BigIntegerField(null=True)),
+                        ('updated_by_name', models.CharField(blank=True, default='', max_length=255)),
+                        ('updated_by_email', models.CharField(blank=True, default='', max_length=254)),
+                        ('comment', models.TextField(blank=True, null=True)),
+                        ('timestamp', models.DateTimeField()),
+                    ],
+                    options={
+                        'ordering': ['-timestamp'],
+                        'indexes': [models.Index(fields=['timestamp', 'id'], name='admin_dashb_timesta_aa7472_idx'), models.Index(fields=['order_number'], name='admin_dashb_order_n_5bb4b1_idx')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_archive_table, drop_archive_table),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0006_warehouselogarchive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='warehouselogarchive',
+            index=models.Index(fields=['order_id', 'action', 'timestamp'], name='admin_dashb_order_i_4b67b4_idx'),
+        ),
+    ]
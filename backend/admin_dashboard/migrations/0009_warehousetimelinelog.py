@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:16
+
+from django.db import migrations, models
+
+CREATE_VIEW = """
+CREATE VIEW admin_dashboard_warehousetimelinelog AS
+SELECT id, order_id, action, timestamp FROM admin_dashboard_warehouselog WHERE order_id IS NOT NULL
+UNION ALL
+SELECT id, order_id, action, timestamp FROM admin_dashboard_warehouselogarchive WHERE order_id IS NOT NULL
+"""
+
+DROP_VIEW = "DROP VIEW IF EXISTS admin_dashboard_warehousetimelinelog"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0008_stalemetricsday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WarehouseTimelineLog',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('action', models.CharField(choices=[('picked', 'Picked'), ('packed', 'Packed'), ('shipped', 'Shipped'), ('out_for_delivery', 'Out for Delivery'), ('failed', 'Failed'), ('cancelled', 'Cancelled'), ('delivered', 'Delivered')], max_length=50)),
+                ('timestamp', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'admin_dashboard_warehousetimelinelog',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(CREATE_VIEW, DROP_VIEW),
+    ]
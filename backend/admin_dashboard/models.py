@@ -48,7 +48,114 @@ class WarehouseLog(models.Model):
             models.Index(fields=['order_item']),
             models.Index(fields=['order']),
             models.Index(fields=['updated_by']),
+            models.Index(fields=['timestamp', 'id']),  # keyset pagination
+            models.Index(fields=['order', 'action', 'timestamp']),  # warehouse timeline
         ]
 
     def __str__(self):
-        return f"{self.order_item} - {self.action} by {self.updated_by} at {self.timestamp}"
\ No newline at end of file
+        return f"{self.order_item} - {self.action} by {self.updated_by} at {self.timestamp}"
+
+class WarehouseLogArchive(models.Model):
+    """
+    Compact, join-free copy of WarehouseLog rows older than the retention window,
+    written by the archive_warehouse_logs command (see admin_dashboard.archive).
+    Keeps the original log id. On PostgreSQL the table is range-partitioned by
+    month on `timestamp`; other backends get a plain table.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    order_item_id = models.BigIntegerField(null=True)
+    order_id = models.BigIntegerField(null=True)
+    order_number = models.CharField(max_length=50, blank=True, default='')
+    product_name = models.CharField(max_length=200, blank=True, default='')
+    variant_name = models.CharField(max_length=200, blank=True, default='')
+    quantity = models.PositiveIntegerField(null=True)
+    action = models.CharField(max_length=50, choices=WarehouseLog.ACTION_CHOICES)
+    updated_by_id = models.BigIntegerField(null=True)
+    updated_by_name = models.CharField(max_length=255, blank=True, default='')
+    updated_by_email = models.CharField(max_length=254, blank=True, default='')
+    comment = models.TextField(blank=True, null=True)
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp', 'id']),
+            models.Index(fields=['order_number']),
+            # Per-order stage lookups (warehouse timeline view)
+            models.Index(fields=['order_id', 'action', 'timestamp']),
+        ]
+
+    def __str__(self):
+        return f"{self.order_number} - {self.action} at {self.timestamp} (archived)"
+
+
+class WarehouseTimelineLog(models.Model):
+    """
+    Read-only view (UNION ALL) over hot WarehouseLog and WarehouseLogArchive
+    rows that belong to an order, with just the columns the warehouse timeline
+    groups on. Archived rows keep their original id, so ids stay unique.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(Order, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    action = models.CharField(max_length=50, choices=WarehouseLog.ACTION_CHOICES)
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'admin_dashboard_warehousetimelinelog'
+
+    def __str__(self):
+        return f"{self.order_id} - {self.action} at {self.timestamp}"
+
+
+class DailyMetrics(models.Model):
+    """
+    One row per calendar day (orders bucketed by created_at), maintained by
+    admin_dashboard.metrics from order/return signals. The admin dashboard
+    reads these rollups instead of scanning the order history.
+    """
+    date = models.DateField(unique=True)
+
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    delivered_orders = models.PositiveIntegerField(default=0)
+    delivered_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Sum of (delivered_at - created_at) over delivered orders with a delivery timestamp
+    delivery_seconds = models.BigIntegerField(default=0)
+    timed_deliveries = models.PositiveIntegerField(default=0)
+
+    returns = models.PositiveIntegerField(default=0)
+    replacements = models.PositiveIntegerField(default=0)
+    new_customers = models.PositiveIntegerField(default=0)
+
+    orders_by_status = models.JSONField(default=dict, blank=True)
+    orders_by_payment_method = models.JSONField(default=dict, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+        verbose_name_plural = 'Daily metrics'
+
+    @property
+    def average_order_value(self):
+        return round(self.revenue / self.orders, 2) if self.orders else 0
+
+    def __str__(self):
+        return f"{self.date}: {self.orders} orders, {self.revenue} revenue"
+
+
+class StaleMetricsDay(models.Model):
+    """
+    A day whose DailyMetrics row is out of date. Order/return/customer writes
+    queue their day here after commit; `refresh_daily_metrics` (cron) drains
+    the queue and recomputes each day once, off the request path.
+    """
+    date = models.DateField(unique=True)
+    queued_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} (queued {self.queued_at})"
@@ -9,4 +9,191 @@ class TimelinePagination(PageNumberPagination):
     page_size_query_param='page_size'
     max_page_size=100
 
-    
\ No newline at end of file
+    
+
+import base64
+import json
+from datetime import date, datetime
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Keyset (seek) pagination over a unique ordering such as ('-created_at', '-id').
+    Each page is `WHERE (created_at, id) < (last_seen)` + `LIMIT`, so page 1000
+    costs the same as page 1 and no COUNT(*) runs unless `?count=exact|approx`.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def __init__(self, ordering, page_size, max_page_size, page_size_query_param='page_size'):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.page_size_query_param = page_size_query_param
+
+    # ---- cursor encoding ----
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+
+    def encode_cursor(self, values, reverse=False):
+        payload = json.dumps({'v': [self._dump(v) for v in values], 'r': int(reverse)})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, model, raw):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw.encode()).decode())
+            values = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, payload['v'])
+            ]
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return values, bool(payload.get('r'))
+        except Exception:
+            raise NotFound("Invalid cursor")
+
+    # ---- query building ----
+    def _seek_filter(self, values, reverse):
+        """Row-value comparison `(a, b) < (x, y)` expanded into portable OR/AND terms."""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            lookup = 'gt' if descending == reverse else 'lt'
+            term = Q(**{f"{name}__{lookup}": values[index]})
+            for prev_field, prev_value in zip(self.ordering[:index], values[:index]):
+                term &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= term
+        return condition
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f"-{field}"
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _row_values(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.ordering]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset, request)
+
+        raw_cursor = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        if raw_cursor:
+            values, reverse = self.decode_cursor(queryset.model, raw_cursor)
+            queryset = queryset.filter(self._seek_filter(values, reverse))
+
+        ordering = [self._flip(f) for f in self.ordering] if reverse else list(self.ordering)
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Going forward there is a previous page whenever we arrived via a cursor;
+        # going backward there is always a next page (the one we came from).
+        self.next_cursor = None
+        self.previous_cursor = None
+        if rows:
+            if has_more or reverse:
+                self.next_cursor = self.encode_cursor(self._row_values(rows[-1]))
+            if raw_cursor and (has_more or not reverse):
+                self.previous_cursor = self.encode_cursor(self._row_values(rows[0]), reverse=True)
+        return rows
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'approx':
+            return approximate_count(queryset)
+        return None
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self._link(self.next_cursor),
+            'previous': self._link(self.previous_cursor),
+            'results': data,
+        })
+
+
+def approximate_count(queryset):
+    """
+    Planner row estimate on PostgreSQL (EXPLAIN, no table scan); exact COUNT(*)
+    on other backends, where tables are small enough for it not to matter.
+    """
+    if hasattr(queryset, 'approximate_count'):
+        return queryset.approximate_count()
+    if connection.vendor != 'postgresql' or not hasattr(queryset, 'query'):
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class OptionalKeysetPagination(FlexiblePageSizePagination):
+    """
+    Page-number pagination by default; `?pagination=cursor` switches the request
+    to KeysetPagination over the view's `keyset_ordering` (e.g. ('-created_at', '-id')).
+    Cursor pages always follow that ordering, so an `?ordering=` that disagrees
+    with it is rejected with a 400 rather than silently ignored.
+    """
+    mode_query_param = 'pagination'
+    default_keyset_ordering = ('-created_at', '-id')
+
+    def check_ordering(self, request, ordering):
+        requested = request.query_params.get(api_settings.ORDERING_PARAM)
+        if not requested:
+            return
+        fields = tuple(field.strip() for field in requested.split(',') if field.strip())
+        if fields != tuple(ordering[:len(fields)]):
+            raise ValidationError({
+                api_settings.ORDERING_PARAM: (
+                    f"Cursor pagination only supports ordering={','.join(ordering)}; "
+                    f"use page-number pagination for other orderings."
+                )
+            })
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            ordering = getattr(view, 'keyset_ordering', self.default_keyset_ordering)
+            self.check_ordering(request, ordering)
+            self.keyset = KeysetPagination(
+                ordering, self.page_size, self.max_page_size, self.page_size_query_param
+            )
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
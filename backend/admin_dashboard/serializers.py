@@ -1,17 +1,22 @@
 from delivery.models import DeliveryMan
-from django.db.models import Avg, Count, Q, F, ExpressionWrapper, DurationField
+from django.db.models import Count, Q
 from rest_framework import serializers
 from products.models import Product, ProductVariant, Category,ProductVariantImage
-from orders.models import Order, OrderItem, ReturnRequest, ReplacementRequest
+from orders.models import Order, OrderItem
 from django.contrib.auth import get_user_model
 from django.db.models import Sum, Count,Max
-from django.db.models.functions import TruncMonth, TruncDay
 from products.serializers import CategorySerializer,ProductVariantSerializer
 from django.db import transaction
 from orders.serializers import ShippingAddressSerializer
 import random
 import string
-from .models import WarehouseLog
+from .models import WarehouseLog, WarehouseLogArchive
+from .metrics import dashboard_totals
+from .analytics import delivery_latency
+from .timeline import timeline_products
+from .customers import with_customer_stats, with_rfm
+from django.conf import settings
+from django.core.cache import cache
 from products.serializers import ProductVariantImageSerializer
 import logging
 logger = logging.getLogger('admin_dashboard')
@@ -19,6 +24,9 @@ logger.debug("🚨 Logging test: This should appear in your terminal")
 
 User = get_user_model()
 
+# Top products/customers still scan history, so they are cached briefly
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+
 class AdminDashboardStatsSerializer(serializers.Serializer):
     # Basic metrics
     total_orders = serializers.SerializerMethodField()
@@ -44,12 +52,19 @@ class AdminDashboardStatsSerializer(serializers.Serializer):
     new_customers_monthly = serializers.SerializerMethodField()
     average_delivery_time = serializers.SerializerMethodField()
 
+    # Rollups are folded once per serializer instance and shared by every field
+    @property
+    def rollup(self):
+        if not hasattr(self, '_rollup'):
+            self._rollup = dashboard_totals()
+        return self._rollup
+
     # ---------------- Basic Stats ----------------
     def get_total_orders(self, obj):
-        return Order.objects.count()
+        return self.rollup['orders']
     
     def get_total_sales(self, obj):
-        return Order.objects.aggregate(total=Sum('total'))['total'] or 0
+        return self.rollup['revenue']
 
     def get_average_order_value(self, obj):
         total_orders = self.get_total_orders(obj)
@@ -60,7 +75,7 @@ class AdminDashboardStatsSerializer(serializers.Serializer):
         return Product.objects.count()
 
     def get_total_customers(self, obj):
-        return User.objects.filter(role='customer').count()
+        return self.rollup['new_customers']
     
     def get_total_deliveryman(self,obj):
         return User.objects.filter(role='deliveryman').count()
@@ -69,54 +84,41 @@ class AdminDashboardStatsSerializer(serializers.Serializer):
         return User.objects.filter(role='warehouse').count()
 
     def get_pending_orders(self, obj):
-        return Order.objects.filter(status='pending').count()
+        return self.rollup['orders_by_status'].get('pending', 0)
 
     def get_total_returns(self, obj):
-        return ReturnRequest.objects.count()
+        return self.rollup['returns']
 
     def get_total_replacements(self, obj):
-        return ReplacementRequest.objects.count()
+        return self.rollup['replacements']
 
     # ---------------- Advanced Metrics ----------------
     def get_monthly_sales(self, obj):
-        sales = (
-            Order.objects.filter(status='delivered')
-            .annotate(month=TruncMonth('created_at'))
-            .values('month')
-            .annotate(total=Sum('total'))
-            .order_by('month')
-        )
-        return [{"month": s['month'].strftime("%b %Y"), "total": s['total']} for s in sales]
+        sales = sorted(self.rollup['monthly_sales'].items())
+        return [{"month": month.strftime("%b %Y"), "total": total} for month, total in sales]
 
     def get_weekly_sales(self, obj):
-        sales = (
-            Order.objects.filter(status='delivered')
-            .annotate(day=TruncDay('created_at'))
-            .values('day')
-            .annotate(total=Sum('total'))
-            .order_by('day')
-        )
-        return [{"day": s['day'].strftime("%d %b"), "total": s['total']} for s in sales]
+        return [{"day": day.strftime("%d %b"), "total": total} for day, total in self.rollup['daily_sales']]
 
     def get_top_products(self, obj):
-        top_products = (
-            OrderItem.objects
-            .values('product_variant__product__id', 'product_variant__product__name')
-            .annotate(total_sold=Sum('quantity'))
-            .order_by('-total_sold')[:5]
-        )
-        return [{"id": p['product_variant__product__id'], "name": p['product_variant__product__name'], "sold": p['total_sold']} for p in top_products]
+        def compute():
+            top_products = (
+                OrderItem.objects
+                .values('product_variant__product__id', 'product_variant__product__name')
+                .annotate(total_sold=Sum('quantity'))
+                .order_by('-total_sold')[:5]
+            )
+            return [{"id": p['product_variant__product__id'], "name": p['product_variant__product__name'], "sold": p['total_sold']} for p in top_products]
+        return cache.get_or_set('admin_dashboard:top_products', compute, DASHBOARD_CACHE_TIMEOUT)
 
     def get_low_stock_products(self, obj):
         return list(ProductVariant.objects.filter(stock__lte=5).values('id', 'product__name', 'stock'))
 
     def get_orders_by_status(self, obj):
-        queryset = Order.objects.values('status').annotate(count=Count('id'))
-        return {item['status']: item['count'] for item in queryset}
+        return self.rollup['orders_by_status']
 
     def get_orders_by_payment_method(self, obj):
-        queryset = Order.objects.values('payment_method').annotate(count=Count('id'))
-        return {item['payment_method']: item['count'] for item in queryset}
+        return self.rollup['orders_by_payment_method']
 
     def get_returns_rate(self, obj):
         total_orders = self.get_total_orders(obj)
@@ -124,36 +126,30 @@ class AdminDashboardStatsSerializer(serializers.Serializer):
         return round((total_returns / total_orders) * 100, 2) if total_orders else 0
 
     def get_top_customers(self, obj):
-        top_customers = (
-            Order.objects.values('user__id', 'user__email')
-            .annotate(order_count=Count('id'), total_spent=Sum('total'))
-            .order_by('-total_spent')[:5]
-        )
-        return [
-            {
-                "id": c['user__id'],
-                "email": c['user__email'],
-                "orders": c['order_count'],
-                "spent": c['total_spent']
-            }
-            for c in top_customers
-        ]
+        def compute():
+            top_customers = (
+                Order.objects.values('user__id', 'user__email')
+                .annotate(order_count=Count('id'), total_spent=Sum('total'))
+                .order_by('-total_spent')[:5]
+            )
+            return [
+                {
+                    "id": c['user__id'],
+                    "email": c['user__email'],
+                    "orders": c['order_count'],
+                    "spent": c['total_spent']
+                }
+                for c in top_customers
+            ]
+        return cache.get_or_set('admin_dashboard:top_customers', compute, DASHBOARD_CACHE_TIMEOUT)
 
     def get_new_customers_monthly(self, obj):
-        customers = (
-            User.objects.filter(role='customer')
-            .annotate(month=TruncMonth('created_at'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
-        return [{"month": c['month'].strftime("%b %Y"), "count": c['count']} for c in customers]
+        customers = sorted(self.rollup['new_customers_monthly'].items())
+        return [{"month": month.strftime("%b %Y"), "count": count} for month, count in customers]
 
     def get_average_delivery_time(self, obj):
-        delivered_orders = Order.objects.filter(status='delivered', delivered_at__isnull=False, created_at__isnull=False)
-        total_seconds = sum([(o.delivered_at - o.created_at).total_seconds() for o in delivered_orders])
-        count = delivered_orders.count()
-        return round(total_seconds / count / 3600, 2) if count else 0  # average hours
+        count = self.rollup['timed_deliveries']
+        return round(self.rollup['delivery_seconds'] / count / 3600, 2) if count else 0  # average hours
 
 
 class ProductVariantAdminSerializer(serializers.ModelSerializer):
@@ -404,6 +400,10 @@ class CustomerSerializer(serializers.ModelSerializer):
     total_orders = serializers.SerializerMethodField()
     total_spent = serializers.SerializerMethodField()
     last_order_date = serializers.SerializerMethodField()
+    recency_score = serializers.IntegerField(read_only=True, required=False)
+    frequency_score = serializers.IntegerField(read_only=True, required=False)
+    monetary_score = serializers.IntegerField(read_only=True, required=False)
+    rfm_segment = serializers.CharField(read_only=True, required=False)
 
     class Meta:
         model = User
@@ -418,8 +418,14 @@ class CustomerSerializer(serializers.ModelSerializer):
             'blocked_until_password_reset', 'block_count_password_reset',
             'last_login_ip',
             'total_orders', 'total_spent', 'last_order_date',  # new fields
+            'recency_score', 'frequency_score', 'monetary_score', 'rfm_segment',
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Order stats and RFM scores as subquery annotations instead of three queries per customer."""
+        return with_rfm(with_customer_stats(queryset))
+
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}".strip() or obj.email
 
@@ -429,15 +435,23 @@ class CustomerSerializer(serializers.ModelSerializer):
     def get_auth_provider_display(self, obj):
         return obj.get_auth_provider_display()
 
+    # Fall back to per-customer queries when the queryset was not set up with annotations
     def get_total_orders(self, obj):
+        if hasattr(obj, 'total_orders'):
+            return obj.total_orders
         return Order.objects.filter(user=obj).count()
 
     def get_total_spent(self, obj):
+        if hasattr(obj, 'total_spent'):
+            return obj.total_spent
         total = Order.objects.filter(user=obj, status='delivered').aggregate(Sum('total'))['total__sum']
         return total or 0
 
     def get_last_order_date(self, obj):
-        last_order = Order.objects.filter(user=obj, status='delivered').aggregate(Max('created_at'))['created_at__max']
+        if hasattr(obj, 'last_order_date'):
+            last_order = obj.last_order_date
+        else:
+            last_order = Order.objects.filter(user=obj, status='delivered').aggregate(Max('created_at'))['created_at__max']
         return last_order.strftime("%d-%b-%Y %I:%M %p") if last_order else None
 
 
@@ -522,6 +536,12 @@ class WarehouseLogSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'timestamp', 'updated_by']
 
+    def to_representation(self, instance):
+        # Hot/archive log listings mix both models
+        if isinstance(instance, WarehouseLogArchive):
+            return WarehouseLogArchiveSerializer(instance, context=self.context).data
+        return super().to_representation(instance)
+
     def get_action_display(self, obj):
         return obj.get_action_display()
 
@@ -570,6 +590,52 @@ class WarehouseLogSerializer(serializers.ModelSerializer):
         return obj.timestamp.strftime('%d %b %Y, %I:%M %p')
 
 
+class WarehouseLogArchiveSerializer(serializers.ModelSerializer):
+    """Archived log in the same shape as WarehouseLogSerializer (no live joins)."""
+    order_item = serializers.SerializerMethodField()
+    order = serializers.SerializerMethodField()
+    updated_by = serializers.SerializerMethodField()
+    action_display = serializers.CharField(source='get_action_display', read_only=True)
+    formatted_timestamp = serializers.SerializerMethodField()
+    archived = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WarehouseLogArchive
+        fields = [
+            'id', 'order_item', 'order', 'formatted_timestamp',
+            'action', 'updated_by', 'comment', 'timestamp', 'action_display', 'archived'
+        ]
+        read_only_fields = fields
+
+    def get_order_item(self, obj):
+        if obj.order_item_id is None:
+            return None
+        return {
+            "id": obj.order_item_id,
+            "product": obj.product_name,
+            "variant": obj.variant_name,
+            "quantity": obj.quantity,
+            "product_image": '',
+            "status": None,
+        }
+
+    def get_order(self, obj):
+        if obj.order_id is None:
+            return None
+        return {'id': obj.order_id, 'order_number': obj.order_number, 'status': None, 'total': None}
+
+    def get_updated_by(self, obj):
+        if obj.updated_by_id is None:
+            return None
+        return {'id': obj.updated_by_id, 'name': obj.updated_by_name, 'email': obj.updated_by_email}
+
+    def get_formatted_timestamp(self, obj):
+        return obj.timestamp.strftime('%d %b %Y, %I:%M %p')
+
+    def get_archived(self, obj):
+        return True
+
+
 
 class WarehouseTimeLineSerializer(serializers.Serializer):
     order_number = serializers.CharField()
@@ -586,49 +652,28 @@ class WarehouseTimeLineSerializer(serializers.Serializer):
     products=serializers.SerializerMethodField()
 
     def get_current_status(self, obj):
-        for field in ['delivered_at', 'out_for_delivery_at', 'shipped_at', 'packed_at', 'picked_at']:
-            if obj.get(field):
-                return field.replace('_at', '')
-        return 'pending'
+        return obj.get('current_status', 'pending')
+
+    # Stage durations are computed in SQL by admin_dashboard.timeline.warehouse_timeline
+    def _duration(self, obj, field):
+        value = obj.get(field)
+        return str(value) if value is not None else None
 
     def get_time_to_pack(self, obj):
-        if obj.get('picked_at') and obj.get('packed_at'):
-            return str(obj['packed_at'] - obj['picked_at'])
-        return None
+        return self._duration(obj, 'time_to_pack')
 
     def get_time_to_ship(self, obj):
-        if obj.get('packed_at') and obj.get('shipped_at'):
-            return str(obj['shipped_at'] - obj['packed_at'])
-        return None
+        return self._duration(obj, 'time_to_ship')
 
     def get_time_to_delivery(self, obj):
-        if obj.get('shipped_at') and obj.get('delivered_at'):
-            return str(obj['delivered_at'] - obj['shipped_at'])
-        return None
+        return self._duration(obj, 'time_to_deliver')
 
     def get_products(self, obj):
-        order_number = obj.get('order_number') or getattr(obj, 'order_number', None)
-        order = Order.objects.filter(order_number=order_number).prefetch_related(
-            'orderitem_set__product_variant__product'
-        ).first()
-
-        if not order:
-            return []
-
-        products = []
-        for item in order.orderitem_set.all():
-            variant = getattr(item, 'product_variant', None)
-            product = getattr(variant, 'product', None) if variant else None
-            if not product or not variant:
-                continue
-
-            image_url = getattr(product, 'image_url', None)
-            products.append({
-                "variant_name": variant.variant_name,
-                "product_name": product.name,
-                "product_image": image_url if image_url else ''
-            })
-        return products
+        # The view passes products for the whole page; fall back to one query per row
+        products = self.context.get('products')
+        if products is None:
+            products = timeline_products([obj['order_id']])
+        return products.get(obj['order_id'], [])
 
 
 
@@ -701,18 +746,10 @@ class DeliveryManStatsSerializer(serializers.ModelSerializer):
         return obj.user.email
     
     def get_average_delivery_time(self, obj):
-        qs = OrderItem.objects.filter(
-            order__delivered_by=obj,
-            delivered_at__isnull=False,
-            packed_at__isnull=False
-        ).annotate(
-            delivery_duration=ExpressionWrapper(
-                F('delivered_at') - F('packed_at'),
-                output_field=DurationField()
-            )
+        rows = delivery_latency(
+            OrderItem.objects.filter(order__delivered_by=obj), start='packed', percentiles=()
         )
-        avg_duration = qs.aggregate(avg_time=Avg('delivery_duration'))['avg_time']
-        return avg_duration.total_seconds()/3600 if avg_duration else None  # returns hours
+        return rows[0]['avg_hours'] if rows else None  # returns hours
 
     def get_failed_deliveries(self, obj):
         return OrderItem.objects.filter(
@@ -0,0 +1,32 @@
+# admin_dashboard/signals.py
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from orders.models import Order, ReturnRequest, ReplacementRequest
+from .metrics import schedule_metrics_refresh
+
+User = get_user_model()
+
+
+# -------------------------
+# Daily metrics rollups
+# -------------------------
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=ReturnRequest)
+@receiver(post_delete, sender=ReturnRequest)
+@receiver(post_save, sender=ReplacementRequest)
+@receiver(post_delete, sender=ReplacementRequest)
+def refresh_metrics_on_order_activity(sender, instance, **kwargs):
+    schedule_metrics_refresh(instance.created_at)
+
+
+@receiver(post_save, sender=User)
+def refresh_metrics_on_signup(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and 'role' in update_fields):
+        schedule_metrics_refresh(instance.created_at)
+
+
+@receiver(post_delete, sender=User)
+def refresh_metrics_on_user_delete(sender, instance, **kwargs):
+    schedule_metrics_refresh(instance.created_at)
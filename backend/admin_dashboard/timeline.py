@@ -0,0 +1,136 @@
+# admin_dashboard/timeline.py
+"""
+Warehouse timeline and stage SLA reporting.
+
+Every order's stage timestamps, current stage and stage durations
+(pick -> pack -> ship -> deliver) come from one GROUP BY over
+WarehouseTimelineLog, a UNION ALL view of the hot and archived warehouse logs,
+so orders older than the retention window keep their full history.
+Products for a whole page are fetched in one query, and per-stage SLA
+percentiles are aggregated over the same grouped query (PERCENTILE_CONT on
+PostgreSQL, nearest-rank from the ordered durations elsewhere).
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.db import connection
+from django.db.models import Avg, Count, Max, Q, F, Case, When, Value, CharField, ExpressionWrapper, DurationField
+from orders.models import OrderItem
+from .analytics import DEFAULT_PERCENTILES, EpochSeconds, PercentileCont, _hours, _nearest_rank, _percentile_key
+from .models import WarehouseTimelineLog
+
+TIMELINE_STAGES = ('picked', 'packed', 'shipped', 'out_for_delivery', 'delivered')
+
+# SLA stage -> (from timestamp, to timestamp)
+SLA_STAGES = {
+    'pack': ('picked_at', 'packed_at'),
+    'ship': ('packed_at', 'shipped_at'),
+    'deliver': ('shipped_at', 'delivered_at'),
+}
+
+
+def _duration(start, end):
+    return ExpressionWrapper(F(end) - F(start), output_field=DurationField())
+
+
+def warehouse_timeline(logs=None):
+    """
+    One row per order: order_id, order_number, <stage>_at (latest log of each
+    stage), current_status and time_to_pack / time_to_ship / time_to_delivery.
+    `logs` defaults to every hot and archived log.
+    """
+    logs = WarehouseTimelineLog.objects.all() if logs is None else logs
+    timeline = (
+        logs.order_by()
+        .values('order_id')
+        .annotate(
+            order_number=F('order__order_number'),
+            **{
+                f"{stage}_at": Max('timestamp', filter=Q(action=stage))
+                for stage in TIMELINE_STAGES
+            },
+        )
+    )
+    return timeline.annotate(
+        current_status=Case(
+            *[When(**{f"{stage}_at__isnull": False}, then=Value(stage)) for stage in reversed(TIMELINE_STAGES)],
+            default=Value('pending'),
+            output_field=CharField(),
+        ),
+        **{f"time_to_{name}": _duration(start, end) for name, (start, end) in SLA_STAGES.items()},
+    )
+
+
+def timeline_products(order_ids):
+    """{order_id: [{"variant_name", "product_name", "product_image"}]} for all orders in one query."""
+    products = defaultdict(list)
+    rows = (
+        OrderItem.objects.filter(order_id__in=set(order_ids))
+        .order_by('order_id', 'id')
+        .values_list('order_id', 'product_variant__variant_name',
+                     'product_variant__product__name', 'product_variant__product__image_url')
+    )
+    for order_id, variant_name, product_name, image_url in rows:
+        products[order_id].append({
+            "variant_name": variant_name,
+            "product_name": product_name,
+            "product_image": image_url or '',
+        })
+    return products
+
+
+def stage_sla(timeline=None, percentiles=DEFAULT_PERCENTILES, targets=None):
+    """
+    Per-stage duration statistics (hours) over a warehouse_timeline() queryset:
+    {stage: {"orders", "avg_hours", "p50_hours", ..., ["target_hours", "breaches"]}}.
+    `targets` maps stage -> SLA hours; orders slower than the target count as breaches.
+    """
+    timeline = warehouse_timeline() if timeline is None else timeline
+    targets = targets or {}
+    postgres = connection.vendor == 'postgresql'
+
+    aggregates = {}
+    for stage in SLA_STAGES:
+        field = f"time_to_{stage}"
+        aggregates[f"{stage}__orders"] = Count(field)
+        aggregates[f"{stage}__avg"] = Avg(field)
+        if postgres:
+            for p in percentiles:
+                aggregates[f"{stage}__{_percentile_key(p)}"] = PercentileCont(EpochSeconds(field), p)
+        if stage in targets:
+            limit = timedelta(hours=targets[stage])
+            aggregates[f"{stage}__breaches"] = Count(field, filter=Q(**{f"{field}__gt": limit}))
+    totals = timeline.aggregate(**aggregates)
+
+    if not postgres and percentiles:
+        samples = _duration_samples(timeline)
+        for stage, values in samples.items():
+            for p in percentiles:
+                totals[f"{stage}__{_percentile_key(p)}"] = _nearest_rank(values, p)
+
+    report = {}
+    for stage in SLA_STAGES:
+        average = totals[f"{stage}__avg"]
+        row = {
+            "orders": totals[f"{stage}__orders"],
+            "avg_hours": _hours(average.total_seconds()) if average is not None else None,
+        }
+        for p in percentiles:
+            row[_percentile_key(p)] = _hours(totals.get(f"{stage}__{_percentile_key(p)}"))
+        if stage in targets:
+            row["target_hours"] = targets[stage]
+            row["breaches"] = totals[f"{stage}__breaches"]
+        report[stage] = row
+    return report
+
+
+def _duration_samples(timeline):
+    """{stage: ascending duration seconds} from one read of the grouped timeline."""
+    fields = [f"time_to_{stage}" for stage in SLA_STAGES]
+    samples = {stage: [] for stage in SLA_STAGES}
+    for values in timeline.values_list(*fields):
+        for stage, duration in zip(SLA_STAGES, values):
+            if duration is not None:
+                samples[stage].append(duration.total_seconds())
+    for values in samples.values():
+        values.sort()
+    return samples
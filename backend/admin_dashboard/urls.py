@@ -2,11 +2,14 @@
 from django.urls import path
 from .views import (
                     AdminDashboardStatsAPIView,
+                    StockHoldMetricsAPIView,
+                    AdminDeliveryLatencyAPIView,
                     ProductAdminCreateAPIView,
                     ProductAdminDetailAPIView,
                     ProductBulkActionAPIView,
                     CustomerBlockAPIView,
                     CustomerListAPIView,
+                    CustomerSegmentsAPIView,
                     CustomerDetailAPIView,
                     AdminOrderListAPIView,
                     AdminOrderDetailAPIView,
@@ -17,6 +20,7 @@ from .views import (
                     WarehouseLogDetailAPIView,
                     WarehouseLogListAPIView,
                     WarehouseTimelineAPIView,
+                    WarehouseSLAAPIView,
                     AdminApproveDeliveryManRequestAPIView,
                     AdminDeliveryManRequestListAPIView,
                     AdminRejectDeliveryManRequestAPIView,
@@ -42,6 +46,7 @@ urlpatterns = [
     path("admin/variants/bulk-action/", VariantBulkActionAPIView.as_view(), name="variant-bulk-action"),
     
     path('admin/customers/', CustomerListAPIView.as_view(), name='admin-customer-list'),
+    path('admin/customers/segments/', CustomerSegmentsAPIView.as_view(), name='admin-customer-segments'),
     path("admin/customers/<int:id>/", CustomerDetailAPIView.as_view(), name="admin-customer-detail"),
     path('admin/customers/<int:pk>/block/', CustomerBlockAPIView.as_view(), name='admin-customer-block'),
 
@@ -58,6 +63,7 @@ urlpatterns = [
 
     path("admin/warehouse-logs/", WarehouseLogListAPIView.as_view(), name="warehouse-logs"),
     path("admin/warehouse-timeline/", WarehouseTimelineAPIView.as_view(), name=""),
+    path("admin/warehouse-timeline/sla/", WarehouseSLAAPIView.as_view(), name="warehouse-sla"),
     path("admin/warehouse-logs/<int:id>/", WarehouseLogDetailAPIView.as_view(), name="warehouse-log-detail"),
 
     path('admin/deliveryman-requests/', AdminDeliveryManRequestListAPIView.as_view(), name='admin-deliveryman-requests'),
@@ -80,6 +86,9 @@ urlpatterns = [
     path("admin/banners/create/", BannerCreateAPIView.as_view(), name="banner-create"),
     path("admin/banners/<int:pk>/", BannerUpdateDestroyAPIView.as_view(), name="banner-update-destroy"),
 
+    path("admin/stock-holds/metrics/", StockHoldMetricsAPIView.as_view(), name="admin-stock-hold-metrics"),
+    path("admin/analytics/delivery-time/", AdminDeliveryLatencyAPIView.as_view(), name="admin-delivery-time-analytics"),
+
 ]
 
 
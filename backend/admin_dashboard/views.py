@@ -21,14 +21,18 @@ from .serializers import (
                         DeliveryTrackingSerializer
                         )
 from django.shortcuts import get_object_or_404
+from django.http import Http404
 from django.utils.dateparse import parse_datetime
 from delivery.serializers import DeliveryManRequestSerializer,DeliveryManSerializer
 from delivery.models import DeliveryMan,DeliveryManRequest
 from rest_framework.exceptions import NotFound
 from django.db import transaction
-from django.db.models import Max,Q,F,Value,CharField
+from django.db.models import Q,F,Value,CharField
 from products.models import Product,ProductVariant
+from products.utils import refresh_product_listings
+from products.cache import bump_catalog_version
 import json
+import math
 from rest_framework.parsers import MultiPartParser,FormParser,JSONParser
 from rest_framework.exceptions import ValidationError
 from products.models import Banner,ProductVariantImage
@@ -40,8 +44,16 @@ from rest_framework.filters import OrderingFilter,SearchFilter
 from django.utils.dateparse import parse_date
 from orders.models import Order,ReturnRequest,ReplacementRequest,OrderItem
 from .helpers import str_to_bool
-from .pagination import FlexiblePageSizePagination,TimelinePagination
-from .models import WarehouseLog
+from .pagination import FlexiblePageSizePagination,TimelinePagination,OptionalKeysetPagination
+from .models import WarehouseLog, WarehouseLogArchive
+from .archive import HotThenArchive, archived_logs
+from orders.holds import hold_conversion_metrics
+from .analytics import delivery_latency, LATENCY_STARTS, LATENCY_GROUPS
+from .customers import RFM_SEGMENTS, rfm_segment_counts
+from .timeline import warehouse_timeline, timeline_products, stage_sla, SLA_STAGES
+from orders.stats import cached_stats
+from decimal import Decimal, InvalidOperation
+from datetime import timedelta
 User=get_user_model()
 
 class AdminDashboardStatsAPIView(APIView):
@@ -323,12 +335,14 @@ class VariantBulkActionAPIView(APIView):
             if value is None:
                 return Response({"error": "Value is required for set_featured"}, status=status.HTTP_400_BAD_REQUEST)
             variants.update(featured=value)
+            bump_catalog_version()
             return Response({"updated": variants.count(), "action": "set_featured"}, status=status.HTTP_200_OK)
 
         elif action == "set_availability":
             if value is None:
                 return Response({"error": "Value is required for set_availability"}, status=status.HTTP_400_BAD_REQUEST)
             variants.update(is_active=value)
+            bump_catalog_version()
             return Response({"updated": variants.count(), "action": "set_availability"}, status=status.HTTP_200_OK)
 
         return Response({"error": "Invalid action"}, status=status.HTTP_400_BAD_REQUEST)
@@ -356,12 +370,16 @@ class ProductBulkActionAPIView(APIView):
             if value is None:
                 return Response({"error": "Value is required for set_featured"}, status=400)
             products.update(featured=value)
+            refresh_product_listings(ids)
+            bump_catalog_version()
             return Response({"updated": products.count(), "action": "set_featured"}, status=200)
 
         elif action == "set_availability":
             if value is None:
                 return Response({"error": "Value is required for set_availability"}, status=400)
             products.update(is_available=value)
+            refresh_product_listings(ids)
+            bump_catalog_version()
             return Response({"updated": products.count(), "action": "set_availability"}, status=200)
 
         return Response({"error": "Invalid action"}, status=400)
@@ -372,13 +390,15 @@ class CustomerListAPIView(ListAPIView):
     permission_classes = [IsAdmin]
     filter_backends = [OrderingFilter, SearchFilter]
     ordering_fields = [
-        "created_at", "first_name", "last_name", "email", "phone_number", "block_count", "is_verified"
+        "created_at", "first_name", "last_name", "email", "phone_number", "block_count", "is_verified",
+        "total_orders", "delivered_orders", "total_spent", "last_order_date",
+        "recency_score", "frequency_score", "monetary_score",
     ]
     ordering = ["-created_at"]
     search_fields = ["first_name", "last_name", "email", "phone_number"]
 
     def get_queryset(self):
-        queryset = User.objects.filter(role='customer')
+        queryset = CustomerSerializer.setup_eager_loading(User.objects.filter(role='customer'))
         params = self.request.query_params
 
         # 🔍 Search filter
@@ -433,15 +453,57 @@ class CustomerListAPIView(ListAPIView):
         if min_block_count:
             queryset = queryset.filter(block_count__gte=min_block_count)
 
+        # 💰 Lifetime value / order count / recency filters
+        for param, lookup in (
+            ('min_spent', 'total_spent__gte'), ('max_spent', 'total_spent__lte'),
+            ('min_orders', 'total_orders__gte'), ('max_orders', 'total_orders__lte'),
+        ):
+            value = params.get(param)
+            if value:
+                try:
+                    queryset = queryset.filter(**{lookup: Decimal(value)})
+                except InvalidOperation:
+                    raise ValidationError({param: "Must be a number."})
+
+        # Inclusive YYYY-MM-DD bounds on the latest delivered order
+        if params.get('last_order_after'):
+            queryset = queryset.filter(last_order_date__date__gte=_date_param(params, 'last_order_after'))
+        if params.get('last_order_before'):
+            queryset = queryset.filter(last_order_date__date__lte=_date_param(params, 'last_order_before'))
+
+        inactive_days = params.get('inactive_days')
+        if inactive_days:
+            try:
+                cutoff = timezone.now() - timedelta(days=int(inactive_days))
+            except ValueError:
+                raise ValidationError({"inactive_days": "Must be an integer."})
+            queryset = queryset.filter(Q(last_order_date__lt=cutoff) | Q(last_order_date__isnull=True))
+
+        # 🧭 RFM segment filter
+        segment = params.get('segment')
+        if segment:
+            if segment not in RFM_SEGMENTS:
+                raise ValidationError({"segment": f"Must be one of: {', '.join(RFM_SEGMENTS)}."})
+            queryset = queryset.filter(rfm_segment=segment)
+
         # 🔃 Flexible sorting
         sort_by = params.getlist('sort_by') or ['-created_at']
         return queryset.order_by(*sort_by)
 
+class CustomerSegmentsAPIView(CustomerListAPIView):
+    """RFM segment sizes for the customers matching the customer list filters."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(rfm_segment_counts(queryset))
+
 class CustomerDetailAPIView(RetrieveAPIView):
     serializer_class=CustomerSerializer
     lookup_field='id'
     permission_classes=[IsAdmin]
-    queryset=User.objects.filter(role='customer')
+
+    def get_queryset(self):
+        return CustomerSerializer.setup_eager_loading(User.objects.filter(role='customer'))
     
 from django.utils import timezone
 
@@ -508,7 +570,8 @@ class CustomerBlockAPIView(APIView):
 class AdminOrderListAPIView(ListAPIView):
     serializer_class = AdminOrderSerializer
     permission_classes = [IsAdmin]
-    pagination_class = FlexiblePageSizePagination
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     filter_backends = [OrderingFilter, SearchFilter]
     ordering_fields = [
         'order_number',"created_at", "updated_at", "delivered_at", "total",
@@ -576,7 +639,8 @@ class AdminReturnRequestListAPIView(ListAPIView):
     serializer_class = ReturnRequestSerializer
     permission_classes = [IsAdmin]
     filter_backends = [SearchFilter, OrderingFilter]
-    pagination_class = FlexiblePageSizePagination
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     ordering_fields = ["created_at", "updated_at", "refund_amount", "status"]
     ordering = ["-created_at"]
     search_fields = ['id',
@@ -734,7 +798,8 @@ class WarehouseLogListAPIView(ListAPIView):
     serializer_class=WarehouseLogSerializer
     permission_classes=[IsWarehouseStaffOrAdmin]
     filter_backends=[OrderingFilter,SearchFilter]
-    pagination_class = FlexiblePageSizePagination
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('-timestamp', '-id')
     # Which fields can be used for ordering
     ordering_fields = ['timestamp', 'action', 'order__order_number', 'order_item__id']
     ordering = ['-timestamp']  # default ordering
@@ -770,6 +835,18 @@ class WarehouseLogListAPIView(ListAPIView):
         if updated_by_id:
             queryset = queryset.filter(updated_by__id=updated_by_id)
         return queryset
+
+    def filter_queryset(self, queryset):
+        hot = super().filter_queryset(queryset)
+        # ?archive=hot skips archived logs; by default pages continue into the archive once hot rows run out
+        if self.request.query_params.get('archive') == 'hot':
+            return hot
+        ordering = OrderingFilter().get_ordering(self.request, queryset, self) or self.ordering
+        # Archived rows are only in order relative to hot ones by timestamp
+        if ordering[0].lstrip('-') != 'timestamp':
+            raise ValidationError({"ordering": "Only timestamp ordering is supported with archived logs; pass archive=hot to order by other fields."})
+        archive = archived_logs(self.request.query_params, SearchFilter().get_search_terms(self.request))
+        return HotThenArchive(hot, archive).order_by(*ordering)
     
 class WarehouseLogDetailAPIView(RetrieveAPIView):
     serializer_class=WarehouseLogSerializer
@@ -781,6 +858,25 @@ class WarehouseLogDetailAPIView(RetrieveAPIView):
     )
     lookup_field='id'
 
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            log = get_object_or_404(WarehouseLogArchive, id=self.kwargs['id'])
+            self.check_object_permissions(self.request, log)
+            return log
+
+def _date_param(params, param):
+    """The ?param= date; a 400 for anything that is not a valid YYYY-MM-DD date."""
+    try:
+        value = parse_date(params[param])
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({param: "Use YYYY-MM-DD."})
+    return value
+
+
 class WarehouseTimelineAPIView(ListAPIView):
     serializer_class = WarehouseTimeLineSerializer
     pagination_class = TimelinePagination
@@ -788,14 +884,52 @@ class WarehouseTimelineAPIView(ListAPIView):
     filterset_class = WarehouseTimelineFilter
 
     def get_queryset(self):
-        return WarehouseLog.objects.values('order__id', 'order__order_number').annotate(
-            order_number=F('order__order_number'),
-            picked_at=Max('timestamp', filter=Q(action='picked')),
-            packed_at=Max('timestamp', filter=Q(action='packed')),
-            shipped_at=Max('timestamp', filter=Q(action='shipped')),
-            out_for_delivery_at=Max('timestamp', filter=Q(action='out_for_delivery')),
-            delivered_at=Max('timestamp', filter=Q(action='delivered')),
-        ).order_by('-picked_at')
+        return warehouse_timeline().order_by(F('picked_at').desc(nulls_last=True), '-order_id')
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        # Products for the whole page in one query instead of one per row
+        self.timeline_products = timeline_products([row['order_id'] for row in rows])
+        return page
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['products'] = getattr(self, 'timeline_products', None)
+        return context
+
+
+class WarehouseSLAAPIView(APIView):
+    """Per-stage (pack / ship / deliver) duration percentiles over orders picked in a date range."""
+    permission_classes = [IsWarehouseStaffOrAdmin]
+
+    def get(self, request):
+        params = request.query_params
+        timeline = warehouse_timeline()
+        for param, lookup in (("date_from", "picked_at__date__gte"), ("date_to", "picked_at__date__lte")):
+            if params.get(param):
+                timeline = timeline.filter(**{lookup: _date_param(params, param)})
+
+        targets = {}
+        for stage in SLA_STAGES:
+            param = f"{stage}_target_hours"
+            if params.get(param):
+                try:
+                    targets[stage] = float(params[param])
+                except ValueError:
+                    raise ValidationError({param: "Must be a number."})
+                if not math.isfinite(targets[stage]):
+                    raise ValidationError({param: "Must be a finite number."})
+
+        key = "warehouse-sla:" + ":".join(
+            f"{name}={params.get(name, '')}" for name in ["date_from", "date_to"] + [f"{s}_target_hours" for s in SLA_STAGES]
+        )
+        report = cached_stats(key, lambda: stage_sla(timeline, targets=targets))
+        return Response({
+            "date_from": params.get("date_from"),
+            "date_to": params.get("date_to"),
+            "stages": report,
+        })
 
 class AdminDeliveryManRequestListAPIView(ListAPIView):
     permission_classes=[IsAdmin]
@@ -1039,4 +1173,65 @@ class BannerUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Banner.objects.all()
     serializer_class = BannerSerializer
     permission_classes = [IsAdmin]
-    parser_classes = (MultiPartParser, FormParser)
\ No newline at end of file
+    parser_classes = (MultiPartParser, FormParser)
+
+# ADMIN: stock hold conversion metrics for unpaid online-payment orders
+class StockHoldMetricsAPIView(APIView):
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        days = request.query_params.get("days")
+        since = None
+        if days:
+            try:
+                since = timezone.now() - timedelta(days=int(days))
+            except ValueError:
+                raise ValidationError({"days": "Must be an integer."})
+        return Response(hold_conversion_metrics(since=since))
+
+
+# ADMIN: delivery time analytics (avg + percentiles) by day, deliveryman or postal region
+class AdminDeliveryLatencyAPIView(APIView):
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        params = request.query_params
+        start = params.get("start", "packed")
+        if start not in LATENCY_STARTS:
+            raise ValidationError({"start": f"Must be one of: {', '.join(LATENCY_STARTS)}."})
+        group_by = params.get("group_by") or None
+        if group_by and group_by not in LATENCY_GROUPS:
+            raise ValidationError({"group_by": f"Must be one of: {', '.join(LATENCY_GROUPS)}."})
+        try:
+            region_digits = min(max(int(params.get("region_digits", 3)), 1), 6)
+        except ValueError:
+            raise ValidationError({"region_digits": "Must be an integer."})
+
+        items = OrderItem.objects.all()
+        for param, lookup in (("date_from", "delivered_at__date__gte"), ("date_to", "delivered_at__date__lte")):
+            if params.get(param):
+                items = items.filter(**{lookup: _date_param(params, param)})
+        if params.get("deliveryman"):
+            try:
+                deliveryman_id = int(params["deliveryman"])
+            except ValueError:
+                raise ValidationError({"deliveryman": "Must be an integer."})
+            items = items.filter(order__delivered_by_id=deliveryman_id)
+
+        overall = delivery_latency(items, start=start)
+        groups = delivery_latency(items, start=start, group_by=group_by, region_digits=region_digits) if group_by else []
+
+        if group_by == "deliveryman":
+            names = {
+                d.id: d.user.get_full_name() or d.user.email
+                for d in DeliveryMan.objects.filter(id__in=[g["key"] for g in groups if g["key"]]).select_related("user")
+            }
+            for group in groups:
+                group["name"] = names.get(group["key"])
+
+        return Response({
+            "start": start,
+            "group_by": group_by,
+            "overall": overall[0] if overall else None,
+            "groups": groups,
+        })
@@ -0,0 +1,80 @@
+# backend/mailer.py
+"""
+Shared outbound mail helpers.
+
+Templates are compiled once per process and reused, and batches of messages go
+out over a single SMTP connection instead of one connect/login/quit per email.
+Used by the notification outbox (orders.notificationDispatch) and the account
+emails (accounts.email).
+"""
+import logging
+from functools import lru_cache
+from smtplib import SMTPServerDisconnected
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=64)
+def get_email_template(template_name):
+    """Compiled template for `template_name`, loaded once per process."""
+    return get_template(template_name)
+
+
+def render_email(template_name, context, request=None):
+    return get_email_template(template_name).render(context, request)
+
+
+def build_email(subject, to, text_body="", html_body=None, from_email=None):
+    """EmailMultiAlternatives with an optional HTML alternative; nothing is sent."""
+    if isinstance(to, str):
+        to = [to]
+    message = EmailMultiAlternatives(
+        subject, text_body, from_email or settings.DEFAULT_FROM_EMAIL, to
+    )
+    if html_body:
+        message.attach_alternative(html_body, "text/html")
+    return message
+
+
+def send_bulk(messages, connection=None):
+    """
+    Send `messages` over one backend connection, opened once for the batch.
+    A failing message does not abort the rest; returns {index: exception}
+    for the messages that could not be sent.
+    """
+    messages = list(messages)
+    failures = {}
+    if not messages:
+        return failures
+
+    own_connection = connection is None
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for index, message in enumerate(messages):
+            message.connection = connection
+            try:
+                try:
+                    connection.send_messages([message])
+                except SMTPServerDisconnected:
+                    # Server dropped an idle/long-lived session: reconnect once and retry
+                    connection.close()
+                    connection.open()
+                    connection.send_messages([message])
+            except Exception as e:
+                failures[index] = e
+    except Exception as e:
+        # Could not connect at all: every message not yet attempted fails
+        logger.warning("Mail connection failed: %s", e)
+        for index in range(len(messages)):
+            failures.setdefault(index, e)
+    finally:
+        if own_connection:
+            try:
+                connection.close()
+            except Exception:
+                pass
+    return failures
@@ -0,0 +1,81 @@
+# backend/query_budget.py
+import logging
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """connection.execute_wrapper hook that records every SQL statement run."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+
+@contextmanager
+def assert_max_queries(max_queries, using=connection):
+    """
+    Test helper: fail if the wrapped block runs more than `max_queries` queries.
+
+        with assert_max_queries(8):
+            client.get('/api/products/?page_size=50')
+    """
+    counter = QueryCounter()
+    with using.execute_wrapper(counter):
+        yield counter
+    if counter.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{counter.count} queries executed, budget is {max_queries}:\n" + "\n".join(counter.queries)
+        )
+
+
+def get_query_budget(path):
+    """Longest QUERY_BUDGETS prefix matching `path`, or None when the path is unbudgeted."""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    matches = [prefix for prefix in budgets if path.startswith(prefix)]
+    if not matches:
+        return None
+    return budgets[max(matches, key=len)]
+
+
+class QueryBudgetMiddleware:
+    """
+    Counts SQL queries per request for paths listed in settings.QUERY_BUDGETS and
+    reports the count in an X-Query-Count header. Over-budget requests are logged,
+    or raise QueryBudgetExceeded when QUERY_BUDGET_STRICT is on (useful in DEBUG/CI).
+    Installed only when settings.QUERY_BUDGET_ENABLED is on.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        budget = get_query_budget(request.path)
+        if budget is None:
+            return self.get_response(request)
+
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(counter.count)
+        if counter.count > budget:
+            message = f"{request.method} {request.path} ran {counter.count} queries (budget {budget})"
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 import os
+import sys
 
 load_dotenv() 
 from pathlib import Path
@@ -25,6 +26,9 @@ SECRET_KEY = env('SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = env('DEBUG')
 
+# `manage.py test` run
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=["*"])
 
 import cloudinary
@@ -41,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'accounts',
     'admin_dashboard',
     'products',
@@ -92,6 +97,53 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Cache: local memory by default; point CACHE_URL at a shared backend (e.g. rediscache://...)
+# in multi-process deployments so catalog invalidation reaches every worker.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+CATALOG_CACHE_TIMEOUT = 60 * 15
+CATALOG_CACHE_MAX_AGE = 60
+
+# Unpaid online-payment orders keep their stock this long before the sweeper releases it.
+# Run `manage.py expire_stock_holds` from cron (see render.yaml), or set STOCK_HOLD_SWEEP_INTERVAL (seconds)
+# to sweep from a background thread inside each server process.
+STOCK_HOLD_TTL_MINUTES = env.int('STOCK_HOLD_TTL_MINUTES', default=30)
+STOCK_HOLD_SWEEP_INTERVAL = env.int('STOCK_HOLD_SWEEP_INTERVAL', default=0)
+
+# Notification outbox: "async" sends on a background thread pool after commit,
+# "sync" sends inline after commit, "worker" leaves everything to `manage.py process_notifications`
+# (which also retries failures with exponential backoff in every mode; scheduled in render.yaml,
+# or run continuously as the Procfile worker).
+NOTIFICATION_DISPATCH_MODE = env('NOTIFICATION_DISPATCH_MODE', default='async')
+NOTIFICATION_MAX_RETRIES = 5
+NOTIFICATION_RETRY_BASE_SECONDS = 30
+NOTIFICATION_WORKER_THREADS = env.int('NOTIFICATION_WORKER_THREADS', default=4)
+
+# Admin dashboard: TTL for the few widgets not served from DailyMetrics rollups
+DASHBOARD_CACHE_TIMEOUT = env.int('DASHBOARD_CACHE_TIMEOUT', default=300)
+
+# Warehouse / delivery dashboard stats are shared across polling terminals for this many seconds
+WAREHOUSE_STATS_CACHE_TIMEOUT = env.int('WAREHOUSE_STATS_CACHE_TIMEOUT', default=10)
+
+# Warehouse logs older than this many days are moved out of the hot table by archive_warehouse_logs
+# (nightly cron in render.yaml)
+WAREHOUSE_LOG_RETENTION_DAYS = env.int('WAREHOUSE_LOG_RETENTION_DAYS', default=90)
+WAREHOUSE_LOG_ARCHIVE_DIR = env('WAREHOUSE_LOG_ARCHIVE_DIR', default=os.path.join(BASE_DIR, 'archive', 'warehouse_logs'))
+
+# Per-request SQL query ceilings for catalog listing endpoints (path prefix -> max queries).
+# Budgets are independent of page size; see backend/query_budget.py. The middleware
+# wraps every budgeted request's queries, so it only runs when QUERY_BUDGET_ENABLED
+# (on by default with DEBUG and under `manage.py test`, where going over budget fails the request).
+QUERY_BUDGETS = {
+    '/api/products/': 10,
+    '/api/variants/': 10,
+}
+QUERY_BUDGET_ENABLED = env.bool('QUERY_BUDGET_ENABLED', default=DEBUG or TESTING)
+QUERY_BUDGET_STRICT = env.bool('QUERY_BUDGET_STRICT', default=TESTING)
+if QUERY_BUDGET_ENABLED:
+    MIDDLEWARE.append('backend.query_budget.QueryBudgetMiddleware')
+
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 
@@ -182,7 +182,7 @@ class ProductVariantBulkAPIView(APIView):
         if not isinstance(variant_ids, list):
             return Response({"error": "variant_ids must be a list"}, status=400)
 
-        variants = ProductVariant.objects.filter(id__in=variant_ids).prefetch_related('images')
+        variants = ProductVariantSerializer.setup_eager_loading(ProductVariant.objects.filter(id__in=variant_ids))
         serializer = ProductVariantSerializer(variants, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -198,7 +198,7 @@ class GuestCartDetailsAPIView(APIView):
             return Response({"items": [], "total_quantity": 0, "total_price": "0.00"}, status=200)
 
         variant_ids = [item.get("product_variant_id") for item in guest_cart if item.get("product_variant_id")]
-        variants = ProductVariant.objects.filter(id__in=variant_ids).select_related('product').prefetch_related('images')
+        variants = ProductVariantSerializer.setup_eager_loading(ProductVariant.objects.filter(id__in=variant_ids))
 
         serialized_variants = ProductVariantSerializer(variants, many=True, context={'request': request}).data
         variant_map = {v["id"]: v for v in serialized_variants}
@@ -6,6 +6,7 @@ from .views import (
     DeliveryManProfileUpdateAPIView,
     DeliveryDashboardAPIView,
     DeliveryDetailAPIView,
+    DeliveryRunSheetAPIView,
 )
 
 urlpatterns = [
@@ -22,4 +23,5 @@ urlpatterns = [
     # ---------------- Dashboard / Detail ----------------
     path("deliveryman/dashboard/", DeliveryDashboardAPIView.as_view(), name="delivery-dashboard"),
     path("deliveryman/orders/", DeliveryDetailAPIView.as_view(), name="delivery-detail"),
+    path("deliveryman/run-sheet/", DeliveryRunSheetAPIView.as_view(), name="delivery-run-sheet"),
 ]
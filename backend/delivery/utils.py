@@ -1,9 +1,38 @@
 from collections import OrderedDict
+from django.db.models import Exists, OuterRef, F
+from orders.models import OrderItem, Notification, OrderItemStatus
+
+# Run-sheet orderings: most recently assigned first, or grouped along the route by PIN code / locality
+RUN_SHEET_ORDERINGS = {
+    "assigned": (F("order__assigned_at").desc(nulls_last=True), "order_id", "id"),
+    "route": ("order__shipping_address__postal_code", "order__shipping_address__locality", "order_id", "id"),
+}
+
+
+def run_sheet_items(deliveryman, statuses=None, sort="assigned"):
+    """
+    A deliveryman's assigned order items with the order, customer, address and
+    variant joined in and OTP state annotated (`otp_verified`, `otp_pending`),
+    so a whole run sheet is a single query.
+    """
+    statuses = statuses or [OrderItemStatus.OUT_FOR_DELIVERY, OrderItemStatus.FAILED]
+    otps = Notification.objects.filter(order_item=OuterRef("pk"), event="otp_delivery")
+    return (
+        OrderItem.objects.filter(order__delivered_by=deliveryman, status__in=statuses)
+        .select_related("order__user", "order__shipping_address", "product_variant")
+        .annotate(
+            otp_verified=Exists(otps.filter(otp_verified=True)),
+            otp_pending=Exists(otps.filter(otp_verified=False)),
+        )
+        .order_by(*RUN_SHEET_ORDERINGS[sort])
+    )
+
 
 def build_orders_dict(order_items_qs):
     """
     Converts a queryset of OrderItems into a grouped dictionary by order
-    suitable for API responses.
+    suitable for API responses. Use run_sheet_items() for the queryset so OTP
+    state and related rows come from the same query.
     """
     orders_dict = OrderedDict()
     for item in order_items_qs:
@@ -31,11 +60,19 @@ def build_orders_dict(order_items_qs):
                 "items": []
             }
 
+        otp_verified = getattr(item, "otp_verified", None)
+        if otp_verified is None:
+            otp_verified = item.notifications.filter(event="otp_delivery", otp_verified=True).exists()
+        otp_pending = getattr(item, "otp_pending", None)
+        if otp_pending is None:
+            otp_pending = item.notifications.filter(event="otp_delivery", otp_verified=False).exists()
+
         orders_dict[order.id]["items"].append({
             "id": item.id,
             "product_name": getattr(item.product_variant, "variant_name", ""),
             "status": item.status,
-            "pending_otp": not item.notifications.filter(event="otp_delivery", otp_verified=True).exists()
+            "pending_otp": not otp_verified,
+            "can_send_otp": otp_pending,
         })
 
     return list(orders_dict.values())
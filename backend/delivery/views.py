@@ -16,7 +16,10 @@ from delivery.permissions import IsDeliveryMan, IsDeliveryManOrAdmin
 from orders.models import Order, OrderItem, Notification, OrderItemStatus
 from promoter.utils import apply_promoter_commission
 from orders.signals import send_multichannel_notification
-from .utils import build_orders_dict
+from orders.notificationDispatch import enqueue_notifications
+from orders.stats import cached_deliveryman_stats
+from orders.state import validate_item_transition, recompute_order_status
+from .utils import build_orders_dict, run_sheet_items, RUN_SHEET_ORDERINGS
 
 def send_otp_notification(item, force_new=False):
     """
@@ -61,8 +64,8 @@ def send_otp_notification(item, force_new=False):
     )
     new_notif.save(update_fields=["message", "updated_at"])
 
-    # Send notification
-    new_notif.send_notification()
+    # Sent after commit by the notification outbox
+    enqueue_notifications([new_notif.id])
 
     return True
 
@@ -70,16 +73,14 @@ def mark_item_delivered(item):
     """Mark a single item as delivered"""
     if item.status == OrderItemStatus.DELIVERED:
         return
+    validate_item_transition(item.status, OrderItemStatus.DELIVERED)
     item.status = OrderItemStatus.DELIVERED
     item.delivered_at = timezone.now()
     item.save(update_fields=["status","delivered_at"])
 
     order = item.order
-    # Mark order delivered if all items delivered
-    if not order.orderitem_set.exclude(status=OrderItemStatus.DELIVERED).exists():
-        order.status = "delivered"
-        order.delivered_at = timezone.now()
-        order.save(update_fields=["status","delivered_at"])
+    # Order becomes delivered once all of its items are
+    if recompute_order_status(order) and order.status == "delivered":
         apply_promoter_commission(order)
 
     send_multichannel_notification(
@@ -92,6 +93,26 @@ def mark_item_delivered(item):
     )
 
 
+def move_order_items(order, from_status, new_status):
+    """
+    Move the order's items in `from_status` to `new_status`. The rows are locked
+    and each item's stored status is validated before the guarded UPDATE.
+    Returns the ids moved.
+    """
+    items = list(
+        order.orderitem_set.select_for_update()
+        .filter(status=from_status)
+        .order_by('id')
+        .values_list('id', 'status')
+    )
+    for _, current in items:
+        validate_item_transition(current, new_status)
+    item_ids = [item_id for item_id, _ in items]
+    if item_ids:
+        OrderItem.objects.filter(id__in=item_ids, status=from_status).update(status=new_status)
+    return item_ids
+
+
 # -------------------------
 # Unified Delivery Actions
 # -------------------------
@@ -166,13 +187,9 @@ class DeliveryActionAPIView(APIView):
             if order.delivered_by_id != deliveryman.id:
                 return Response({"error": "Order assigned to another deliveryman"}, status=403)
 
-            # Filter items currently out-for-delivery
-            out_for_delivery_items = order.orderitem_set.filter(status=OrderItemStatus.OUT_FOR_DELIVERY)
-            if not out_for_delivery_items.exists():
-                return Response({"error": "No out-for-delivery items to mark failed"}, status=400)
-
             # Mark all out-for-delivery items as FAILED
-            out_for_delivery_items.update(status=OrderItemStatus.FAILED)
+            if not move_order_items(order, OrderItemStatus.OUT_FOR_DELIVERY, OrderItemStatus.FAILED):
+                return Response({"error": "No out-for-delivery items to mark failed"}, status=400)
 
             # Optional: you can mark delivered_by=None to indicate it needs rescheduling
             order.delivered_by = None
@@ -201,13 +218,9 @@ class DeliveryActionAPIView(APIView):
             order = get_object_or_404(Order, order_number=order_number)
 
             # Only items that were FAILED can be rescheduled
-            failed_items = order.orderitem_set.filter(status=OrderItemStatus.FAILED)
-            if not failed_items.exists():
+            if not move_order_items(order, OrderItemStatus.FAILED, OrderItemStatus.OUT_FOR_DELIVERY):
                 return Response({"error": "No failed items to reschedule"}, status=400)
 
-            # Reschedule the items
-            failed_items.update(status=OrderItemStatus.OUT_FOR_DELIVERY)
-
             # Assign deliveryman
             order.delivered_by = deliveryman
             order.save(update_fields=["delivered_by", "updated_at"])
@@ -287,20 +300,7 @@ class DeliveryDashboardAPIView(APIView):
     def get(self, request):
         deliveryman = get_object_or_404(DeliveryMan, user=request.user)
 
-        active_deliveries = OrderItem.objects.filter(
-            order__delivered_by=deliveryman,
-            status='out_for_delivery'
-        ).count()
-
-        completed_deliveries = Order.objects.filter(delivered_by=deliveryman, status='delivered').count()
-        failed_deliveries = Order.objects.filter(delivered_by=deliveryman, status='failed').count()
-
-        pending_otp_verification = OrderItem.objects.filter(
-            order__delivered_by=deliveryman,
-            status='out_for_delivery',
-            notifications__event='otp_delivery',
-            notifications__otp_verified=False
-        ).count()
+        stats = cached_deliveryman_stats(deliveryman)
 
         return Response({
             "profile": {
@@ -312,10 +312,10 @@ class DeliveryDashboardAPIView(APIView):
                 "earnings": deliveryman.earnings
             },
             "stats": {
-                "active_deliveries": active_deliveries,
-                "completed_deliveries": completed_deliveries,
-                "failed_deliveries": failed_deliveries,
-                "pending_otp_verification": pending_otp_verification
+                "active_deliveries": stats["active_deliveries"],
+                "completed_deliveries": stats["completed_deliveries"],
+                "failed_deliveries": stats["failed_deliveries"],
+                "pending_otp_verification": stats["pending_otp_verification"]
             }
         })
 
@@ -324,37 +324,31 @@ class DeliveryDashboardAPIView(APIView):
 # Delivery Details
 
 class DeliveryDetailAPIView(APIView):
+    """
+    The deliveryman's run sheet: assigned orders with address, items and OTP
+    state. `?status=` picks item statuses (default out_for_delivery,failed);
+    `?sort=route` orders stops by PIN code and locality instead of assignment time.
+    """
     permission_classes = [IsDeliveryMan]
+    default_sort = "assigned"
 
     def get(self, request):
         deliveryman = get_object_or_404(DeliveryMan, user=request.user)
 
         # Get optional status query param
         status_param = request.query_params.get("status")
-        if status_param:
-            statuses = [s.strip() for s in status_param.split(",")]
-        else:
-            statuses = [OrderItemStatus.OUT_FOR_DELIVERY, OrderItemStatus.FAILED]
-
-        # Make sure we are using the constants for statuses
-        order_items_qs = OrderItem.objects.filter(
-            order__delivered_by=deliveryman,
-            status__in=statuses
-        ).select_related(
-            'order', 'product_variant', 'order__user', 'order__shipping_address'
-        ).prefetch_related(
-            'notifications'
-        ).order_by('-order__assigned_at')
-
-        orders = build_orders_dict(order_items_qs)
-
-        # Add pending OTP info per item
-        for order in orders:
-            for item in order['items']:
-                item['can_send_otp'] = any(
-                    n.event == 'otp_delivery' and not n.otp_verified for n in item.get('notifications', [])
-                )
+        statuses = [s.strip() for s in status_param.split(",")] if status_param else None
+
+        sort = request.query_params.get("sort", self.default_sort)
+        if sort not in RUN_SHEET_ORDERINGS:
+            raise ValidationError({"sort": f"Must be one of: {', '.join(RUN_SHEET_ORDERINGS)}."})
 
+        orders = build_orders_dict(run_sheet_items(deliveryman, statuses, sort=sort))
         return Response({"orders": orders})
 
 
+class DeliveryRunSheetAPIView(DeliveryDetailAPIView):
+    """Run sheet in route order, for loading at the start of a delivery run."""
+    default_sort = "route"
+
+
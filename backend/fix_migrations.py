@@ -74,7 +74,14 @@ if __name__ == "__main__":
     fake_missing_migrations("promoter", promoter_order)
 
     # --- Step 3: Orders migrations ---
-    fake_missing_migrations("orders")
+    # Only the legacy migrations; newer ones create tables and must really run
+    orders_order = [
+        "0001_initial",
+        "0002_initial",
+        "0003_alter_shippingaddress_city_and_more",
+        "0004_notification_otp_expires_at",
+    ]
+    fake_missing_migrations("orders", orders_order)
 
     # --- Step 4: Admin Dashboard migrations ---
     admin_order = ["0001_initial", "0002_alter_warehouselog_action"]
@@ -1,7 +1,9 @@
 from django.contrib import admin
+from .ledger import post_entries
 from .models import (
     Investor, Investment, InvestmentPayment,
-    ProductSaleShare, Payout, InvestorWallet
+    ProductSaleShare, Payout, InvestorWallet,
+    WalletEntry, WalletSnapshot, VariantMonthlySales
 )
 
 # -----------------------------
@@ -31,7 +33,7 @@ class InvestorWalletInline(admin.StackedInline):
     model = InvestorWallet
     can_delete = False
     max_num = 1
-    readonly_fields = ('last_updated', 'balance')
+    readonly_fields = ('last_updated', 'balance', 'invested_total')
 
     def has_add_permission(self, request, obj=None):
         return False
@@ -101,6 +103,47 @@ class PayoutAdmin(admin.ModelAdmin):
 
 @admin.register(InvestorWallet)
 class InvestorWalletAdmin(admin.ModelAdmin):
-    list_display = ('id', 'investor', 'balance', 'last_updated')
+    list_display = ('id', 'investor', 'balance', 'invested_total', 'last_updated')
     search_fields = ('investor__user__email',)
-    readonly_fields = ('last_updated', 'balance')
+    readonly_fields = ('last_updated', 'balance', 'invested_total')
+
+
+@admin.register(WalletEntry)
+class WalletEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'wallet', 'amount', 'kind', 'reference', 'created_at')
+    list_filter = ('kind', 'created_at')
+    search_fields = ('wallet__investor__user__email', 'reference', 'idempotency_key')
+
+    # The ledger is append-only; corrections are new 'adjustment' entries, posted
+    # through the ledger so the cached wallet balance moves with them
+    def save_model(self, request, obj, form, change):
+        written = post_entries([{
+            'investor_id': obj.wallet.investor_id,
+            'amount': obj.amount,
+            'kind': obj.kind,
+            'idempotency_key': obj.idempotency_key,
+            'reference': obj.reference,
+            'description': obj.description,
+        }])
+        if written:
+            obj.pk = written[0].pk
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(WalletSnapshot)
+class WalletSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('id', 'wallet', 'balance', 'last_entry_id', 'taken_at')
+    search_fields = ('wallet__investor__user__email',)
+
+
+@admin.register(VariantMonthlySales)
+class VariantMonthlySalesAdmin(admin.ModelAdmin):
+    list_display = ('product_variant', 'month', 'orders', 'units', 'sales_volume', 'refreshed_at')
+    list_filter = ('month',)
+    search_fields = ('product_variant__variant_name', 'product_variant__product__name')
+    readonly_fields = ('refreshed_at',)
@@ -0,0 +1,203 @@
+# investor/ledger.py
+"""
+Investor wallet ledger.
+
+WalletEntry rows are the source of truth for wallet balances: entries are
+only ever appended, each under a unique idempotency key, and
+InvestorWallet.balance is a running total kept in step with them in the same
+transaction. WalletSnapshot rows checkpoint the ledger so reconciliation only
+has to sum entries written after the latest snapshot.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Sum, Max, Count, F, Case, When, Value, DecimalField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Investment, InvestorWallet, WalletEntry, WalletSnapshot
+
+MONEY = DecimalField(max_digits=15, decimal_places=2)
+ZERO = Decimal('0.00')
+
+
+def _add_to_balances(wallet_ids, amounts, now):
+    """balance += amount for every wallet in one UPDATE."""
+    InvestorWallet.objects.filter(id__in=wallet_ids).update(
+        balance=F('balance') + Case(
+            *[When(id=wallet_id, then=Value(amount)) for wallet_id, amount in amounts.items()],
+            default=Value(ZERO),
+            output_field=MONEY,
+        ),
+        last_updated=now,
+    )
+
+
+def wallets_for(investor_ids, lock=False):
+    """{investor_id: wallet_id}, creating missing wallets; `lock` row-locks them for the transaction."""
+    investor_ids = set(investor_ids)
+    InvestorWallet.objects.bulk_create(
+        [InvestorWallet(investor_id=investor_id) for investor_id in investor_ids], ignore_conflicts=True
+    )
+    wallets = InvestorWallet.objects.filter(investor_id__in=investor_ids).order_by('id')
+    if lock:
+        wallets = wallets.select_for_update()
+    return dict(wallets.values_list('investor_id', 'id'))
+
+
+def post_entries(entries):
+    """
+    Append ledger entries and move the cached balances with them.
+
+    `entries` are dicts with investor_id, amount, kind, idempotency_key and
+    optionally reference / description. Entries whose key is already in the
+    ledger are skipped. Returns the WalletEntry objects actually written.
+    """
+    entries = [entry for entry in entries if entry['amount']]
+    if not entries:
+        return []
+    now = timezone.now()
+    with transaction.atomic():
+        wallet_ids = wallets_for({entry['investor_id'] for entry in entries}, lock=True)
+        seen = set(
+            WalletEntry.objects.filter(idempotency_key__in=[entry['idempotency_key'] for entry in entries])
+            .values_list('idempotency_key', flat=True)
+        )
+        new = []
+        for entry in entries:
+            if entry['idempotency_key'] in seen:
+                continue
+            seen.add(entry['idempotency_key'])
+            new.append(WalletEntry(
+                wallet_id=wallet_ids[entry['investor_id']],
+                amount=entry['amount'],
+                kind=entry['kind'],
+                idempotency_key=entry['idempotency_key'],
+                reference=entry.get('reference', ''),
+                description=entry.get('description', ''),
+            ))
+        if not new:
+            return []
+        WalletEntry.objects.bulk_create(new)
+
+        totals = defaultdict(Decimal)
+        for entry in new:
+            totals[entry.wallet_id] += Decimal(entry.amount)
+        _add_to_balances(list(totals), totals, now)
+    return new
+
+
+def settle_references(amounts, kind, description=''):
+    """
+    Bring the ledger total of each reference to its target amount.
+
+    `amounts` maps reference -> (investor_id, target). Only the difference from
+    what the ledger already holds for the reference is posted, under the key
+    "<reference>#<n>", so re-settling an unchanged amount writes nothing.
+    Returns the entries written.
+    """
+    if not amounts:
+        return []
+    with transaction.atomic():
+        wallets_for({investor_id for investor_id, _ in amounts.values()}, lock=True)
+        posted = {
+            row['reference']: row
+            for row in WalletEntry.objects.filter(reference__in=list(amounts))
+            .values('reference')
+            .annotate(total=Sum('amount'), count=Count('id'))
+        }
+        entries = []
+        for reference, (investor_id, target) in amounts.items():
+            row = posted.get(reference, {'total': ZERO, 'count': 0})
+            delta = Decimal(target) - (row['total'] or ZERO)
+            if delta:
+                entries.append({
+                    'investor_id': investor_id,
+                    'amount': delta,
+                    'kind': kind,
+                    'idempotency_key': f"{reference}#{row['count'] + 1}",
+                    'reference': reference,
+                    'description': description,
+                })
+        return post_entries(entries)
+
+
+# -----------------------------
+# Reconciliation
+# -----------------------------
+def ledger_balances(use_snapshots=True):
+    """
+    {wallet_id: (ledger balance, last entry id, snapshot entry id)} for every
+    wallet with entries or snapshots: the latest snapshot plus the entries
+    written after it, summed in one GROUP BY.
+    """
+    latest = WalletSnapshot.objects.filter(wallet=OuterRef('wallet')).order_by('-last_entry_id')
+    entries = WalletEntry.objects.order_by()
+    balances = {}
+    if use_snapshots:
+        entries = entries.annotate(
+            snapshot_entry=Coalesce(Subquery(latest.values('last_entry_id')[:1]), Value(0))
+        ).filter(id__gt=F('snapshot_entry'))
+        for wallet_id, balance, last_entry_id in (
+            WalletSnapshot.objects.filter(id=Subquery(latest.values('id')[:1]))
+            .values_list('wallet', 'balance', 'last_entry_id')
+        ):
+            balances[wallet_id] = (balance, last_entry_id, last_entry_id)
+
+    for wallet_id, total, last_entry_id in (
+        entries.values('wallet').annotate(total=Sum('amount'), last_entry=Max('id'))
+        .values_list('wallet', 'total', 'last_entry')
+    ):
+        balance, _, snapshot_entry_id = balances.get(wallet_id, (ZERO, 0, 0))
+        balances[wallet_id] = (balance + total, last_entry_id, snapshot_entry_id)
+    return balances
+
+
+def reconcile_wallets(use_snapshots=True, snapshot=False, dry_run=False):
+    """
+    Rebuild every cached wallet balance from the ledger. Returns
+    {wallet_id: (cached, ledger)} for the wallets that were out of step.
+    With `snapshot`, records a WalletSnapshot of each wallet's ledger total.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Lock first so no entry can be posted between reading the ledger and fixing the cache
+        wallets = list(InvestorWallet.objects.select_for_update().order_by('id').values_list('id', 'balance'))
+        ledger = ledger_balances(use_snapshots=use_snapshots)
+        drift = {}
+        for wallet_id, cached in wallets:
+            expected = ledger.get(wallet_id, (ZERO, 0))[0]
+            if cached != expected:
+                drift[wallet_id] = (cached, expected)
+        if dry_run:
+            return drift
+
+        if drift:
+            InvestorWallet.objects.filter(id__in=list(drift)).update(
+                balance=Case(
+                    *[When(id=wallet_id, then=Value(expected)) for wallet_id, (_, expected) in drift.items()],
+                    output_field=MONEY,
+                ),
+                last_updated=now,
+            )
+        if snapshot:
+            WalletSnapshot.objects.bulk_create([
+                WalletSnapshot(wallet_id=wallet_id, balance=balance, last_entry_id=last_entry_id)
+                for wallet_id, (balance, last_entry_id, snapshot_entry_id) in ledger.items()
+                if last_entry_id > snapshot_entry_id
+            ])
+    return drift
+
+
+# -----------------------------
+# Cached investment totals
+# -----------------------------
+def refresh_invested_totals(investor_ids=None):
+    """Recompute InvestorWallet.invested_total (confirmed investments) in one UPDATE."""
+    confirmed = (
+        Investment.objects.filter(investor=OuterRef('investor'), confirmed=True)
+        .order_by().values('investor').annotate(total=Sum('amount')).values('total')
+    )
+    wallets = InvestorWallet.objects.all()
+    if investor_ids is not None:
+        wallets = wallets.filter(investor_id__in=investor_ids)
+    return wallets.update(invested_total=Coalesce(Subquery(confirmed, output_field=MONEY), Value(ZERO)))
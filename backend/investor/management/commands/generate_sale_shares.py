@@ -0,0 +1,38 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from investor.utils import generate_product_sale_shares
+
+
+class Command(BaseCommand):
+    help = "Settle investor sale shares for a month (default: last month). Safe to re-run for the same period."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="Month to settle as YYYY-MM.")
+        parser.add_argument('--start', help="Period start (YYYY-MM-DD), with --end instead of --month.")
+        parser.add_argument('--end', help="Period end (YYYY-MM-DD).")
+
+    def _parse(self, value, name):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"--{name} must be a date in YYYY-MM-DD format")
+
+    def handle(self, *args, **options):
+        if options['start'] or options['end']:
+            if not (options['start'] and options['end']):
+                raise CommandError("--start and --end must be given together")
+            start, end = self._parse(options['start'], 'start'), self._parse(options['end'], 'end')
+        else:
+            if options['month']:
+                start = self._parse(f"{options['month']}-01", 'month')
+            else:
+                start = (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+            end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        if start > end:
+            raise CommandError("--start must not be after --end")
+
+        result = generate_product_sale_shares(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Settled {start}..{end}: {result['investors']} investors, {result['credited']} credited"
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from investor.ledger import reconcile_wallets, refresh_invested_totals
+
+
+class Command(BaseCommand):
+    help = "Rebuild cached investor wallet balances from the wallet ledger, optionally snapshotting the totals"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Sum the whole ledger instead of starting from snapshots")
+        parser.add_argument('--snapshot', action='store_true', help="Record a snapshot of every wallet's ledger total")
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it")
+
+    def handle(self, *args, **options):
+        drift = reconcile_wallets(
+            use_snapshots=not options['full'], snapshot=options['snapshot'], dry_run=options['dry_run']
+        )
+        for wallet_id, (cached, ledger) in sorted(drift.items()):
+            self.stdout.write(f"wallet {wallet_id}: cached {cached} != ledger {ledger}")
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(drift)} wallets out of step with the ledger")
+            return
+        refresh_invested_totals()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled wallets from the ledger: {len(drift)} corrected"))
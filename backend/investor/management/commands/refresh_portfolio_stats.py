@@ -0,0 +1,23 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from investor.portfolio import refresh_variant_sales
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly per-variant sales table behind investor portfolio analytics (run periodically)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=2,
+                            help="Rebuild the current month and the N-1 before it (default 2).")
+        parser.add_argument('--full', action='store_true', help="Rebuild all history")
+
+    def handle(self, *args, **options):
+        since = None
+        if not options['full']:
+            since = timezone.localdate().replace(day=1)
+            for _ in range(max(options['months'], 1) - 1):
+                since = (since - timedelta(days=1)).replace(day=1)
+        written = refresh_variant_sales(since)
+        scope = "all history" if since is None else f"months since {since:%Y-%m}"
+        self.stdout.write(self.style.SUCCESS(f"Refreshed variant monthly sales for {scope}: {written} rows"))
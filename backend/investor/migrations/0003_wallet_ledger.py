@@ -0,0 +1,116 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:30
+
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value, DecimalField
+from django.db.models.functions import Coalesce
+
+
+def open_ledgers(apps, schema_editor):
+    """
+    Carry existing balances into the ledger and fill invested_total.
+
+    Every paid payout and settled sale share already counted in a balance gets
+    its own entry under the key the live code uses ("payout:<id>",
+    "sale-share:<investor>:<start>:<end>#1"), so saving an old payout or
+    re-running an old period is a no-op; the opening entry holds the rest.
+    """
+    InvestorWallet = apps.get_model('investor', 'InvestorWallet')
+    WalletEntry = apps.get_model('investor', 'WalletEntry')
+    Investment = apps.get_model('investor', 'Investment')
+    Payout = apps.get_model('investor', 'Payout')
+    ProductSaleShare = apps.get_model('investor', 'ProductSaleShare')
+
+    history = []
+    for payout_id, investor_id, amount in Payout.objects.filter(status='paid').values_list('id', 'investor_id', 'amount'):
+        history.append((investor_id, amount, 'payout', f"payout:{payout_id}", f"payout:{payout_id}", f"Payout #{payout_id}"))
+    for investor_id, start, end, share in ProductSaleShare.objects.values_list(
+        'investor_id', 'period_start', 'period_end', 'investor_share'
+    ):
+        reference = f"sale-share:{investor_id}:{start}:{end}"
+        history.append((investor_id, share, 'sale_share', f"{reference}#1", reference, f"Sale share {start} to {end}"))
+
+    InvestorWallet.objects.bulk_create(
+        [InvestorWallet(investor_id=investor_id) for investor_id in {row[0] for row in history}],
+        ignore_conflicts=True,
+    )
+    wallets = dict(InvestorWallet.objects.values_list('investor_id', 'id'))
+    balances = dict(InvestorWallet.objects.values_list('id', 'balance'))
+
+    entries = []
+    seeded = defaultdict(Decimal)
+    for investor_id, amount, kind, key, reference, description in history:
+        wallet_id = wallets[investor_id]
+        seeded[wallet_id] += amount
+        entries.append(WalletEntry(
+            wallet_id=wallet_id, amount=amount, kind=kind,
+            idempotency_key=key, reference=reference, description=description,
+        ))
+    for wallet_id, balance in balances.items():
+        opening = balance - seeded[wallet_id]
+        if opening:
+            entries.append(WalletEntry(
+                wallet_id=wallet_id,
+                amount=opening,
+                kind='opening',
+                idempotency_key=f"opening:{wallet_id}",
+                description="Balance before the wallet ledger",
+            ))
+    WalletEntry.objects.bulk_create(entries, batch_size=1000)
+
+    confirmed = (
+        Investment.objects.filter(investor=OuterRef('investor'), confirmed=True)
+        .order_by().values('investor').annotate(total=Sum('amount')).values('total')
+    )
+    money = DecimalField(max_digits=15, decimal_places=2)
+    InvestorWallet.objects.update(invested_total=Coalesce(Subquery(confirmed, output_field=money), Value(0), output_field=money))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investor', '0002_remove_investmentpayment_investment_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='investorwallet',
+            name='invested_total',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=15),
+        ),
+        migrations.CreateModel(
+            name='WalletEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('kind', models.CharField(choices=[('opening', 'Opening balance'), ('sale_share', 'Sale share'), ('payout', 'Payout'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('idempotency_key', models.CharField(max_length=150, unique=True)),
+                ('reference', models.CharField(blank=True, db_index=True, default='', max_length=150)),
+                ('description', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='investor.investorwallet')),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['wallet', 'id'], name='investor_wa_wallet__1b351b_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WalletSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('last_entry_id', models.BigIntegerField(default=0)),
+                ('taken_at', models.DateTimeField(auto_now_add=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='investor.investorwallet')),
+            ],
+            options={
+                'ordering': ['-last_entry_id'],
+                'indexes': [models.Index(fields=['wallet', '-last_entry_id'], name='investor_wa_wallet__00a972_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investor', '0003_wallet_ledger'),
+        ('products', '0022_productsearchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VariantMonthlySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('sales_volume', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('product_variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_sales', to='products.productvariant')),
+            ],
+            options={
+                'verbose_name_plural': 'Variant monthly sales',
+                'ordering': ['month'],
+                'constraints': [models.UniqueConstraint(fields=('product_variant', 'month'), name='unique_variant_month_sales')],
+            },
+        ),
+    ]
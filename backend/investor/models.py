@@ -3,7 +3,7 @@ from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
 from django.db.models import Sum
 from rest_framework.exceptions import ValidationError
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from products.models import ProductVariant
 from django.dispatch import receiver
 User = get_user_model()
@@ -35,6 +35,10 @@ class Investor(models.Model):
         return self.user.email
     @property
     def total_confirmed_investments(self):
+        # Cached on the wallet (see investor.ledger.refresh_invested_totals)
+        wallet = getattr(self, 'wallet', None)
+        if wallet is not None:
+            return wallet.invested_total
         return self.investments.filter(confirmed=True).aggregate(total=Sum("amount"))["total"] or 0
 
 class Investment(models.Model):
@@ -126,12 +130,86 @@ class Payout(models.Model):
 
 class InvestorWallet(models.Model):
     investor = models.OneToOneField(Investor, related_name='wallet', on_delete=models.CASCADE)
+    # Cached running total of the wallet's ledger entries; only investor.ledger writes it
     balance = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)  # ✅ Increased max_digits
+    # Cached sum of the investor's confirmed investments
+    invested_total = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
     last_updated = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.investor.user.email} - ₹{self.balance}"
 
+
+class WalletEntry(models.Model):
+    """
+    Append-only wallet ledger. Every balance change is one entry with a unique
+    idempotency key, so replaying the same credit or debit is a no-op.
+    """
+    KIND_CHOICES = [
+        ('opening', 'Opening balance'),
+        ('sale_share', 'Sale share'),
+        ('payout', 'Payout'),
+        ('adjustment', 'Adjustment'),
+    ]
+    wallet = models.ForeignKey(InvestorWallet, related_name='entries', on_delete=models.CASCADE)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)  # positive = credit, negative = debit
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    idempotency_key = models.CharField(max_length=150, unique=True)
+    # What the entry settles, e.g. "sale-share:<investor>:<start>:<end>"; several entries may share one
+    reference = models.CharField(max_length=150, blank=True, default='', db_index=True)
+    description = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['wallet', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet.investor.user.email} {self.amount:+} ({self.kind})"
+
+
+class WalletSnapshot(models.Model):
+    """Ledger total of a wallet up to and including `last_entry_id`; reconciliation starts from the latest one."""
+    wallet = models.ForeignKey(InvestorWallet, related_name='snapshots', on_delete=models.CASCADE)
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+    last_entry_id = models.BigIntegerField(default=0)
+    taken_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-last_entry_id']
+        indexes = [
+            models.Index(fields=['wallet', '-last_entry_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet} @ entry {self.last_entry_id}: ₹{self.balance}"
+
+class VariantMonthlySales(models.Model):
+    """
+    Delivered sales of one variant in one month (orders bucketed by created_at),
+    rebuilt periodically by investor.portfolio.refresh_variant_sales. Portfolio
+    analytics read these rows instead of scanning order history.
+    """
+    product_variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name='monthly_sales')
+    month = models.DateField()  # first day of the month
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    sales_volume = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['month']
+        constraints = [
+            models.UniqueConstraint(fields=['product_variant', 'month'], name='unique_variant_month_sales'),
+        ]
+        verbose_name_plural = 'Variant monthly sales'
+
+    def __str__(self):
+        return f"{self.product_variant} {self.month:%Y-%m}: ₹{self.sales_volume}"
+
+
 @receiver(post_save, sender=Investor)
 def create_investor_wallet(sender,instance,created,**kwargs):
     if created and not hasattr(instance,'wallet'):
@@ -139,7 +217,20 @@ def create_investor_wallet(sender,instance,created,**kwargs):
     
 @receiver(post_save, sender=Payout)
 def update_wallet_on_payout(sender, instance, created, **kwargs):
+    # Keyed by payout id, so saving a paid payout again does not credit twice
     if instance.status == 'paid':
-        wallet = instance.investor.wallet
-        wallet.balance += instance.amount
-        wallet.save()
\ No newline at end of file
+        from .ledger import post_entries
+        post_entries([{
+            'investor_id': instance.investor_id,
+            'amount': instance.amount,
+            'kind': 'payout',
+            'idempotency_key': f"payout:{instance.pk}",
+            'reference': f"payout:{instance.pk}",
+            'description': f"Payout #{instance.pk}",
+        }])
+
+
+@receiver([post_save, post_delete], sender=Investment)
+def refresh_invested_total(sender, instance, **kwargs):
+    from .ledger import refresh_invested_totals
+    refresh_invested_totals([instance.investor_id])
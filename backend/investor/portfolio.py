@@ -0,0 +1,182 @@
+# investor/portfolio.py
+"""
+Investor portfolio analytics.
+
+VariantMonthlySales holds delivered sales per variant per month and is rebuilt
+periodically (see the refresh_portfolio_stats command), so a portfolio page
+reads two small tables instead of order history. Profit shares follow the
+settlement rule in investor.utils; a variant's monthly share is split between
+an investor's investments in it by amount, counting each investment from the
+month it was made.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Sum, F, ExpressionWrapper, DecimalField, DateField
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from orders.models import OrderItem
+from .models import Investment, VariantMonthlySales
+from .utils import PROFIT_MARGIN, INVESTOR_PROFIT_SHARE, money
+
+SHARE_RATE = PROFIT_MARGIN * INVESTOR_PROFIT_SHARE
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def refresh_variant_sales(since=None):
+    """
+    Rebuild VariantMonthlySales for every month from `since` (a date; default:
+    all history) in one GROUP BY plus one upsert. Returns the rows written.
+    """
+    items = OrderItem.objects.filter(order__status='delivered')
+    if since is not None:
+        since = month_start(since)
+        lower = timezone.make_aware(datetime.combine(since, time.min), timezone.get_current_timezone())
+        items = items.filter(order__created_at__gte=lower)
+
+    line_total = ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=15, decimal_places=2))
+    rows = (
+        items.order_by()
+        .annotate(month=TruncMonth('order__created_at', output_field=DateField()))
+        .values('product_variant_id', 'month')
+        .annotate(
+            order_count=Count('order_id', distinct=True),
+            unit_count=Sum('quantity'),
+            volume=Sum(line_total),
+        )
+    )
+    sales = [
+        VariantMonthlySales(
+            product_variant_id=row['product_variant_id'],
+            month=row['month'],
+            orders=row['order_count'],
+            units=row['unit_count'] or 0,
+            sales_volume=row['volume'] or 0,
+        )
+        for row in rows
+    ]
+
+    with transaction.atomic():
+        stale = VariantMonthlySales.objects.all()
+        if since is not None:
+            stale = stale.filter(month__gte=since)
+        # Drop months that no longer have delivered sales (cancellations, returns)
+        keep = {(row.product_variant_id, row.month) for row in sales}
+        stale_ids = [
+            row_id for row_id, variant_id, month in stale.values_list('id', 'product_variant_id', 'month')
+            if (variant_id, month) not in keep
+        ]
+        VariantMonthlySales.objects.filter(id__in=stale_ids).delete()
+        if sales:
+            VariantMonthlySales.objects.bulk_create(
+                sales,
+                update_conflicts=True,
+                unique_fields=['product_variant', 'month'],
+                update_fields=['orders', 'units', 'sales_volume', 'refreshed_at'],
+                batch_size=1000,
+            )
+    return len(sales)
+
+
+def _roi(share, amount):
+    return round(float(share / amount * 100), 2) if amount else None
+
+
+def investor_portfolio(investor):
+    """
+    Per-investment sales volume, profit share and ROI by month, plus portfolio
+    totals, for an investor's confirmed investments (2 queries).
+    """
+    investments = list(
+        Investment.objects.filter(investor=investor, confirmed=True, product_variant__isnull=False)
+        .select_related('product_variant__product')
+        .order_by('invested_at', 'id')
+    )
+    by_variant = defaultdict(list)
+    for investment in investments:
+        by_variant[investment.product_variant_id].append(investment)
+
+    sales = defaultdict(list)
+    refreshed_at = None
+    if by_variant:
+        first_month = month_start(timezone.localdate(investments[0].invested_at))
+        rows = VariantMonthlySales.objects.filter(product_variant_id__in=by_variant, month__gte=first_month)
+        for row in rows.order_by('month'):
+            sales[row.product_variant_id].append(row)
+            refreshed_at = max(refreshed_at, row.refreshed_at) if refreshed_at else row.refreshed_at
+
+    series = {investment.id: [] for investment in investments}
+    monthly = defaultdict(lambda: {'sales_volume': Decimal('0'), 'profit_share': Decimal('0')})
+    for variant_id, variant_investments in by_variant.items():
+        for row in sales[variant_id]:
+            active = [
+                inv for inv in variant_investments if month_start(timezone.localdate(inv.invested_at)) <= row.month
+            ]
+            invested = sum(inv.amount for inv in active)
+            if not invested:
+                continue
+            variant_share = row.sales_volume * SHARE_RATE
+            monthly[row.month]['sales_volume'] += row.sales_volume
+            for inv in active:
+                share = variant_share * inv.amount / invested
+                series[inv.id].append({'month': row.month, 'sales_volume': row.sales_volume,
+                                       'units': row.units, 'profit_share': share})
+                monthly[row.month]['profit_share'] += share
+
+    results = []
+    for investment in investments:
+        cumulative = Decimal('0')
+        points = []
+        for point in series[investment.id]:
+            cumulative += point['profit_share']
+            points.append({
+                'month': point['month'],
+                'sales_volume': point['sales_volume'],
+                'units': point['units'],
+                'profit_share': money(point['profit_share']),
+                'cumulative_share': money(cumulative),
+                'roi_percent': _roi(cumulative, investment.amount),
+            })
+        variant = investment.product_variant
+        results.append({
+            'investment_id': investment.id,
+            'product_variant_id': variant.id,
+            'product_name': variant.product.name,
+            'variant_name': variant.variant_name,
+            'amount': investment.amount,
+            'invested_at': investment.invested_at,
+            'sales_volume': sum((p['sales_volume'] for p in points), Decimal('0')),
+            'units': sum(p['units'] for p in points),
+            'profit_share': money(cumulative),
+            'roi_percent': _roi(cumulative, investment.amount),
+            'monthly': points,
+        })
+
+    invested = sum((inv.amount for inv in investments), Decimal('0'))
+    earned = sum((r['profit_share'] for r in results), Decimal('0'))
+    cumulative = Decimal('0')
+    timeline = []
+    for month in sorted(monthly):
+        cumulative += monthly[month]['profit_share']
+        timeline.append({
+            'month': month,
+            'sales_volume': monthly[month]['sales_volume'],
+            'profit_share': money(monthly[month]['profit_share']),
+            'cumulative_share': money(cumulative),
+            'roi_percent': _roi(cumulative, invested),
+        })
+    return {
+        'refreshed_at': refreshed_at,
+        'totals': {
+            'investments': len(investments),
+            'invested': invested,
+            'profit_share': earned,
+            'roi_percent': _roi(earned, invested),
+        },
+        'investments': results,
+        'monthly': timeline,
+    }
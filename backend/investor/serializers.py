@@ -1,4 +1,4 @@
-from .models import Investment, Investor, InvestorWallet, Payout, ProductSaleShare,InvestmentPayment
+from .models import Investment, Investor, InvestorWallet, Payout, ProductSaleShare,InvestmentPayment,WalletEntry
 from rest_framework import serializers
 from products.models import ProductVariant
 from products.serializers import ProductVariantSerializer
@@ -29,6 +29,13 @@ class InvestmentSerializer(serializers.ModelSerializer):
 
         read_only_fields = ['investor', 'invested_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load everything this serializer touches so a list costs a fixed number of queries."""
+        return queryset.select_related(
+            'investor__wallet', 'product_variant__product__category'
+        ).prefetch_related('product_variant__images')
+
     
 
 class InvestmentPaymentSerializer(serializers.ModelSerializer):
@@ -107,7 +114,14 @@ class InvestorWalletSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = InvestorWallet
-        fields = ['id', 'investor',  'balance', 'last_updated']
-        read_only_fields = ['balance', 'last_updated']
+        fields = ['id', 'investor',  'balance', 'invested_total', 'last_updated']
+        read_only_fields = ['balance', 'invested_total', 'last_updated']
+
+
+class WalletEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WalletEntry
+        fields = ['id', 'amount', 'kind', 'reference', 'description', 'created_at']
+        read_only_fields = fields
 
     
\ No newline at end of file
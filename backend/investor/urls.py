@@ -7,7 +7,9 @@ from .views import (
     ProductSaleShareListAPIView,
     PayoutListCreateAPIView,
     InvestorWalletDetailAPIView,
+    WalletEntryListAPIView,
     InvestmentSummaryDetailedAPIView,
+    InvestmentPortfolioAPIView,
     GenerateProductSalesShareAPIView,
     PayoutDetailUpdateAPIView,  
     RazorpayInvestmentOrderCreateAPIView,
@@ -23,6 +25,7 @@ urlpatterns = [
     path('investments/', InvestmentListCreateAPIView.as_view(), name='investment-list-create'),
     path('investments/<int:pk>/', InvestmentRetrieveUpdateDestroyAPIView.as_view(), name='investment-detail'),
     path("investments/summary/", InvestmentSummaryDetailedAPIView.as_view(), name="investment-summary"),
+    path("investments/portfolio/", InvestmentPortfolioAPIView.as_view(), name="investment-portfolio"),
 
     # Product sales shares
     path('product-sale-shares/', ProductSaleShareListAPIView.as_view(), name='product-sale-share-list-create'),
@@ -35,6 +38,8 @@ urlpatterns = [
     # Wallets
     path('wallets/<int:investor_id>/', InvestorWalletDetailAPIView.as_view(), name='investor-wallet-detail'),  # Admin use
     path('wallet/', InvestorWalletDetailAPIView.as_view(), name='investor-wallet-self'),  # Investor use
+    path('wallets/<int:investor_id>/entries/', WalletEntryListAPIView.as_view(), name='investor-wallet-entries'),  # Admin use
+    path('wallet/entries/', WalletEntryListAPIView.as_view(), name='investor-wallet-entries-self'),  # Investor use
 
     path("investment/razorpay/create-order/", RazorpayInvestmentOrderCreateAPIView.as_view(), name="investment-razorpay-create-order"),
     path("investment/razorpay/verify-payment/", RazorpayInvestmentVerifyAPIView.as_view(), name="investment-razorpay-verify"),
@@ -1,9 +1,20 @@
-from .models import ProductSaleShare
+import logging
+from collections import defaultdict
 from datetime import date,time,datetime
+from django.db import transaction
 from django.db.models import Sum,F,ExpressionWrapper,DecimalField
-from .models import ProductSaleShare,Investment,InvestorWallet
+from django.utils import timezone
+from .models import ProductSaleShare,Investment
+from .ledger import settle_references
 from orders.models import OrderItem
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
+
+logger = logging.getLogger(__name__)
+
+# Business logic: 20% profit margin, 10% of profit goes to investor
+PROFIT_MARGIN = Decimal('0.2')
+INVESTOR_PROFIT_SHARE = Decimal('0.1')
+CENTS = Decimal('0.01')
 
 def create_sale_shares_for_investment(investment):
     investor=investment.investor
@@ -21,57 +32,88 @@ def create_sale_shares_for_investment(investment):
     )
 
 
+def period_bounds(start_date: date, end_date: date):
+    """Aware datetimes covering start_date 00:00 through end_date 23:59:59.999999."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start_date, time.min), tz),
+        timezone.make_aware(datetime.combine(end_date, time.max), tz),
+    )
+
+
+def variant_sales(start_date: date, end_date: date, variant_ids=None):
+    """{variant_id: delivered sales volume} for orders placed in the period, in one GROUP BY."""
+    items = OrderItem.objects.filter(
+        order__created_at__range=period_bounds(start_date, end_date),
+        order__status='delivered',
+    )
+    if variant_ids is not None:
+        items = items.filter(product_variant_id__in=variant_ids)
+    line_total = ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=15, decimal_places=2))
+    return dict(
+        items.order_by()
+        .values('product_variant_id')
+        .annotate(total=Sum(line_total))
+        .values_list('product_variant_id', 'total')
+    )
+
+
+def money(value):
+    """Round to paise the way settlement pays; the portfolio analytics use the same rule."""
+    return Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
 def generate_product_sale_shares(start_date: date, end_date: date):
-    # Convert date to datetime ranges
-    start_datetime = datetime.combine(start_date, time.min)  # 00:00:00
-    end_datetime = datetime.combine(end_date, time.max)      # 23:59:59.999999
-
-    confirmed_investments = Investment.objects.filter(confirmed=True)
-
-    for investment in confirmed_investments:
-        product_variant = investment.product_variant
-        investor = investment.investor
-        print(f"\n🔎 Checking investment for {investor.user.email} (variant: {product_variant})")
-
-        # Fetch delivered order items for this variant within the full datetime range
-        order_items = OrderItem.objects.filter(
-            product_variant=product_variant,
-            order__created_at__range=(start_datetime, end_datetime),
-            order__status='delivered'
-        ).annotate(
-            line_total=ExpressionWrapper(
-                F('price') * F('quantity'),
-                output_field=DecimalField()
-            )
+    """
+    Settle investor sale shares for a period.
+
+    Each investor earns INVESTOR_PROFIT_SHARE of the PROFIT_MARGIN on delivered
+    sales of every variant they hold a confirmed investment in, made by the end of
+    the period (a variant counts once per investor however many investments they
+    made in it). Sales come
+    from one GROUP BY, shares are upserted with one bulk_create, and each
+    wallet's ledger is brought to the period's share (only the difference from
+    what was already posted is written), so re-running a period is safe.
+    Returns {"investors", "credited"}.
+    """
+    holdings = defaultdict(set)
+    _, period_end = period_bounds(start_date, end_date)
+    for investor_id, variant_id in (
+        Investment.objects.filter(confirmed=True, product_variant__isnull=False, invested_at__lte=period_end)
+        .values_list('investor_id', 'product_variant_id')
+        .distinct()
+    ):
+        holdings[investor_id].add(variant_id)
+    if not holdings:
+        return {"investors": 0, "credited": Decimal('0.00')}
+
+    sales = variant_sales(start_date, end_date, {v for variants in holdings.values() for v in variants})
+
+    shares = []
+    targets = {}
+    for investor_id, variants in holdings.items():
+        total_sales = money(sum((sales.get(v) or 0 for v in variants), Decimal('0')))
+        total_profit = money(total_sales * PROFIT_MARGIN)
+        investor_share = money(total_profit * INVESTOR_PROFIT_SHARE)
+        shares.append(ProductSaleShare(
+            investor_id=investor_id,
+            period_start=start_date,
+            period_end=end_date,
+            total_sales_volume=total_sales,
+            profit_generated=total_profit,
+            investor_share=investor_share,
+        ))
+        targets[f"sale-share:{investor_id}:{start_date}:{end_date}"] = (investor_id, investor_share)
+
+    with transaction.atomic():
+        ProductSaleShare.objects.bulk_create(
+            shares,
+            update_conflicts=True,
+            unique_fields=['investor', 'period_start', 'period_end'],
+            update_fields=['total_sales_volume', 'profit_generated', 'investor_share', 'updated_at'],
         )
+        entries = settle_references(targets, kind='sale_share', description=f"Sale share {start_date} to {end_date}")
 
-        total_sales = order_items.aggregate(total=Sum('line_total'))['total'] or 0
-
-        # Business logic: 20% profit margin, 10% of profit goes to investor
-        total_profit = total_sales * Decimal('0.2')
-        investor_share = total_profit * Decimal('0.1')
-
-        print(f"🧾 Sales: ₹{total_sales}, Profit: ₹{total_profit}, Investor Share: ₹{investor_share}")
-
-        try:
-            share, created = ProductSaleShare.objects.update_or_create(
-                investor=investor,
-                period_start=start_date,
-                period_end=end_date,
-                defaults={
-                    'total_sales_volume': total_sales,
-                    'profit_generated': total_profit,
-                    'investor_share': investor_share,
-                }
-            )
-            if created:
-                print("✅ New share created.")
-            else:
-                print("🔁 Existing share updated.")
-        except Exception as e:
-            print("❌ Error saving share:", e)
-
-        wallet,_=InvestorWallet.objects.get_or_create(investor=investor)
-        wallet.balance=F('balance') + investor_share
-        wallet.save()
-        wallet.refresh_from_db()
+    credited = sum((entry.amount for entry in entries), Decimal('0.00'))
+    logger.info(f"Sale shares for {start_date}..{end_date}: {len(shares)} investors, {credited} credited")
+    return {"investors": len(shares), "credited": credited}
@@ -1,27 +1,30 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated,IsAdminUser
 from accounts.permissions import IsInvestorOrAdmin,IsAdmin
 from .utils import create_sale_shares_for_investment,generate_product_sale_shares
+from .portfolio import investor_portfolio
 from datetime import datetime
 from rest_framework.exceptions import PermissionDenied
 from .models import (Investment,
                      Investor,
                      InvestorWallet,
                      Payout,
-                     ProductSaleShare,InvestmentPayment
+                     ProductSaleShare,InvestmentPayment,
+                     WalletEntry
                      )
 from .serializers import (InvestmentSerializer,
                         InvestorSerializer,
                         InvestorWalletSerializer,
                         PayoutSerializer,
-                        ProductSaleShareSerializer
+                        ProductSaleShareSerializer,
+                        WalletEntrySerializer
                         )
 from rest_framework.exceptions import ValidationError
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Sum
+from django.db.models import Sum, Q
 import razorpay
 from django.conf import settings
 from datetime import timezone
@@ -32,9 +35,10 @@ class InvestorListCreateAPIView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user=self.request.user
+        investors=Investor.objects.select_related('wallet')
         if user.is_staff or user.role == 'admin':
-            return Investor.objects.all()
-        return Investor.objects.filter(user=self.request.user)
+            return investors.all()
+        return investors.filter(user=self.request.user)
     def perform_create(self, serializer):
         user = self.request.user
         if Investor.objects.filter(user=user).exists():
@@ -73,9 +77,10 @@ class InvestmentListCreateAPIView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = InvestmentSerializer.setup_eager_loading(Investment.objects.all())
         if user.is_staff and user.role == 'admin':
-            return Investment.objects.all()
-        return Investment.objects.filter(investor__user=user)
+            return queryset
+        return queryset.filter(investor__user=user)
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -126,24 +131,53 @@ class InvestmentSummaryDetailedAPIView(APIView):
 
     def get(self,request):
         user=request.user
+        investments=InvestmentSerializer.setup_eager_loading(Investment.objects.all())
 
         if user.is_staff or getattr(user,'role','') == 'admin':
-            confirmed=Investment.objects.filter(confirmed=True)
-            pending=Investment.objects.filter(confirmed=False)
+            totals=Investment.objects.aggregate(
+                confirmed_total=Sum('amount',filter=Q(confirmed=True)),
+                pending_total=Sum('amount',filter=Q(confirmed=False)),
+            )
         else:
             try:
-                investor=Investor.objects.get(user=user)
+                investor=Investor.objects.select_related('wallet').get(user=user)
             except Investor.DoesNotExist:
                 return Response({"detail":"Investor profile not found"},status=status.HTTP_404_NOT_FOUND)
-            confirmed=Investment.objects.filter(investor=investor,confirmed=True)
-            pending=Investment.objects.filter(investor=investor,confirmed=False)
-        
+            investments=investments.filter(investor=investor)
+            totals=investor.investments.aggregate(pending_total=Sum('amount',filter=Q(confirmed=False)))
+            totals['confirmed_total']=investor.total_confirmed_investments
+
+        confirmed=[i for i in investments if i.confirmed]
+        pending=[i for i in investments if not i.confirmed]
         return Response({
-                   "confirmed_total": sum(i.amount for i in confirmed),
-                   "pending_total": sum(i.amount for i in pending),
+                   "confirmed_total": totals['confirmed_total'] or 0,
+                   "pending_total": totals['pending_total'] or 0,
                    "confirmed_investments": InvestmentSerializer(confirmed, many=True).data,
                    "pending_investments": InvestmentSerializer(pending, many=True).data
-               })  
+               })
+
+
+class InvestmentPortfolioAPIView(APIView):
+    """
+    Per-investment sales volume, profit share and monthly ROI series from the
+    precomputed VariantMonthlySales table. Admins pass ?investor=<id>.
+    """
+    permission_classes=[IsInvestorOrAdmin]
+
+    def get(self,request):
+        user=request.user
+        if user.is_staff or getattr(user,'role','') == 'admin':
+            investor_id=request.query_params.get('investor')
+            if not investor_id:
+                raise ValidationError({"investor": "This query parameter is required."})
+            if not investor_id.isdigit():
+                raise ValidationError({"investor": "Must be an investor id."})
+            investor=get_object_or_404(Investor, id=investor_id)
+        else:
+            investor=get_object_or_404(Investor, user=user)
+        return Response(investor_portfolio(investor))
+
+
 class ProductSaleShareListAPIView(generics.ListAPIView):
     permission_classes=[IsInvestorOrAdmin]
     serializer_class=ProductSaleShareSerializer
@@ -187,10 +221,23 @@ class InvestorWalletDetailAPIView(generics.RetrieveAPIView):
 
     def get_object(self):
         user=self.request.user
+        wallets=InvestorWallet.objects.select_related('investor')
         if user.is_staff or getattr(user,'role','')=='admin':
             investor_id=self.kwargs.get("investor_id")
-            return InvestorWallet.objects.get(investor__id=investor_id)
-        return InvestorWallet.objects.get(investor__user=user)
+            return get_object_or_404(wallets, investor__id=investor_id)
+        return get_object_or_404(wallets, investor__user=user)
+
+
+class WalletEntryListAPIView(generics.ListAPIView):
+    """Wallet ledger, newest first. Admins pass an investor id; investors see their own."""
+    permission_classes=[IsInvestorOrAdmin]
+    serializer_class=WalletEntrySerializer
+
+    def get_queryset(self):
+        user=self.request.user
+        if user.is_staff or getattr(user,'role','')=='admin':
+            return WalletEntry.objects.filter(wallet__investor__id=self.kwargs.get("investor_id"))
+        return WalletEntry.objects.filter(wallet__investor__user=user)
     
 
 class GenerateProductSalesShareAPIView(APIView):
@@ -212,10 +259,13 @@ class GenerateProductSalesShareAPIView(APIView):
         if start > end:
             raise ValidationError({"detail": "start_date must be before end_date"})
 
-        generate_product_sale_shares(start, end)
+        result = generate_product_sale_shares(start, end)
 
         return Response({
-            "message": f"Product sale shares generated for period {start} to {end}."})
+            "message": f"Product sale shares generated for period {start} to {end}.",
+            "investors": result["investors"],
+            "credited": result["credited"],
+        })
     
 
 class RazorpayInvestmentOrderCreateAPIView(APIView):
@@ -1,3 +1,5 @@
+import os
+import sys
 from django.apps import AppConfig
 
 
@@ -7,3 +9,9 @@ class OrdersConfig(AppConfig):
 
     def ready(self):
         import orders.signals
+        from .holds import start_hold_sweeper
+
+        # Only in serving processes (never migrate/shell/etc.), and only in the reloader child
+        command = sys.argv[1] if len(sys.argv) > 1 and sys.argv[0].endswith("manage.py") else None
+        if command is None or (command == "runserver" and os.environ.get("RUN_MAIN") == "true"):
+            start_hold_sweeper()
@@ -0,0 +1,146 @@
+# orders/fulfillment.py
+"""
+Set-based warehouse transitions.
+
+Batch counterpart of orders.utils.update_item_status: items are validated with one locking SELECT,
+moved with one UPDATE, logged with one bulk_create, and every affected order's
+status is recomputed once (see orders.state).
+"""
+import logging
+from django.db import transaction
+from django.utils import timezone
+from admin_dashboard.models import WarehouseLog
+from delivery.models import DeliveryMan
+from .models import Order, OrderItem
+from .state import validate_item_transition, recompute_order_statuses
+
+logger = logging.getLogger(__name__)
+
+
+def transition_items(item_ids, expected_status, new_status, user, timestamp_field=None, comment=None):
+    """
+    Move every item in `item_ids` from `expected_status` to `new_status`.
+
+    Items that do not exist or are in another status are left alone and
+    reported. Returns (updated_ids, {item_id: reason}).
+    """
+    validate_item_transition(expected_status, new_status)
+    item_ids = list(dict.fromkeys(item_ids))
+    if not item_ids:
+        return [], {}
+    now = timezone.now()
+
+    with transaction.atomic():
+        found = {
+            row['id']: row
+            for row in OrderItem.objects.select_for_update()
+            .filter(id__in=item_ids)
+            .order_by('id')
+            .values('id', 'status', 'order_id')
+        }
+
+        errors = {}
+        valid = []
+        for item_id in item_ids:
+            row = found.get(item_id)
+            if row is None:
+                errors[item_id] = "Item not found"
+            elif row['status'] != expected_status:
+                errors[item_id] = (
+                    f"Only items with status '{expected_status}' can be marked as '{new_status}'"
+                    f" (current: '{row['status']}')"
+                )
+            else:
+                valid.append(item_id)
+
+        if valid:
+            fields = {'status': new_status}
+            if timestamp_field:
+                fields[timestamp_field] = now
+            OrderItem.objects.filter(id__in=valid, status=expected_status).update(**fields)
+
+            WarehouseLog.objects.bulk_create([
+                WarehouseLog(
+                    order_item_id=item_id,
+                    order_id=found[item_id]['order_id'],
+                    action=new_status,
+                    updated_by=user,
+                    comment=comment or f"Status changed from '{expected_status}' to '{new_status}'",
+                )
+                for item_id in valid
+            ])
+
+            recompute_order_statuses({found[item_id]['order_id'] for item_id in valid}, now=now)
+
+    logger.info(f"{len(valid)} items marked as {new_status} by {user.email} ({len(errors)} skipped)")
+    return valid, errors
+
+
+def assign_orders_to_deliveryman(order_numbers, deliveryman, user):
+    """
+    Assign shipped orders to a deliveryman in one transaction: a single locking
+    read validates every order, one UPDATE assigns them, and their shipped
+    items move to out_for_delivery through transition_items.
+    Returns (assigned_order_numbers, skipped [{"order_number", "reason"}]).
+    """
+    order_numbers = list(dict.fromkeys(order_numbers))
+    now = timezone.now()
+    skipped = []
+
+    with transaction.atomic():
+        orders = {
+            order.order_number: order
+            for order in Order.objects.select_for_update(of=('self',))
+            .filter(order_number__in=order_numbers, status__in=['shipped', 'out_for_delivery'])
+            .order_by('id')
+            .only('id', 'order_number', 'delivered_by_id')
+        }
+
+        assigned_elsewhere = {order.delivered_by_id for order in orders.values() if order.delivered_by_id}
+        emails = dict(
+            DeliveryMan.objects.filter(id__in=assigned_elsewhere).values_list('id', 'user__email')
+        ) if assigned_elsewhere else {}
+
+        not_ready = set(
+            OrderItem.objects.filter(order_id__in=[order.id for order in orders.values()])
+            .exclude(status__in=['shipped', 'out_for_delivery'])
+            .values_list('order_id', flat=True)
+        )
+
+        assignable = []
+        for number in order_numbers:
+            order = orders.get(number)
+            if order is None:
+                skipped.append({
+                    "order_number": number,
+                    "reason": "Not found or not in 'shipped'/'out_for_delivery' status"
+                })
+            elif order.delivered_by_id:
+                skipped.append({
+                    "order_number": number,
+                    "reason": f"Already assigned to {emails.get(order.delivered_by_id)}"
+                })
+            elif order.id in not_ready:
+                skipped.append({"order_number": number, "reason": "Some items are not yet shipped"})
+            else:
+                assignable.append(order)
+
+        if assignable:
+            order_ids = [order.id for order in assignable]
+            Order.objects.filter(id__in=order_ids).update(delivered_by=deliveryman, assigned_at=now, updated_at=now)
+
+            shipped_items = dict(
+                OrderItem.objects.filter(order_id__in=order_ids, status='shipped').values_list('id', 'order_id')
+            )
+            transition_items(
+                list(shipped_items),
+                expected_status='shipped',
+                new_status='out_for_delivery',
+                user=user,
+                timestamp_field='out_for_delivery_at',
+                comment=f"Assigned to deliveryman ({deliveryman.user.email})",
+            )
+            # Orders with nothing left to move still get their status settled once
+            recompute_order_statuses(set(order_ids) - set(shipped_items.values()), now=now)
+
+    return [order.order_number for order in assignable], skipped
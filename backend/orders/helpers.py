@@ -1,12 +1,15 @@
 from decimal import Decimal
 from django.shortcuts import get_object_or_404
 from rest_framework.exceptions import ValidationError
-from .models import ShippingAddress
+from .models import ShippingAddress, OrderItem
+from django.db.models import Prefetch, prefetch_related_objects
 from products.models import ProductVariant
 from promoter.models import Promoter
 from promoter.utils import apply_promoter_commission
 from cart.models import CartItem
-from .utils import  calculate_delivery_charge,create_order_with_items
+from .utils import  calculate_delivery_charge,create_order_with_items,process_refund
+from .stock import reserve_stock, order_item_lines, InsufficientStock
+from .holds import convert_holds, has_expired_holds
 from django.conf import settings
 import razorpay
 from django.utils import timezone
@@ -74,6 +77,12 @@ def prepare_order_response(order, razorpay_order=None):
     from .serializers import OrderSerializer
     from django.conf import settings
 
+    # Prefetch the whole item tree so serializing a large order stays a handful of queries
+    prefetch_related_objects([order], Prefetch(
+        "orderitem_set",
+        queryset=OrderItem.objects.select_related("product_variant__product__category")
+        .prefetch_related("product_variant__images"),
+    ))
     order_data = OrderSerializer(order).data
     order_data.update({
         "order_number":order.order_number,
@@ -104,11 +113,11 @@ def calculate_order_preview(items, postal_code=None, shipping_address_id=None):
     shipping_address_id: optional, use saved address if provided
     """
     subtotal = Decimal("0.00")
+    variants = ProductVariant.objects.in_bulk([int(item["product_variant_id"]) for item in items])
 
     for item in items:
-        try:
-            variant = ProductVariant.objects.get(id=item["product_variant_id"])
-        except ProductVariant.DoesNotExist:
+        variant = variants.get(int(item["product_variant_id"]))
+        if variant is None:
             raise ValidationError(
                 {"items": f"ProductVariant with id {item['product_variant_id']} does not exist"}
             )
@@ -147,6 +156,30 @@ def verify_razorpay_payment(order, razorpay_order_id, razorpay_payment_id, razor
     except razorpay.errors.SignatureVerificationError:
         raise ValidationError("Invalid payment signature")
 
+    # Paid after the stock hold expired: take the stock again, refund if it is gone
+    if order.status == "cancelled" and has_expired_holds(order):
+        try:
+            reserve_stock(order_item_lines(order.orderitem_set.all()))
+        except InsufficientStock:
+            order.razorpay_payment_id = razorpay_payment_id
+            order.razorpay_order_id = razorpay_order_id
+            order.is_paid = True
+            order.paid_at = timezone.now()
+            order.payment_method = "Razorpay"
+            order.save(update_fields=["razorpay_payment_id", "razorpay_order_id", "is_paid", "paid_at", "payment_method"])
+            process_refund(order)
+            return {
+                "message": "Payment received after the reservation expired and items are out of stock; refund initiated",
+                "order_number": order.order_number,
+                "status": order.status,
+                "is_paid": order.is_paid
+            }
+        order.orderitem_set.update(status="pending")
+        order.is_restocked = False
+        order.cancel_reason = None
+        order.cancelled_at = None
+        order.cancelled_by_role = None
+
     # Update order
     order.razorpay_payment_id = razorpay_payment_id
     order.razorpay_order_id = razorpay_order_id
@@ -155,6 +188,7 @@ def verify_razorpay_payment(order, razorpay_order_id, razorpay_payment_id, razor
     order.status = "processing"
     order.payment_method = "Razorpay"
     order.save()
+    convert_holds(order)
 
     # Apply promoter commission
     apply_promoter_commission(order)
@@ -202,6 +236,8 @@ def process_checkout(
             validate_payment_method(payment_method)
             order.payment_method = payment_method
             order.save(update_fields=["payment_method"])
+            if payment_method == "Cash on Delivery":
+                convert_holds(order)
 
         # Only create Razorpay order if not paid
         if not order.is_paid and order.payment_method == "Razorpay":
@@ -230,7 +266,8 @@ def process_checkout(
     promoter = validate_promoter(promoter_code) if promoter_code else None
     validate_payment_method(payment_method)
 
-    order, _ = create_order_with_items(
+    # Creates the Razorpay order too, after the Order row is written
+    order, razorpay_order = create_order_with_items(
         user=user,
         items=items,
         shipping_address=shipping_address,
@@ -239,11 +276,8 @@ def process_checkout(
     )
 
     # ---------------- Cash on Delivery ----------------
+    # New orders are created pending and unpaid, nothing else to write
     if order.payment_method == "Cash on Delivery":
-        order.status = "pending"
-        order.is_paid = False
-        order.save(update_fields=["status", "is_paid", "payment_method"])
-
         if is_cart and items:
             items.delete()
 
@@ -260,16 +294,6 @@ def process_checkout(
         return {"order": order, "response": response_data}
 
     # ---------------- Razorpay payment handling ----------------
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-    razorpay_order = client.order.create({
-        "amount": int(order.total * 100),
-        "currency": "INR",
-        "receipt": f"order_rcptid_{order.order_number}",
-        "payment_capture": 1
-    })
-    order.razorpay_order_id = razorpay_order.get("id")
-    order.save(update_fields=["razorpay_order_id", "payment_method"])
-
     # DO NOT send notification yet — wait for payment verification
 
     response_data = prepare_order_response(order, razorpay_order)
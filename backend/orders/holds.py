@@ -0,0 +1,201 @@
+# orders/holds.py
+import logging
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction, close_old_connections
+from django.db.models import Count, Sum, Q
+from django.utils import timezone
+from admin_dashboard.metrics import schedule_metrics_refresh_for_orders
+from .models import Order, OrderItem, StockHold
+from .stock import release_stock
+from .signals import notify_orders_cancelled
+
+logger = logging.getLogger(__name__)
+
+STOCK_HOLD_TTL_MINUTES = getattr(settings, "STOCK_HOLD_TTL_MINUTES", 30)
+# Order statuses the payment window can still cancel
+AWAITING_PAYMENT = ['pending', 'processing']
+
+
+def create_holds(order, lines, ttl_minutes=None):
+    """Record the (variant_id, quantity) lines reserved for an unpaid online-payment order."""
+    ttl = STOCK_HOLD_TTL_MINUTES if ttl_minutes is None else ttl_minutes
+    expires_at = timezone.now() + timedelta(minutes=ttl)
+    StockHold.objects.bulk_create([
+        StockHold(order=order, product_variant_id=variant_id, quantity=quantity, expires_at=expires_at)
+        for variant_id, quantity in lines
+    ])
+
+
+def _resolve_holds(order, status, from_statuses=('active',)):
+    return StockHold.objects.filter(order=order, status__in=from_statuses).update(
+        status=status, resolved_at=timezone.now()
+    )
+
+
+def convert_holds(order):
+    """
+    Order paid (or switched to COD): its stock is now sold, holds stop expiring.
+    Expired holds count too when a late payment re-reserved the stock.
+    """
+    return _resolve_holds(order, 'converted', from_statuses=('active', 'expired'))
+
+
+def release_holds(order):
+    """
+    Order cancelled before expiry. Only marks the holds; the caller returns the
+    stock through the order items as usual.
+    """
+    return _resolve_holds(order, 'released')
+
+
+def has_expired_holds(order):
+    return StockHold.objects.filter(order=order, status='expired').exists()
+
+
+def expire_stale_holds(batch_size=500, now=None):
+    """
+    Expire active holds past their TTL in batches. Each batch locks its holds
+    (skipping rows another sweeper holds), returns stock with one bulk update
+    and cancels the still-unpaid orders with set-based updates.
+    Returns the number of holds expired.
+    """
+    now = now or timezone.now()
+    expired_total = 0
+
+    while True:
+        with transaction.atomic():
+            stale = StockHold.objects.filter(status='active', expires_at__lte=now).order_by('expires_at', 'id')
+            if connection.features.has_select_for_update_skip_locked:
+                stale = stale.select_for_update(skip_locked=True)
+            holds = list(stale.values('id', 'order_id', 'product_variant_id', 'quantity')[:batch_size])
+            if not holds:
+                break
+
+            hold_ids = [h['id'] for h in holds]
+            order_ids = {h['order_id'] for h in holds}
+
+            # Lock the orders before reading is_paid; payment verification
+            # locks the same row, so the two never interleave
+            is_paid = dict(
+                Order.objects.select_for_update().filter(id__in=order_ids).order_by('id')
+                .values_list('id', 'is_paid')
+            )
+            paid_order_ids = {order_id for order_id, paid in is_paid.items() if paid}
+            if paid_order_ids:
+                # Paid in the meantime: convert instead of expiring
+                StockHold.objects.filter(id__in=hold_ids, order_id__in=paid_order_ids)\
+                    .update(status='converted', resolved_at=now)
+
+            # Only orders still waiting for payment expire; the rows are locked,
+            # so this set is exactly what the guarded UPDATE below cancels
+            unpaid_statuses = dict(
+                Order.objects.filter(id__in=list(order_ids - paid_order_ids), is_paid=False)
+                .values_list('id', 'status')
+            )
+            expiring_order_ids = {
+                order_id for order_id, status in unpaid_statuses.items() if status in AWAITING_PAYMENT
+            }
+            # is_restocked=True: the stock is returned below
+            Order.objects.filter(id__in=expiring_order_ids, is_paid=False, status__in=AWAITING_PAYMENT).update(
+                status='cancelled',
+                cancel_reason='Payment window expired',
+                cancelled_at=now,
+                cancelled_by_role='system',
+                is_restocked=True,
+                updated_at=now,
+            )
+
+            # Orders that moved on without an online payment keep their stock:
+            # cancelled ones returned it themselves, the rest were fulfilled
+            moved_on = {order_id: status for order_id, status in unpaid_statuses.items()
+                        if order_id not in expiring_order_ids}
+            for hold_status, ids in (
+                ('released', [i for i, status in moved_on.items() if status == 'cancelled']),
+                ('converted', [i for i, status in moved_on.items() if status != 'cancelled']),
+            ):
+                if ids:
+                    StockHold.objects.filter(id__in=hold_ids, order_id__in=ids)\
+                        .update(status=hold_status, resolved_at=now)
+
+            expiring = [h for h in holds if h['order_id'] in expiring_order_ids]
+            if expiring:
+                release_stock([(h['product_variant_id'], h['quantity']) for h in expiring])
+                StockHold.objects.filter(id__in=[h['id'] for h in expiring])\
+                    .update(status='expired', resolved_at=now)
+                OrderItem.objects.filter(order_id__in=expiring_order_ids).update(status='cancelled')
+                schedule_metrics_refresh_for_orders(expiring_order_ids)
+                notify_orders_cancelled(expiring_order_ids)
+
+            expired_total += len(expiring)
+            logger.info(
+                "Stock hold sweep: expired %s holds over %s orders, converted %s late-paid orders",
+                len(expiring), len(expiring_order_ids), len(paid_order_ids),
+            )
+
+        if len(holds) < batch_size:
+            break
+
+    return expired_total
+
+
+def hold_conversion_metrics(since=None):
+    """Counts, quantities and conversion rate of stock holds (optionally since a datetime)."""
+    holds = StockHold.objects.all()
+    if since:
+        holds = holds.filter(created_at__gte=since)
+
+    stats = holds.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status='active')),
+        converted=Count('id', filter=Q(status='converted')),
+        expired=Count('id', filter=Q(status='expired')),
+        released=Count('id', filter=Q(status='released')),
+        held_quantity=Sum('quantity', filter=Q(status='active')),
+        expired_quantity=Sum('quantity', filter=Q(status='expired')),
+        orders=Count('order', distinct=True),
+        converted_orders=Count('order', filter=Q(status='converted'), distinct=True),
+    )
+    resolved = stats['converted'] + stats['expired'] + stats['released']
+    stats['held_quantity'] = stats['held_quantity'] or 0
+    stats['expired_quantity'] = stats['expired_quantity'] or 0
+    stats['conversion_rate'] = round(stats['converted'] / resolved * 100, 2) if resolved else None
+    return stats
+
+
+# -----------------------------
+# Optional in-process sweeper
+# -----------------------------
+_sweeper_started = False
+_sweeper_lock = threading.Lock()
+
+
+def _sweep_forever(interval):
+    stop = threading.Event()
+    while not stop.wait(interval):
+        try:
+            close_old_connections()
+            expire_stale_holds()
+        except Exception:
+            logger.exception("Stock hold sweep failed")
+        finally:
+            close_old_connections()
+
+
+def start_hold_sweeper(interval=None):
+    """
+    Run expire_stale_holds every `interval` seconds on a daemon thread.
+    Enabled via settings.STOCK_HOLD_SWEEP_INTERVAL; a cron job running the
+    `expire_stock_holds` command is preferable with several workers.
+    """
+    global _sweeper_started
+    interval = interval or getattr(settings, "STOCK_HOLD_SWEEP_INTERVAL", None)
+    if not interval:
+        return False
+    with _sweeper_lock:
+        if _sweeper_started:
+            return False
+        threading.Thread(target=_sweep_forever, args=(interval,), name="stock-hold-sweeper", daemon=True).start()
+        _sweeper_started = True
+    return True
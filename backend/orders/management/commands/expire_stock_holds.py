@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from orders.holds import expire_stale_holds, hold_conversion_metrics
+
+
+class Command(BaseCommand):
+    help = "Expire stock holds of unpaid online-payment orders past their TTL and restock them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--stats', action='store_true', help="Print hold conversion metrics afterwards")
+
+    def handle(self, *args, **options):
+        expired = expire_stale_holds(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} stock holds"))
+
+        if options['stats']:
+            for key, value in hold_conversion_metrics().items():
+                self.stdout.write(f"{key}: {value}")
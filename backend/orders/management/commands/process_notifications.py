@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from orders.notificationDispatch import process_outbox, WORKER_THREADS
+
+
+class Command(BaseCommand):
+    help = "Send pending notifications from the outbox with a thread pool, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--threads', type=int, default=WORKER_THREADS)
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting when drained")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = process_outbox(batch_size=options['batch_size'], threads=options['threads'])
+            if sent or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"Sent {sent} notifications, {failed} failed"))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
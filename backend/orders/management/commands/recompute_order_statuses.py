@@ -0,0 +1,36 @@
+from collections import Counter
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from orders.models import Order
+from orders.state import FINAL_ORDER_STATUSES, stale_order_statuses, apply_order_statuses
+
+
+class Command(BaseCommand):
+    help = "Re-derive order statuses from their items in batches, writing only the orders that changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Report the changes without writing them")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        orders = Order.objects.exclude(status__in=FINAL_ORDER_STATUSES).order_by('id')
+        changed = Counter()
+        last_id = 0
+
+        while True:
+            ids = list(orders.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            with transaction.atomic():
+                changes = stale_order_statuses(Order.objects.filter(id__in=ids))
+                if changes and not options['dry_run']:
+                    apply_order_statuses(changes)
+            changed.update(changes.values())
+
+        verb = "Would update" if options['dry_run'] else "Updated"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {sum(changed.values())} orders"))
+        for status, count in sorted(changed.items()):
+            self.stdout.write(f"  -> {status}: {count}")
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0003_deliverymanrequest_address_deliverymanrequest_phone_and_more'),
+        ('orders', '0004_notification_otp_expires_at'),
+        ('promoter', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'id'], name='orders_orde_created_0fb29d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='returnrequest',
+            index=models.Index(fields=['created_at', 'id'], name='orders_retu_created_18d48c_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0003_deliverymanrequest_address_deliverymanrequest_phone_and_more'),
+        ('orders', '0007_notification_outbox_index'),
+        ('promoter', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'status', 'created_at'], name='orders_orde_user_id_0886b9_idx'),
+        ),
+    ]
@@ -118,10 +118,10 @@ class Order(models.Model):
 
     def restock_items(self):
         if self.status == OrderStatus.CANCELLED and not self.is_restocked:
-            for item in self.orderitem_set.all():
-                variant = item.product_variant
-                variant.stock += item.quantity
-                variant.save()
+            from .stock import release_stock, order_item_lines
+            from .holds import release_holds
+            release_stock(order_item_lines(self.orderitem_set.all()))
+            release_holds(self)
             self.is_restocked = True
             self.save(update_fields=['is_restocked'])
 
@@ -165,6 +165,8 @@ class Order(models.Model):
             models.Index(fields=['razorpay_order_id']),
             models.Index(fields=['razorpay_payment_id']),
             models.Index(fields=['order_number']),  # ✅ new index for sorting
+            models.Index(fields=['created_at', 'id']),  # keyset pagination
+            models.Index(fields=['user', 'status', 'created_at']),  # per-customer stats subqueries
         ]
 
 class OrderItemStatus(models.TextChoices):
@@ -269,6 +271,9 @@ class ReturnRequest(models.Model):
                 name='unique_active_return_per_item'
             )
         ]
+        indexes = [
+            models.Index(fields=['created_at', 'id']),  # keyset pagination
+        ]
 
     # --- Helpers ---
     def get_max_refund(self):
@@ -428,3 +433,33 @@ class ReplacementRequest(models.Model):
         if self.order_item:
             return f"Replacement for Item #{self.order_item.id} in Order #{self.order.order_number}"
         return f"Replacement for Order #{self.order.order_number}"
+
+
+class StockHold(models.Model):
+    """
+    Stock taken by an unpaid online-payment order. Active holds past `expires_at`
+    are released by the sweeper (orders.holds.expire_stale_holds).
+    """
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('converted', 'Converted'),   # order paid
+        ('expired', 'Expired'),       # payment window elapsed, stock returned
+        ('released', 'Released'),     # order cancelled before expiry
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='stock_holds')
+    product_variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name='stock_holds')
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+            models.Index(fields=['order', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Hold {self.quantity} × {self.product_variant_id} for Order #{self.order_id} ({self.status})"
@@ -0,0 +1,192 @@
+# orders/notificationDispatch.py
+"""
+Transactional notification outbox.
+
+Notifications are written as `pending` rows inside the caller's transaction and
+only dispatched after it commits, so SMTP latency never sits inside a request's
+transaction. Delivery happens on a background thread pool (NOTIFICATION_DISPATCH_MODE
+"async", the default), inline after commit ("sync"), or only from the
+`process_notifications` worker command ("worker"). Failures are retried with
+exponential backoff through `retries`/`scheduled_at`.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction, close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from backend.mailer import send_bulk
+from .notificationModel import Notification
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_MODE = getattr(settings, "NOTIFICATION_DISPATCH_MODE", "async")
+MAX_RETRIES = getattr(settings, "NOTIFICATION_MAX_RETRIES", 5)
+RETRY_BASE_SECONDS = getattr(settings, "NOTIFICATION_RETRY_BASE_SECONDS", 30)
+WORKER_THREADS = getattr(settings, "NOTIFICATION_WORKER_THREADS", 4)
+# A claimed row is invisible to other dispatchers for this long
+CLAIM_LEASE_SECONDS = getattr(settings, "NOTIFICATION_CLAIM_LEASE_SECONDS", 300)
+
+SUPPORTED_CHANNELS = {"email"}
+
+_executor = None
+
+
+class UnsupportedChannel(Exception):
+    pass
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="notify")
+    return _executor
+
+
+# ---------------------------
+# Enqueue
+# ---------------------------
+def enqueue_notifications(notification_ids):
+    """Dispatch the given pending notifications once the current transaction commits."""
+    notification_ids = list(notification_ids)
+    if not notification_ids or DISPATCH_MODE == "worker":
+        return
+    transaction.on_commit(lambda: _dispatch_after_commit(notification_ids))
+
+
+def _dispatch_after_commit(notification_ids):
+    if DISPATCH_MODE == "sync":
+        dispatch_notifications(notification_ids)
+    else:
+        _get_executor().submit(_run_in_thread, notification_ids)
+
+
+def _run_in_thread(notification_ids):
+    close_old_connections()
+    try:
+        dispatch_notifications(notification_ids)
+    except Exception:
+        logger.exception("Notification dispatch failed for %s", notification_ids)
+    finally:
+        close_old_connections()
+
+
+# ---------------------------
+# Claim / send / record
+# ---------------------------
+def _due_q(now):
+    return Q(status="pending") & (Q(scheduled_at__isnull=True) | Q(scheduled_at__lte=now))
+
+
+def claim_notifications(notification_ids=None, limit=None):
+    """
+    Lease due pending notifications to this dispatcher by pushing `scheduled_at`
+    forward, skipping rows locked by a concurrent claimer. Returns the claimed ids.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = Notification.objects.filter(_due_q(now)).order_by("created_at", "id")
+        if notification_ids is not None:
+            due = due.filter(id__in=notification_ids)
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list("id", flat=True)[:limit] if limit else due.values_list("id", flat=True))
+        if ids:
+            Notification.objects.filter(id__in=ids).update(
+                scheduled_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+            )
+    return ids
+
+
+def send_batch(notifications):
+    """
+    Deliver a batch of notifications over one mail connection.
+    Returns (sent_ids, {id: exception}).
+    """
+    failures = {}
+    outgoing, messages = [], []
+    for notification in notifications:
+        try:
+            if notification.channel not in SUPPORTED_CHANNELS:
+                raise UnsupportedChannel(notification.channel)
+            messages.append(notification.build_email_message())
+            outgoing.append(notification)
+        except Exception as e:
+            failures[notification.id] = e
+
+    for index, error in send_bulk(messages).items():
+        failures[outgoing[index].id] = error
+
+    sent = [n.id for n in outgoing if n.id not in failures]
+    return sent, failures
+
+
+def retry_delay(retries):
+    """Exponential backoff: base, 2×base, 4×base, ..."""
+    return timedelta(seconds=RETRY_BASE_SECONDS * (2 ** max(retries - 1, 0)))
+
+
+def record_results(notifications, sent_ids, failures):
+    now = timezone.now()
+    if sent_ids:
+        Notification.objects.filter(id__in=sent_ids).update(status="sent", sent_at=now, updated_at=now)
+
+    by_id = {n.id: n for n in notifications}
+    for notification_id, error in failures.items():
+        notification = by_id[notification_id]
+        retries = notification.retries + 1
+        permanent = isinstance(error, UnsupportedChannel) or retries >= MAX_RETRIES
+        Notification.objects.filter(id=notification_id).update(
+            status="failed" if permanent else "pending",
+            retries=retries,
+            scheduled_at=None if permanent else now + retry_delay(retries),
+            updated_at=now,
+        )
+        logger.warning(
+            "Notification %s (%s) failed, attempt %s%s: %s",
+            notification_id, notification.channel, retries, " (giving up)" if permanent else "", error,
+        )
+
+
+def dispatch_notifications(notification_ids=None, limit=None):
+    """Claim, send and record one batch. Returns (sent_count, failed_count)."""
+    ids = claim_notifications(notification_ids, limit=limit)
+    if not ids:
+        return 0, 0
+    notifications = list(
+        Notification.objects.filter(id__in=ids).select_related("user", "order", "order_item")
+    )
+    sent_ids, failures = send_batch(notifications)
+    record_results(notifications, sent_ids, failures)
+    return len(sent_ids), len(failures)
+
+
+def process_outbox(batch_size=100, threads=None):
+    """
+    Drain every due notification: each thread claims and sends batches until
+    nothing is left. Used by the `process_notifications` worker command.
+    """
+    threads = threads or WORKER_THREADS
+    if not connection.features.has_select_for_update:
+        threads = 1  # e.g. SQLite: concurrent claimers would only fight over the write lock
+
+    def drain():
+        close_old_connections()
+        sent = failed = 0
+        try:
+            while True:
+                batch_sent, batch_failed = dispatch_notifications(limit=batch_size)
+                if not batch_sent and not batch_failed:
+                    return sent, failed
+                sent += batch_sent
+                failed += batch_failed
+        finally:
+            close_old_connections()
+
+    if threads <= 1:
+        return drain()
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="notify-worker") as pool:
+        results = [f.result() for f in [pool.submit(drain) for _ in range(threads)]]
+    return sum(r[0] for r in results), sum(r[1] for r in results)
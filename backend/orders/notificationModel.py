@@ -2,10 +2,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 import pyotp
-from django.conf import settings
 from django.core.mail import send_mail
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from backend.mailer import build_email, render_email, send_bulk
 import requests  # for WhatsApp API or other external services
 
 User = get_user_model()
@@ -96,6 +94,7 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=["user", "status"]),
             models.Index(fields=["channel", "event"]),
+            models.Index(fields=["status", "scheduled_at"]),  # outbox polling
         ]
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
@@ -190,26 +189,21 @@ class Notification(models.Model):
     # -------------------
     # Channel-specific sending
     # -------------------
-    def _send_email(self):
+    def build_email_message(self):
         """
-        Send email with HTML content and plain-text fallback.
+        Email with HTML content and plain-text fallback, ready to send.
         """
-        subject = NOTIFICATION_TITLES.get(self.event, "Notification")
-        from_email = settings.DEFAULT_FROM_EMAIL
-        to_email = [self.user.email]
-
-        # Render HTML message from template
-        html_content = render_to_string(
-            "emails/notification.html",  # create this template
-            {"notification": self}
+        return build_email(
+            subject=NOTIFICATION_TITLES.get(self.event, "Notification"),
+            to=[self.user.email],
+            text_body=self.message,
+            html_body=render_email("emails/notification.html", {"notification": self}),
         )
 
-        # Fallback plain text
-        text_content = self.message
-
-        email = EmailMultiAlternatives(subject, text_content, from_email, to_email)
-        email.attach_alternative(html_content, "text/html")
-        email.send(fail_silently=False)
+    def _send_email(self):
+        failures = send_bulk([self.build_email_message()])
+        if failures:
+            raise failures[0]
 
     # def _send_whatsapp(self):
     #     """Send notification via WhatsApp API (example)."""
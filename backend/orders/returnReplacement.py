@@ -1,5 +1,6 @@
 # views.py
 from django.utils import timezone
+from django.db import transaction
 from rest_framework.generics import CreateAPIView, UpdateAPIView, ListAPIView, RetrieveAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -22,6 +23,7 @@ from accounts.permissions import (
 from delivery.permissions import IsDeliveryMan
 from delivery.models import DeliveryMan
 from .utils import process_refund, check_refund_status
+from .stock import reserve_stock, release_stock, order_item_lines
 
 
 # ---------------- RETURN REQUEST ----------------
@@ -91,9 +93,8 @@ class ReturnRequestUpdateAPIView(UpdateAPIView):
                     instance.status = 'approved' 
                     instance.save(update_fields=['status']) 
                     order_item = instance.order_item 
-                    if order_item and order_item.product_variant: 
-                        order_item.product_variant.stock += order_item.quantity 
-                        order_item.product_variant.save(update_fields=['stock']) 
+                    if order_item and order_item.product_variant_id: 
+                        release_stock(order_item_lines([order_item]))
                         return 
                     # ---------------- ADMIN ---------------- 
                 elif role == 'admin': 
@@ -290,6 +291,23 @@ class ReplacementRequestCreateAPIView(CreateAPIView):
         serializer.save(user=self.request.user, status="pending")
 
 
+def cancel_replacement_order(instance, role):
+    """
+    Cancel the replacement order created with a rejected request. Its stock was
+    never reserved (that happens on admin approval), so nothing is returned.
+    """
+    new_order = instance.new_order
+    if not new_order or new_order.is_paid or new_order.status == OrderStatus.CANCELLED:
+        return
+    new_order.status = OrderStatus.CANCELLED
+    new_order.cancel_reason = "Replacement request rejected"
+    new_order.cancelled_at = timezone.now()
+    new_order.cancelled_by_role = role
+    new_order.is_restocked = True
+    new_order.save(update_fields=["status", "cancel_reason", "cancelled_at", "cancelled_by_role", "is_restocked"])
+    new_order.orderitem_set.update(status="cancelled")
+
+
 class ReplacementRequestUpdateAPIView(UpdateAPIView):
     queryset = ReplacementRequest.objects.all()
     serializer_class = ReplacementRequestSerializer
@@ -306,6 +324,7 @@ class ReplacementRequestUpdateAPIView(UpdateAPIView):
             return [IsCustomer()]
         return super().get_permissions()
 
+    @transaction.atomic
     def perform_update(self, serializer):
         instance = serializer.instance
         user = self.request.user
@@ -353,6 +372,8 @@ class ReplacementRequestUpdateAPIView(UpdateAPIView):
 
             if warehouse_decision.lower() == "approved":
                 instance.status = "approved"
+            elif warehouse_decision.lower() == "rejected":
+                cancel_replacement_order(instance, role)
 
             instance.save(update_fields=["warehouse_decision", "warehouse_comment", "status"])
             return
@@ -370,12 +391,17 @@ class ReplacementRequestUpdateAPIView(UpdateAPIView):
             instance.admin_decision = admin_decision
             instance.admin_comment = admin_comment
 
+            if admin_decision.lower() == "rejected":
+                cancel_replacement_order(instance, role)
             # Create replacement order if approved and not already created
-            if admin_decision.lower() == "approved" and not instance.new_order:
+            elif admin_decision.lower() == "approved" and not instance.new_order:
                 old_item = instance.order_item
                 subtotal = old_item.price * old_item.quantity
                 total = subtotal + instance.order.delivery_charge
 
+                # The replacement ships a new unit, so it has to come out of stock
+                reserve_stock(order_item_lines([old_item]))
+
                 new_order = Order.objects.create(
                     user=instance.user,
                     shipping_address=instance.order.shipping_address,
@@ -399,9 +425,11 @@ class ReplacementRequestUpdateAPIView(UpdateAPIView):
                 )
 
                 instance.new_order = new_order
-            else:
+            elif admin_decision.lower() == "approved":
                 new_order=instance.new_order
                 if not new_order.is_paid:
+                    # Created with the request; its unit comes out of stock only now
+                    reserve_stock(order_item_lines(new_order.orderitem_set.all()))
                     new_order.is_paid = True
                     new_order.paid_at = timezone.now()
                     new_order.status = OrderStatus.PROCESSING
@@ -5,6 +5,7 @@ from .models import ReturnRequest,ReplacementRequest,Order,OrderItem,OrderStatus
 from django.utils import timezone,timesince
 from products.models import ProductVariant
 from decimal import Decimal
+from django.db import transaction
 
 class ReturnRequestSerializer(serializers.ModelSerializer):
     # --- Read-only relations ---
@@ -337,10 +338,12 @@ class ReplacementRequestSerializer(serializers.ModelSerializer):
         return attrs
 
 
+    @transaction.atomic
     def create(self, validated_data):
         order = validated_data.pop("order_number")
         order_item = validated_data.pop("order_item_id")
 
+        # Stock for the replacement unit is reserved when an admin approves the request
         instance = ReplacementRequest.objects.create(
             order=order,
             order_item=order_item,
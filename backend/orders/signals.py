@@ -2,15 +2,20 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import Order, OrderItem, Notification, OrderItemStatus
+from .notificationDispatch import enqueue_notifications
 
 
 def send_multichannel_notification(user, order=None, order_item=None, event=None, message=None, channels=["email", "whatsapp"]):
     """
     Create notifications for multiple channels (email, WhatsApp, SMS).
-    Sends HTML emails for email channel.
+    Rows are written as pending and sent after the surrounding transaction
+    commits (see orders.notificationDispatch), never inside the request.
     """
-    for channel in channels:
-        notif = Notification.objects.create(
+    if isinstance(channels, str):
+        channels = [channels]
+
+    notifications = [
+        Notification.objects.create(
             user=user,
             order=order,
             order_item=order_item,
@@ -18,7 +23,36 @@ def send_multichannel_notification(user, order=None, order_item=None, event=None
             event=event,
             message=message,
         )
-        notif.send_notification()
+        for channel in channels
+    ]
+    enqueue_notifications([notif.id for notif in notifications])
+    return notifications
+
+
+def notify_orders_cancelled(order_ids):
+    """
+    Cancellation emails for orders cancelled with a set-based update, which
+    skips notify_order_cancelled. Orders already notified are left alone.
+    """
+    already = set(
+        Notification.objects.filter(order_id__in=order_ids, event="order_cancelled")
+        .values_list("order_id", flat=True)
+    )
+    orders = Order.objects.filter(id__in=order_ids).exclude(id__in=already).only("id", "user_id", "order_number")
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            user_id=order.user_id,
+            order=order,
+            channel="email",
+            event="order_cancelled",
+            message=f"❌ Your order {order.order_number} has been cancelled.",
+        )
+        for order in orders
+    ])
+    enqueue_notifications([notif.id for notif in notifications])
+    return notifications
+
+
 # -------------------------
 # Order Placement
 # -------------------------
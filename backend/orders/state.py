@@ -0,0 +1,200 @@
+# orders/state.py
+"""
+Order / order item state machine.
+
+ITEM_TRANSITIONS and ORDER_TRANSITIONS are the single source of truth for which
+status changes are allowed; warehouse, delivery and cancellation code validate
+against them, and apply_order_statuses never writes a forbidden order change.
+An order's status is derived from its items by `aggregate_order_status`, which
+has an equivalent SQL form (`annotate_aggregate_status`) so many orders can be
+recomputed in one query. Delivered and cancelled orders are final and are
+never re-derived.
+"""
+from collections import defaultdict
+from django.db.models import Case, When, Value, Q, F, Count, CharField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from admin_dashboard.metrics import schedule_metrics_refresh_for_orders
+from .models import Order, OrderStatus, OrderItemStatus
+
+ITEM_TRANSITIONS = {
+    OrderItemStatus.PENDING: {OrderItemStatus.PICKED, OrderItemStatus.CANCELLED},
+    OrderItemStatus.PICKED: {OrderItemStatus.PACKED, OrderItemStatus.CANCELLED},
+    OrderItemStatus.PACKED: {OrderItemStatus.SHIPPED, OrderItemStatus.CANCELLED},
+    OrderItemStatus.SHIPPED: {OrderItemStatus.OUT_FOR_DELIVERY},
+    OrderItemStatus.OUT_FOR_DELIVERY: {OrderItemStatus.DELIVERED, OrderItemStatus.FAILED},
+    OrderItemStatus.FAILED: {OrderItemStatus.OUT_FOR_DELIVERY, OrderItemStatus.CANCELLED},  # rescheduled, or given up
+    OrderItemStatus.DELIVERED: set(),
+    OrderItemStatus.CANCELLED: set(),
+}
+
+ORDER_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.PROCESSING, OrderStatus.SHIPPED, OrderStatus.DELIVERED, OrderStatus.CANCELLED},
+    OrderStatus.PROCESSING: {OrderStatus.PENDING, OrderStatus.SHIPPED, OrderStatus.DELIVERED, OrderStatus.CANCELLED},
+    OrderStatus.SHIPPED: {OrderStatus.PROCESSING, OrderStatus.DELIVERED, OrderStatus.CANCELLED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+FINAL_ORDER_STATUSES = {OrderStatus.DELIVERED, OrderStatus.CANCELLED}
+
+# Item status groups used by the aggregation rules
+ENDED = [OrderItemStatus.CANCELLED, OrderItemStatus.FAILED]
+IN_TRANSIT = [OrderItemStatus.SHIPPED, OrderItemStatus.OUT_FOR_DELIVERY, OrderItemStatus.DELIVERED]
+IN_WAREHOUSE = [OrderItemStatus.PICKED, OrderItemStatus.PACKED]
+STARTED = [OrderItemStatus.PICKED, OrderItemStatus.PACKED, OrderItemStatus.SHIPPED, OrderItemStatus.OUT_FOR_DELIVERY]
+
+
+class InvalidTransition(ValidationError):
+    pass
+
+
+def can_transition_item(current, new):
+    return new in ITEM_TRANSITIONS.get(current, set())
+
+
+def validate_item_transition(current, new):
+    if not can_transition_item(current, new):
+        raise InvalidTransition(f"Order item cannot move from '{current}' to '{new}'")
+
+
+def can_transition_order(current, new):
+    return new in ORDER_TRANSITIONS.get(current, set())
+
+
+def validate_order_transition(current, new):
+    if not can_transition_order(current, new):
+        raise InvalidTransition(f"Order cannot move from '{current}' to '{new}'")
+
+
+# -----------------------------
+# Aggregate status (Python)
+# -----------------------------
+def aggregate_order_status(item_statuses, current_status):
+    """Order status implied by its item statuses; `current_status` when no rule applies."""
+    if current_status in FINAL_ORDER_STATUSES:
+        return current_status
+    if not item_statuses:
+        return OrderStatus.PENDING
+    if all(s in ENDED for s in item_statuses):
+        return OrderStatus.CANCELLED
+    if all(s == OrderItemStatus.DELIVERED for s in item_statuses):
+        return OrderStatus.DELIVERED
+    if all(s in IN_TRANSIT for s in item_statuses):
+        return OrderStatus.SHIPPED
+    if any(s in IN_WAREHOUSE for s in item_statuses):
+        return OrderStatus.PROCESSING
+    if any(s == OrderItemStatus.PENDING for s in item_statuses):
+        if any(s in STARTED for s in item_statuses):
+            return OrderStatus.PROCESSING
+        return OrderStatus.PENDING
+    return current_status
+
+
+# -----------------------------
+# Aggregate status (SQL)
+# -----------------------------
+def annotate_aggregate_status(orders):
+    """Annotate `aggregate_status`: the same rules as aggregate_order_status, as one GROUP BY."""
+    def items(statuses=None):
+        if statuses is None:
+            return Count('orderitem')
+        return Count('orderitem', filter=Q(orderitem__status__in=statuses))
+
+    orders = orders.annotate(
+        items_total=items(),
+        items_ended=items(ENDED),
+        items_delivered=items([OrderItemStatus.DELIVERED]),
+        items_in_transit=items(IN_TRANSIT),
+        items_in_warehouse=items(IN_WAREHOUSE),
+        items_pending=items([OrderItemStatus.PENDING]),
+        items_started=items(STARTED),
+    )
+    return orders.annotate(
+        aggregate_status=Case(
+            When(status__in=FINAL_ORDER_STATUSES, then=F('status')),
+            When(items_total=0, then=Value(OrderStatus.PENDING)),
+            When(items_ended=F('items_total'), then=Value(OrderStatus.CANCELLED)),
+            When(items_delivered=F('items_total'), then=Value(OrderStatus.DELIVERED)),
+            When(items_in_transit=F('items_total'), then=Value(OrderStatus.SHIPPED)),
+            When(items_in_warehouse__gt=0, then=Value(OrderStatus.PROCESSING)),
+            When(items_pending__gt=0, items_started__gt=0, then=Value(OrderStatus.PROCESSING)),
+            When(items_pending__gt=0, then=Value(OrderStatus.PENDING)),
+            default=F('status'),
+            output_field=CharField(),
+        )
+    )
+
+
+# -----------------------------
+# Writes
+# -----------------------------
+def apply_order_statuses(changes, now=None):
+    """
+    Write {order_id: new_status}: one UPDATE per target status, setting
+    shipped_at / delivered_at only when still empty. Changes ORDER_TRANSITIONS
+    does not allow from the stored status (e.g. shipped -> pending) are
+    skipped. Cancellations go through Order.save() so restocking and
+    notifications still run. Returns the changes written.
+    """
+    if not changes:
+        return {}
+    now = now or timezone.now()
+    current = dict(Order.objects.filter(id__in=list(changes)).values_list('id', 'status'))
+    changes = {
+        order_id: new_status for order_id, new_status in changes.items()
+        if can_transition_order(current.get(order_id), new_status)
+    }
+    by_status = defaultdict(list)
+    for order_id, new_status in changes.items():
+        by_status[new_status].append(order_id)
+
+    for new_status, ids in by_status.items():
+        # Guarded on the stored status too, in case it moved since it was read
+        allowed_from = [status for status, targets in ORDER_TRANSITIONS.items() if new_status in targets]
+        if new_status == OrderStatus.CANCELLED:
+            for order in Order.objects.filter(id__in=ids, status__in=allowed_from):
+                order.status = OrderStatus.CANCELLED
+                order.save(update_fields=['status', 'updated_at'])
+            continue
+        fields = {'status': new_status, 'updated_at': now}
+        if new_status == OrderStatus.SHIPPED:
+            fields['shipped_at'] = Coalesce(F('shipped_at'), Value(now))
+        elif new_status == OrderStatus.DELIVERED:
+            fields['delivered_at'] = Coalesce(F('delivered_at'), Value(now))
+        Order.objects.filter(id__in=ids, status__in=allowed_from).update(**fields)
+
+    bulk_updated = [order_id for order_id, new_status in changes.items() if new_status != OrderStatus.CANCELLED]
+    if bulk_updated:
+        schedule_metrics_refresh_for_orders(bulk_updated)
+    return dict(changes)
+
+
+def stale_order_statuses(orders):
+    """{order_id: aggregate_status} for orders in `orders` whose stored status is out of date (one query)."""
+    return dict(
+        annotate_aggregate_status(orders)
+        .exclude(aggregate_status=F('status'))
+        .values_list('id', 'aggregate_status')
+    )
+
+
+def recompute_order_statuses(order_ids, now=None):
+    """
+    Re-derive the status of the given orders from their items in one query and
+    write only the ones that changed. Returns {order_id: new_status}.
+    """
+    order_ids = set(order_ids)
+    if not order_ids:
+        return {}
+    return apply_order_statuses(stale_order_statuses(Order.objects.filter(id__in=order_ids)), now=now)
+
+
+def recompute_order_status(order):
+    """Single-order form; updates `order` in memory too. Returns True when the status changed."""
+    changes = recompute_order_statuses([order.pk])
+    if order.pk not in changes:
+        return False
+    order.refresh_from_db(fields=['status', 'shipped_at', 'delivered_at', 'updated_at'])
+    return True
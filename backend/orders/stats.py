@@ -0,0 +1,122 @@
+# orders/stats.py
+"""
+Operational stats for the warehouse and delivery dashboards.
+
+Counts are conditional aggregates (one pass per table), trends for any window
+come back from a single UNION ALL of GROUP BYs, and results are cached for a
+few seconds so many polling terminals share one computation.
+"""
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Value, CharField, Exists, OuterRef
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Order, OrderItem, Notification
+
+STATS_CACHE_TIMEOUT = getattr(settings, "WAREHOUSE_STATS_CACHE_TIMEOUT", 10)
+MAX_TREND_DAYS = 90
+
+
+def cached_stats(key, compute, timeout=None):
+    """Shared short-TTL cache for dashboard stats that many terminals poll."""
+    return cache.get_or_set(f"ops-stats:{key}", compute, STATS_CACHE_TIMEOUT if timeout is None else timeout)
+
+
+def status_counts(queryset, **conditions):
+    """{name: count} for every Q condition, computed in one aggregate query."""
+    if not conditions:
+        return {}
+    return queryset.aggregate(**{
+        name: Count("pk", filter=condition) for name, condition in conditions.items()
+    })
+
+
+def trend_series(since, **series):
+    """
+    Daily counts since `since` (a date) for every `name=(queryset, datetime_field)`,
+    from one UNION ALL statement. Returns {name: [{"date", "count"}, ...]} sorted by date.
+    """
+    start = timezone.make_aware(datetime.combine(since, time.min), timezone.get_current_timezone())
+    parts = [
+        queryset.filter(**{f"{field}__gte": start})
+        .annotate(series=Value(name, output_field=CharField()), date=TruncDate(field))
+        .values("series", "date")
+        .annotate(count=Count("pk"))
+        .order_by()
+        for name, (queryset, field) in series.items()
+    ]
+    result = {name: [] for name in series}
+    if not parts:
+        return result
+    rows = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+    for row in rows:
+        result[row["series"]].append({"date": row["date"], "count": row["count"]})
+    for points in result.values():
+        points.sort(key=lambda point: point["date"])
+    return result
+
+
+# -----------------------------
+# Warehouse
+# -----------------------------
+def warehouse_stats(days=7):
+    """Overall warehouse counts plus `days`-long daily trends (uncached)."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    unassigned_shipped = Q(status="shipped", order__delivered_by__isnull=True)
+
+    overall = status_counts(
+        Order.objects.all(),
+        pending_orders=Q(status="processing"),
+        assigned_orders=Q(delivered_by__isnull=False),
+    )
+    overall.update(status_counts(
+        OrderItem.objects.filter(status__in=["picked", "packed", "shipped"]),
+        picked_items=Q(status="picked"),
+        packed_items=Q(status="packed"),
+        shipped_items=unassigned_shipped,
+    ))
+
+    items = OrderItem.objects.all()
+    trends = trend_series(
+        since,
+        orders=(Order.objects.all(), "created_at"),
+        picked_items=(items.filter(status="picked"), "order__created_at"),
+        packed_items=(items.filter(status="packed"), "order__created_at"),
+        shipped_items=(items.filter(unassigned_shipped), "order__created_at"),
+        assigned_orders=(Order.objects.filter(delivered_by__isnull=False), "assigned_at"),
+    )
+    return {
+        "overall": {key: overall[key] for key in
+                    ("pending_orders", "picked_items", "packed_items", "shipped_items", "assigned_orders")},
+        "trends": trends,
+    }
+
+
+def cached_warehouse_stats(days=7):
+    return cached_stats(f"warehouse:{days}", lambda: warehouse_stats(days))
+
+
+# -----------------------------
+# Delivery
+# -----------------------------
+def deliveryman_stats(deliveryman):
+    """Dashboard counters for one deliveryman: one query over items, one over orders."""
+    pending_otp = Exists(Notification.objects.filter(
+        order_item=OuterRef("pk"), event="otp_delivery", otp_verified=False
+    ))
+    stats = status_counts(
+        OrderItem.objects.filter(order__delivered_by=deliveryman, status="out_for_delivery"),
+        active_deliveries=Q(status="out_for_delivery"),
+        pending_otp_verification=Q(pending_otp),
+    )
+    stats.update(status_counts(
+        Order.objects.filter(delivered_by=deliveryman, status__in=["delivered", "failed"]),
+        completed_deliveries=Q(status="delivered"),
+        failed_deliveries=Q(status="failed"),
+    ))
+    return stats
+
+
+def cached_deliveryman_stats(deliveryman):
+    return cached_stats(f"deliveryman:{deliveryman.pk}", lambda: deliveryman_stats(deliveryman))
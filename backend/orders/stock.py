@@ -0,0 +1,124 @@
+# orders/stock.py
+from collections import OrderedDict
+from django.db import transaction
+from django.db.models import Case, When, Value, F, IntegerField
+from rest_framework.exceptions import ValidationError
+from products.cache import schedule_product_invalidation
+from products.models import ProductVariant
+from products.utils import refresh_product_listings
+
+
+class InsufficientStock(ValidationError):
+    """Raised by reserve_stock; `shortfalls` lists every line that could not be covered."""
+
+    def __init__(self, shortfalls):
+        self.shortfalls = shortfalls
+        super().__init__({
+            "detail": "Not enough stock for one or more items.",
+            "items": shortfalls,
+        })
+
+
+def _normalize_lines(lines):
+    """Merge (variant_id, quantity) pairs into {variant_id: total_qty}, sorted by id."""
+    totals = {}
+    for variant_id, quantity in lines:
+        quantity = int(quantity)
+        if quantity <= 0:
+            raise ValidationError({"quantity": "Quantity must be greater than zero."})
+        totals[int(variant_id)] = totals.get(int(variant_id), 0) + quantity
+    return OrderedDict(sorted(totals.items()))
+
+
+def _lock_variants(variant_ids):
+    """
+    Row-lock the variants in ascending id order (one SELECT ... FOR UPDATE) so
+    concurrent checkouts touching overlapping variants can never deadlock.
+    """
+    return {
+        row['id']: row
+        for row in ProductVariant.objects.select_for_update()
+        .filter(id__in=variant_ids)
+        .order_by('id')
+        .values('id', 'stock', 'product_id', 'variant_name')
+    }
+
+
+def _quantity_case(totals):
+    return Case(
+        *[When(id=variant_id, then=Value(qty)) for variant_id, qty in totals.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _refresh_listings_on_commit(locked):
+    """
+    Stock moves with queryset.update(), which skips the catalog signals, so
+    refresh the listings and invalidate the cached responses showing these
+    products here; categories, banners and other products stay cached.
+    """
+    product_ids = {row['product_id'] for row in locked.values()}
+    transaction.on_commit(lambda: refresh_product_listings(product_ids))
+    schedule_product_invalidation(product_ids)
+
+
+def reserve_stock(lines):
+    """
+    Decrement stock for every (variant_id, quantity) line, all or nothing.
+    Locks the rows in id order, then applies one conditional
+    `UPDATE ... SET stock = stock - qty WHERE stock >= qty`.
+    Raises InsufficientStock listing each short line.
+    """
+    totals = _normalize_lines(lines)
+    if not totals:
+        return {}
+
+    with transaction.atomic():
+        locked = _lock_variants(list(totals))
+
+        shortfalls = []
+        for variant_id, qty in totals.items():
+            row = locked.get(variant_id)
+            available = row['stock'] if row else 0
+            if available < qty:
+                shortfalls.append({
+                    "product_variant_id": variant_id,
+                    "variant_name": row['variant_name'] if row else None,
+                    "requested": qty,
+                    "available": available,
+                })
+        if shortfalls:
+            raise InsufficientStock(shortfalls)
+
+        need = _quantity_case(totals)
+        updated = ProductVariant.objects.filter(id__in=list(totals), stock__gte=need)\
+            .update(stock=F('stock') - need)
+        if updated != len(totals):
+            # Only reachable on backends without row locks; the savepoint rolls back the partial update
+            raise InsufficientStock([
+                {"product_variant_id": variant_id, "requested": qty, "available": None}
+                for variant_id, qty in totals.items()
+            ])
+
+        _refresh_listings_on_commit(locked)
+    return dict(totals)
+
+
+def release_stock(lines):
+    """Return stock for every (variant_id, quantity) line in one ordered, locked UPDATE."""
+    totals = _normalize_lines(lines)
+    if not totals:
+        return {}
+
+    with transaction.atomic():
+        locked = _lock_variants(list(totals))
+        need = _quantity_case(totals)
+        ProductVariant.objects.filter(id__in=list(totals)).update(stock=F('stock') + need)
+        _refresh_listings_on_commit(locked)
+    return dict(totals)
+
+
+def order_item_lines(items):
+    """(variant_id, quantity) lines for an iterable/queryset of OrderItems."""
+    return [(item.product_variant_id, item.quantity) for item in items]
@@ -1,3 +1,110 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
+from products.models import Category, Product, ProductVariant
+from .models import Order, OrderItem, ShippingAddress
+from .stock import InsufficientStock, reserve_stock, release_stock
 
-# Create your tests here.
+User = get_user_model()
+
+
+def make_variant(product, name, stock):
+    return ProductVariant.objects.create(
+        product=product, variant_name=name, sku=f'SKU-{name}', stock=stock,
+        base_price=Decimal('100'), offer_price=Decimal('90'),
+    )
+
+
+class StockTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Phones', slug='phones')
+        product = Product.objects.create(category=category, name='Phone', slug='phone', description='Smartphone')
+        cls.red = make_variant(product, 'Red', 5)
+        cls.blue = make_variant(product, 'Blue', 1)
+
+    def assertStock(self, variant, expected):
+        variant.refresh_from_db(fields=['stock'])
+        self.assertEqual(variant.stock, expected)
+
+
+class ReserveStockTests(StockTestCase):
+    def test_reserves_every_line(self):
+        self.assertEqual(reserve_stock([(self.red.id, 2), (self.blue.id, 1)]), {self.blue.id: 1, self.red.id: 2})
+        self.assertStock(self.red, 3)
+        self.assertStock(self.blue, 0)
+
+    def test_insufficient_stock_leaves_every_row_unchanged(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            reserve_stock([(self.red.id, 2), (self.blue.id, 3), (999999, 1)])
+
+        self.assertEqual(raised.exception.shortfalls, [
+            {"product_variant_id": self.blue.id, "variant_name": 'Blue', "requested": 3, "available": 1},
+            {"product_variant_id": 999999, "variant_name": None, "requested": 1, "available": 0},
+        ])
+        self.assertStock(self.red, 5)
+        self.assertStock(self.blue, 1)
+
+    def test_duplicate_variant_lines_are_merged(self):
+        reserve_stock([(self.red.id, 2), (self.red.id, 3)])
+        self.assertStock(self.red, 0)
+
+    def test_duplicate_variant_lines_are_checked_together(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            reserve_stock([(self.red.id, 3), (self.red.id, 3)])
+
+        self.assertEqual(raised.exception.shortfalls[0]["requested"], 6)
+        self.assertStock(self.red, 5)
+
+    def test_release_returns_reserved_stock(self):
+        lines = [(self.red.id, 2), (self.blue.id, 1), (self.red.id, 1)]
+        reserve_stock(lines)
+        release_stock(lines)
+        self.assertStock(self.red, 5)
+        self.assertStock(self.blue, 1)
+
+
+class OrderRestockTests(StockTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='customer@example.com', password='pw12345!', first_name='Test', last_name='Customer', role='customer'
+        )
+        address = ShippingAddress.objects.create(
+            user=self.user, full_name='Test Customer', phone_number='9876543210', address='1 Main Road',
+            city='Chennai', postal_code='600001', locality='Adyar',
+        )
+        reserve_stock([(self.red.id, 2)])
+        self.order = Order.objects.create(
+            user=self.user, shipping_address=address, status='pending',
+            subtotal=Decimal('180'), total=Decimal('180'),
+        )
+        OrderItem.objects.create(order=self.order, product_variant=self.red, quantity=2, price=Decimal('90'), status='pending')
+        self.assertStock(self.red, 3)
+
+    def test_cancelling_restocks_once(self):
+        self.order.status = 'cancelled'
+        self.order.save()
+        self.assertStock(self.red, 5)
+
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.is_restocked)
+        self.order.restock_items()
+        self.order.save()
+        self.assertStock(self.red, 5)
+
+    def test_cancel_endpoint_restocks_once(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(f'/api/orders/{self.order.order_number}/cancel/', {'cancel_reason': 'Changed my mind'})
+        self.assertEqual(response.status_code, 200)
+        self.assertStock(self.red, 5)
+
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.is_restocked)
+        self.order.restock_items()
+        self.assertStock(self.red, 5)
+
+        response = client.post(f'/api/orders/{self.order.order_number}/cancel/')
+        self.assertEqual(response.status_code, 400)
+        self.assertStock(self.red, 5)
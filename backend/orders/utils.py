@@ -3,11 +3,10 @@ import logging
 from decimal import Decimal
 from django.utils import timezone
 from django.db import models
-from django.shortcuts import get_object_or_404
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import ValidationError, NotFound
 import razorpay
 from django.conf import settings
-from .models import Order, OrderItem, ShippingAddress
+from .models import Order, OrderItem, ShippingAddress, generate_order_number
 from products.models import ProductVariant
 from promoter.models import Promoter
 from cart.models import CartItem
@@ -16,6 +15,9 @@ from razorpay.errors import ServerError, BadRequestError, GatewayError, Signatur
 from django.conf import settings
 from admin_dashboard.models import WarehouseLog
 from .serializers import OrderSerializer
+from .stock import reserve_stock
+from .holds import create_holds
+from .state import validate_item_transition, recompute_order_status
 
 logger = logging.getLogger(__name__)
 
@@ -75,113 +77,105 @@ def format_razorpay_response(razorpay_order, order):
 # -----------------------------
 # Order Creation & Updates
 # -----------------------------
-def create_order_with_items(user, items, shipping_address, payment_method, promoter=None):
-    """Create an Order and associated OrderItems, handle stock and Razorpay."""
-    order = Order.objects.create(
-        user=user,
-        shipping_address=shipping_address,
-        subtotal=Decimal("0.00"),
-        delivery_charge=Decimal("0.00"),
-        total=Decimal("0.00"),
-        payment_method=payment_method,
-        is_paid=False,
-        promoter=promoter
-    )
-
-    subtotal = Decimal("0.00")
-
+def _item_lines(items):
+    """Normalize request dicts or CartItems into (variant_id, quantity) pairs without touching the DB."""
+    lines = []
     for item in items:
         if isinstance(item, dict):
             variant_id = item.get("product_variant_id")
             quantity = int(item.get("quantity", 1))
             if not variant_id:
                 raise ValidationError("Missing product_variant_id in item.")
-            variant = get_object_or_404(ProductVariant, id=variant_id)
         else:
-            variant = item.product_variant
+            variant_id = item.product_variant_id
             quantity = item.quantity
+        lines.append((int(variant_id), quantity))
+    return lines
 
-        if variant.stock < quantity:
-            raise ValidationError(f"Not enough stock for {variant}")
 
-        variant.stock -= quantity
-        variant.save()
+def create_order_with_items(user, items, shipping_address, payment_method, promoter=None):
+    """
+    Create an Order and its OrderItems, handle stock and Razorpay.
+    Batched: one variant fetch, one stock UPDATE, one Order INSERT and one
+    OrderItem bulk INSERT regardless of the number of lines.
+    """
+    lines = _item_lines(items)
+    variants = ProductVariant.objects.in_bulk([variant_id for variant_id, _ in lines])
+    missing = sorted({variant_id for variant_id, _ in lines if variant_id not in variants})
+    if missing:
+        raise NotFound(f"ProductVariant(s) not found: {', '.join(map(str, missing))}")
+
+    # One locked, conditional UPDATE for the whole order; raises with per-line shortfalls
+    reserved = reserve_stock(lines)
 
+    subtotal = Decimal("0.00")
+    order_items = []
+    for variant_id, quantity in lines:
+        variant = variants[variant_id]
         price = variant.offer_price if variant.offer_price else variant.base_price
         subtotal += price * quantity
-
-        OrderItem.objects.create(
-            order=order,
-            product_variant=variant,
-            quantity=quantity,
-            price=price
-        )
+        order_items.append(OrderItem(product_variant=variant, quantity=quantity, price=price))
 
     delivery_charge = calculate_delivery_charge(subtotal, shipping_address)
-    order.subtotal = subtotal
-    order.delivery_charge = delivery_charge
-    order.total = subtotal + delivery_charge
-    order.save()
+    total = subtotal + delivery_charge
+    order_number = generate_order_number()
+
+    order = Order.objects.create(
+        user=user,
+        shipping_address=shipping_address,
+        order_number=order_number,
+        subtotal=subtotal,
+        delivery_charge=delivery_charge,
+        total=total,
+        payment_method=payment_method,
+        is_paid=False,
+        promoter=promoter,
+    )
+
+    for order_item in order_items:
+        order_item.order = order
+    OrderItem.objects.bulk_create(order_items)
 
     razorpay_order = None
     if payment_method == "Razorpay":
+        # Online payments only keep the stock for STOCK_HOLD_TTL_MINUTES unless paid
+        create_holds(order, reserved.items())
+
+        # Last, once every local write has succeeded, so a failed insert never
+        # leaves a Razorpay order without an Order row
         try:
             client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
             razorpay_order = client.order.create({
-                'amount': int(order.total * 100),
+                'amount': int(total * 100),
                 'currency': 'INR',
-                'receipt': f"order_rcptid_{order.order_number}",
+                'receipt': f"order_rcptid_{order_number}",
                 'payment_capture': 1
             })
-            order.tracking_number = razorpay_order.get('id')
-            order.save()
-            logger.info(f"Razorpay order created: {razorpay_order.get('id')} for Order {order.order_number}")
+            logger.info(f"Razorpay order created: {razorpay_order.get('id')} for Order {order_number}")
         except Exception as e:
-            logger.error(f"Razorpay order creation failed for Order {order.order_number}: {str(e)}")
+            logger.error(f"Razorpay order creation failed for Order {order_number}: {str(e)}")
             raise ValidationError(f"Razorpay order creation failed: {str(e)}")
 
+        # A plain UPDATE: the row was just created, no signal needs to run again
+        order.razorpay_order_id = order.tracking_number = razorpay_order.get('id')
+        Order.objects.filter(id=order.id).update(
+            razorpay_order_id=order.razorpay_order_id,
+            tracking_number=order.tracking_number,
+        )
+
     return order, razorpay_order
 
 
 from django.utils import timezone
 
 def update_order_status_from_items(order):
-    item_statuses = list(order.orderitem_set.values_list('status', flat=True))
-    print(f"[DEBUG] Order {order.order_number} item statuses: {item_statuses}")
-
-    if not item_statuses:
-        order.status = 'pending'
-        print(f"[DEBUG] No items found. Setting order status to 'pending'.")
-    elif all(status in ['cancelled', 'failed'] for status in item_statuses):
-        order.status = 'cancelled'
-        print(f"[DEBUG] All items cancelled/failed. Setting order status to 'cancelled'.")
-    elif all(status == 'delivered' for status in item_statuses):
-        order.status = 'delivered'
-        order.delivered_at = order.delivered_at or timezone.now()
-        print(f"[DEBUG] All items delivered. Setting order status to 'delivered'.")
-    elif all(status in ['shipped', 'out_for_delivery', 'delivered'] for status in item_statuses):
-        order.status = 'shipped'  # Keep order status valid
-        order.shipped_at = order.shipped_at or timezone.now()
-        print(f"[DEBUG] All items shipped/out_for_delivery/delivered. Setting order status to 'shipped'.")
-    elif any(status in ['picked', 'packed'] for status in item_statuses):
-        order.status = 'processing'
-        print(f"[DEBUG] Some items picked/packed. Setting order status to 'processing'.")
-    elif any(status == 'pending' for status in item_statuses):
-        if any(s in ['picked', 'packed', 'shipped', 'out_for_delivery'] for s in item_statuses):
-            order.status = 'processing'
-            print(f"[DEBUG] Mixed statuses with some pending. Setting order status to 'processing'.")
-        else:
-            order.status = 'pending'
-            print(f"[DEBUG] All items pending. Setting order status to 'pending'.")
-    else:
-        print(f"[DEBUG] No matching condition. Order status unchanged: {order.status}")
+    """Re-derive `order.status` from its items (see orders.state); saves only when it changed."""
+    return recompute_order_status(order)
 
-    order.save(update_fields=['status', 'shipped_at', 'delivered_at'])
-    print(f"[DEBUG] Final order status for {order.order_number}: {order.status}")
 
-    
 def update_item_status(item_id, expected_status, new_status, user, timestamp_field=None, comment=None):
     """Mark an OrderItem as picked/packed/shipped/out_for_delivery with logging."""
+    validate_item_transition(expected_status, new_status)
     try:
         item = OrderItem.objects.select_related("order").get(id=item_id)
     except OrderItem.DoesNotExist:
@@ -233,13 +227,18 @@ def calculate_order_totals(items, shipping_address=None):
     """Calculate subtotal, delivery charge, and total for a list of items."""
     subtotal = Decimal("0.00")
 
+    dict_items = [item for item in items if isinstance(item, dict)]
+    variants = ProductVariant.objects.filter(is_active=True).in_bulk(
+        [item.get("product_variant_id") for item in dict_items if item.get("product_variant_id")]
+    )
+
     for item in items:
         if isinstance(item, dict):
             variant_id = item.get("product_variant_id")
             quantity = int(item.get("quantity", 1))
             if not variant_id or quantity <= 0:
                 continue
-            variant = ProductVariant.objects.filter(id=variant_id, is_active=True).first()
+            variant = variants.get(int(variant_id))
             if not variant:
                 continue
             price = variant.offer_price if variant.offer_price else variant.base_price
@@ -30,13 +30,16 @@ from django.utils import timezone
 from cart.models import CartItem
 from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
-from .models import Order,OrderItem,ShippingAddress
+from .models import Order,OrderItem,ShippingAddress,OrderStatus,OrderItemStatus
 from django.db import transaction
 import razorpay
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 import logging
 from .utils import (process_refund)
+from .stock import release_stock, order_item_lines
+from .holds import release_holds
+from .state import can_transition_order, validate_item_transition
 
 from .helpers import( process_checkout,
                     verify_razorpay_payment,
@@ -159,21 +162,27 @@ class CancelOrderAPIView(APIView):
         user = request.user
         role = getattr(user,'role',None)
         try:
-            order = Order.objects.get(order_number=order_number) if role == 'admin' else Order.objects.get(order_number=order_number, user=user)
+            orders = Order.objects.select_for_update()
+            order = orders.get(order_number=order_number) if role == 'admin' else orders.get(order_number=order_number, user=user)
         except Order.DoesNotExist:
             raise ValidationError('order not found')
 
-        if order.status in ["cancelled", "delivered", "shipped"]:
+        # Shipped orders may still be cancelled by the system, but not from here
+        if order.status == OrderStatus.SHIPPED or not can_transition_order(order.status, OrderStatus.CANCELLED):
             return Response({"message": f"Cannot cancel order once it's {order.status}"}, status=status.HTTP_400_BAD_REQUEST)
 
+        items = list(order.orderitem_set.all())
+        for item in items:
+            if item.status != OrderItemStatus.CANCELLED:
+                validate_item_transition(item.status, OrderItemStatus.CANCELLED)
+
         if order.is_paid:
             process_refund(order)
-        
-        for item in order.orderitem_set.all():
-            product_variant=item.product_variant
-            product_variant.stock += item.quantity
-            product_variant.save(update_fields=["stock"])
 
+        release_stock(order_item_lines(items))
+        release_holds(order)
+
+        for item in items:
             item.status='cancelled'
             item.save(update_fields=['status'])
             create_warehouse_log(item,updated_by=user,comment="order cancelled")
@@ -241,7 +250,8 @@ class RazorpayPaymentVerifyAPIView(APIView):
         if not all([razorpay_order_id, razorpay_payment_id, razorpay_signature, order_number]):
             raise ValidationError("Missing Razorpay payment details")
 
-        order = get_object_or_404(Order, order_number=order_number, user=request.user)
+        # Locked so the stock-hold sweeper cannot cancel the order mid-verification
+        order = get_object_or_404(Order.objects.select_for_update(), order_number=order_number, user=request.user)
 
         client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
 
@@ -1,7 +1,7 @@
 import nested_admin
 from django.contrib import admin
 from django.utils.safestring import mark_safe
-from .models import Category, Product, ProductVariant, ProductVariantImage,Banner
+from .models import Category, Product, ProductVariant, ProductVariantImage,Banner,ProductListing
 from .forms import ProductVariantForm
 
 # --------------------- CATEGORY ---------------------
@@ -120,4 +120,11 @@ class BannerAdmin(admin.ModelAdmin):
             "fields": ("created_at", "updated_at"),
             "classes": ("collapse",)
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(ProductListing)
+class ProductListingAdmin(admin.ModelAdmin):
+    list_display = ("product", "category_slug", "min_price", "max_price", "total_stock", "min_variant_stock", "is_available", "refreshed_at")
+    list_filter = ("is_available", "featured", "category_slug")
+    search_fields = ("name", "slug")
+    readonly_fields = [f.name for f in ProductListing._meta.fields]
@@ -0,0 +1,126 @@
+# products/cache.py
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+
+CATALOG_CACHE_ALIAS = getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')
+CATALOG_CACHE_TIMEOUT = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 15)
+CATALOG_CACHE_MAX_AGE = getattr(settings, 'CATALOG_CACHE_MAX_AGE', 60)
+CATALOG_VERSION_KEY = 'catalog:version'
+PRODUCT_VERSION_KEY = 'catalog:product:{}'
+
+
+def catalog_cache():
+    return caches[CATALOG_CACHE_ALIAS]
+
+
+def get_catalog_version():
+    cache = catalog_cache()
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response by moving to a new key namespace."""
+    cache = catalog_cache()
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, 2, timeout=None)
+
+
+def schedule_catalog_invalidation():
+    transaction.on_commit(bump_catalog_version)
+
+
+def get_product_versions(product_ids):
+    """{product_id: version} for the given products; products never bumped are at 1."""
+    keys = {PRODUCT_VERSION_KEY.format(product_id): product_id for product_id in product_ids}
+    found = catalog_cache().get_many(list(keys))
+    return {product_id: found.get(key, 1) for key, product_id in keys.items()}
+
+
+def bump_product_versions(product_ids):
+    """
+    Invalidate only the cached catalog responses that include these products
+    (see CatalogCacheMixin.catalog_product_field); the rest stay cached.
+    """
+    cache = catalog_cache()
+    for product_id in set(product_ids):
+        key = PRODUCT_VERSION_KEY.format(product_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, timeout=None)
+
+
+def schedule_product_invalidation(product_ids):
+    product_ids = set(product_ids)
+    transaction.on_commit(lambda: bump_product_versions(product_ids))
+
+
+def make_etag(data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    return '"%s"' % hashlib.sha256(payload).hexdigest()
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match', '')
+    return etag in [tag.strip() for tag in header.split(',')] or header.strip() == '*'
+
+
+class CatalogCacheMixin:
+    """
+    Serves GET list responses from the catalog cache. Keys are namespaced by the
+    catalog version (bumped from products.signals on any catalog write), carry a
+    strong ETag and answer `If-None-Match` with 304 without touching the database.
+
+    Views whose rows belong to products set `catalog_product_field` (the row
+    field holding the product id); their entries also record those products'
+    versions and are dropped when one of them is bumped, e.g. by a stock move.
+    """
+    catalog_cache_prefix = None
+    catalog_product_field = None
+
+    def get_catalog_cache_key(self, request):
+        prefix = self.catalog_cache_prefix or self.__class__.__name__
+        path_hash = hashlib.sha1(request.get_full_path().encode()).hexdigest()
+        return f"catalog:{get_catalog_version()}:{prefix}:{path_hash}"
+
+    def get_catalog_product_ids(self, data):
+        rows = data.get('results', []) if isinstance(data, dict) else data
+        return {row[self.catalog_product_field] for row in rows}
+
+    def list(self, request, *args, **kwargs):
+        cache = catalog_cache()
+        key = self.get_catalog_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None and cached.get('products'):
+            if get_product_versions(cached['products']) != cached['products']:
+                cached = None
+
+        if cached is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cached = {'data': response.data, 'etag': make_etag(response.data)}
+            if self.catalog_product_field:
+                cached['products'] = get_product_versions(self.get_catalog_product_ids(response.data))
+            cache.set(key, cached, CATALOG_CACHE_TIMEOUT)
+
+        if etag_matches(request, cached['etag']):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(cached['data'])
+        response['ETag'] = cached['etag']
+        patch_cache_control(response, public=True, max_age=CATALOG_CACHE_MAX_AGE)
+        return response
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.utils import refresh_product_listings
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized ProductListing rows used by the catalog listing endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        refreshed = 0
+        for start in range(0, len(product_ids), batch_size):
+            refreshed += refresh_product_listings(product_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {refreshed} product listings"))
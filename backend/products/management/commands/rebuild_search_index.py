@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.search import refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product search index (ProductSearchDocument rows and tsvectors)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        indexed = 0
+        for start in range(0, len(product_ids), batch_size):
+            indexed += refresh_search_documents(product_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} search documents"))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 02:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0020_productvariant_featured'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductListing',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to='products.product')),
+                ('name', models.CharField(max_length=200)),
+                ('slug', models.SlugField()),
+                ('category_slug', models.SlugField()),
+                ('is_available', models.BooleanField(default=True)),
+                ('featured', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('total_stock', models.PositiveIntegerField(default=0)),
+                ('min_variant_stock', models.PositiveIntegerField(blank=True, null=True)),
+                ('primary_image_url', models.URLField(blank=True, max_length=500, null=True)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['is_available', 'category_slug'], name='products_pr_is_avai_0413a0_idx'), models.Index(fields=['is_available', 'created_at'], name='products_pr_is_avai_aae045_idx'), models.Index(fields=['min_price'], name='products_pr_min_pri_e68722_idx'), models.Index(fields=['max_price'], name='products_pr_max_pri_40e166_idx'), models.Index(fields=['total_stock'], name='products_pr_total_s_a3ea64_idx')],
+            },
+        ),
+    ]
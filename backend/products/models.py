@@ -4,6 +4,7 @@ from django.utils.text import slugify
 from django.utils.crypto import get_random_string
 from rest_framework.exceptions import ValidationError
 import cloudinary.uploader
+from django.contrib.postgres.search import SearchVectorField
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -196,4 +197,55 @@ class Banner(models.Model):
         if self.image_url:
             return format_html('<img src="{}" width="100" />', self.image_url)
         return "-"
-    image_tag.short_description = 'Preview'
\ No newline at end of file
+    image_tag.short_description = 'Preview'
+
+class ProductListing(models.Model):
+    """
+    Denormalized read model for catalog listing pages: one row per product with
+    the variant aggregates precomputed, kept in sync by products.signals.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='listing')
+    name = models.CharField(max_length=200)
+    slug = models.SlugField(db_index=True)
+    category_slug = models.SlugField()
+    is_available = models.BooleanField(default=True)
+    featured = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    total_stock = models.PositiveIntegerField(default=0)
+    min_variant_stock = models.PositiveIntegerField(null=True, blank=True)
+    primary_image_url = models.URLField(max_length=500, blank=True, null=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_available', 'category_slug']),
+            models.Index(fields=['is_available', 'created_at']),
+            models.Index(fields=['min_price']),
+            models.Index(fields=['max_price']),
+            models.Index(fields=['total_stock']),
+        ]
+
+    def __str__(self):
+        return f"Listing for {self.name}"
+
+
+class ProductSearchDocument(models.Model):
+    """
+    Search index row: one per product (variant=None) holding the product text and
+    one per variant holding the variant text. On PostgreSQL `search_vector` is
+    GIN-indexed and `title` carries a trigram index for typo-tolerant matching;
+    other backends fall back to substring matching in products.search.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='search_documents')
+    variant = models.OneToOneField(
+        ProductVariant, on_delete=models.CASCADE, null=True, blank=True, related_name='search_document'
+    )
+    title = models.CharField(max_length=500)
+    body = models.TextField(blank=True)
+    search_vector = SearchVectorField(null=True, blank=True)
+
+    def __str__(self):
+        return self.title
@@ -0,0 +1,151 @@
+# products/search.py
+import re
+from django.db import connection, transaction
+from django.db.models import Q, F, Value, FloatField, OuterRef, Subquery, Case, When
+from django.db.models.functions import Greatest
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from .models import Product, ProductSearchDocument
+
+SEARCH_CONFIG = 'simple'
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def normalize_terms(query):
+    """Split a raw search string into lowercase word terms."""
+    return TERM_RE.findall((query or '').lower())
+
+
+def _join(*parts):
+    return ' '.join(p.strip() for p in parts if p and p.strip())
+
+
+def refresh_search_documents(product_ids=None):
+    """
+    Rebuild the ProductSearchDocument rows for the given products (all if None):
+    one product row plus one row per variant, then recompute the tsvector in a
+    single UPDATE on PostgreSQL.
+    """
+    products = Product.objects.prefetch_related('variants')
+    if product_ids is not None:
+        product_ids = set(product_ids)
+        if not product_ids:
+            return 0
+        products = products.filter(id__in=product_ids)
+
+    documents = []
+    for product in products:
+        documents.append(ProductSearchDocument(
+            product=product,
+            title=_join(product.name)[:500],
+            body=_join(product.slug.replace('-', ' '), product.description),
+        ))
+        for variant in product.variants.all():
+            documents.append(ProductSearchDocument(
+                product=product,
+                variant=variant,
+                title=_join(variant.variant_name, variant.sku)[:500],
+                body=_join(variant.description),
+            ))
+
+    with transaction.atomic():
+        stale = ProductSearchDocument.objects.all()
+        if product_ids is not None:
+            stale = stale.filter(product_id__in=product_ids)
+        stale.delete()
+        ProductSearchDocument.objects.bulk_create(documents, batch_size=500)
+
+        if is_postgres():
+            refreshed = ProductSearchDocument.objects.all()
+            if product_ids is not None:
+                refreshed = refreshed.filter(product_id__in=product_ids)
+            refreshed.update(
+                search_vector=(
+                    SearchVector('title', weight='A', config=SEARCH_CONFIG)
+                    + SearchVector('body', weight='B', config=SEARCH_CONFIG)
+                )
+            )
+    return len(documents)
+
+
+def schedule_search_refresh(product_id):
+    """Reindex a product once the surrounding transaction commits."""
+    if product_id:
+        transaction.on_commit(lambda: refresh_search_documents([product_id]))
+
+
+def _term_match(term):
+    """Documents containing `term`, using the backend's best strategy."""
+    if is_postgres():
+        # Prefix match (index-bound via the GIN tsvector index), OR a trigram
+        # word match on the title for typos.
+        ts_query = SearchQuery(f"{term}:*", search_type='raw', config=SEARCH_CONFIG)
+        return Q(search_vector=ts_query) | Q(title__trigram_word_similar=term)
+    # Fallback (SQLite in development/tests): substring match on title or body.
+    return Q(title__icontains=term) | Q(body__icontains=term)
+
+
+def _ranked_documents(terms, raw_query):
+    """Documents matching any of the terms, annotated with `rank`."""
+    match = Q()
+    for term in terms:
+        match |= _term_match(term)
+    documents = ProductSearchDocument.objects.filter(match)
+
+    if is_postgres():
+        ts_query = SearchQuery(
+            ' | '.join(f"{term}:*" for term in terms), search_type='raw', config=SEARCH_CONFIG
+        )
+        return documents.annotate(
+            rank=Greatest(
+                SearchRank(F('search_vector'), ts_query),
+                TrigramWordSimilarity(raw_query, 'title') * Value(0.5),
+                output_field=FloatField(),
+            )
+        )
+
+    # Title hits weigh more; each matching term adds to the rank.
+    rank = Value(0.0, output_field=FloatField())
+    for term in terms:
+        rank = rank + Case(
+            When(title__istartswith=term, then=Value(1.0)),
+            When(title__icontains=term, then=Value(0.6)),
+            When(body__icontains=term, then=Value(0.2)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    return documents.annotate(rank=rank)
+
+
+def search_products(queryset, query):
+    """
+    Restrict a Product queryset to products matching `query` and annotate
+    `search_rank` plus `search_variant_id` (the best-matching variant, if a
+    variant row matched) so serializers need no extra queries.
+
+    Every term has to match one of the product's documents, not necessarily
+    the same one: "phone red" finds a phone product through its own row and
+    its red variant's row.
+    """
+    terms = normalize_terms(query)
+    if not terms:
+        return queryset
+
+    for term in terms:
+        queryset = queryset.filter(
+            id__in=ProductSearchDocument.objects.filter(_term_match(term)).values('product_id')
+        )
+
+    raw_query = ' '.join(terms)
+    matching = _ranked_documents(terms, raw_query)
+    best_for_product = matching.filter(product=OuterRef('pk')).order_by('-rank', 'id')
+
+    return queryset.annotate(
+        search_rank=Subquery(best_for_product.values('rank')[:1], output_field=FloatField()),
+        search_variant_id=Subquery(
+            best_for_product.filter(variant__isnull=False).values('variant_id')[:1]
+        ),
+    )
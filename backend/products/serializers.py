@@ -3,8 +3,8 @@ from decimal import Decimal
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Q
-from .models import Category, Product, ProductVariant, ProductVariantImage, Banner
+from django.db.models import Prefetch
+from .models import Category, Product, ProductVariant, ProductVariantImage, Banner, ProductListing
 
 # Configurable thresholds
 LOW_STOCK_THRESHOLD = getattr(settings, "LOW_STOCK_THRESHOLD", 5)
@@ -123,6 +123,13 @@ class ProductVariantSerializer(serializers.ModelSerializer):
             'sku': {'required': False}
         }
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load everything this serializer touches so a page costs a fixed number of queries."""
+        return queryset.select_related('product__category').prefetch_related(
+            Prefetch('images', queryset=ProductVariantImage.objects.order_by('id'))
+        )
+
     # ---------------- SerializerMethodFields ----------------
     def get_final_price(self, obj):
         return Decimal(obj.offer_price or obj.base_price)
@@ -136,7 +143,9 @@ class ProductVariantSerializer(serializers.ModelSerializer):
         return 0 < obj.stock < LOW_STOCK_THRESHOLD
 
     def get_primary_image_url(self, obj):
-        first_image = obj.images.first()
+        # .all() reuses the prefetch cache (ordered by id, like the listings); .first() would always hit the database
+        images = obj.images.all()
+        first_image = images[0] if images else None
         if first_image and hasattr(first_image,'url'):
             return first_image.url
         return getattr(obj.product, 'image_url', None)
@@ -208,6 +217,13 @@ class ProductSerializer(serializers.ModelSerializer):
             'min_price', 'max_price', 'total_stock', 'is_low_stock', 'is_new'
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load everything this serializer touches so a page costs a fixed number of queries."""
+        return queryset.select_related('category').prefetch_related(
+            Prefetch('variants__images', queryset=ProductVariantImage.objects.order_by('id'))
+        )
+
     # ---------------- Image URLs ----------------
     def get_image_url(self, obj):
         try:
@@ -215,29 +231,23 @@ class ProductSerializer(serializers.ModelSerializer):
         except ValueError:
             return obj.image_url or None
     def get_matched_variant(self, obj):
-        query = self.context.get("search_query", "").lower()
-        if not query:
+        # search_variant_id is annotated by products.search.search_products
+        variant_id = getattr(obj, "search_variant_id", None)
+        if not self.context.get("search_query") or not variant_id:
             return None
 
-        match = obj.variants.filter(
-            Q(variant_name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(sku__icontains=query)
-        ).first()
-
+        match = next((v for v in obj.variants.all() if v.id == variant_id), None)
         if match:
             return ProductVariantSerializer(match, context=self.context).data
         return None
     # ---------------- Calculated fields ----------------
     def get_min_price(self, obj):
-        if obj.variants.exists():
-            return min(v.final_price for v in obj.variants.all())
-        return None
+        prices = [v.final_price for v in obj.variants.all()]
+        return min(prices) if prices else None
 
     def get_max_price(self, obj):
-        if obj.variants.exists():
-            return max(v.final_price for v in obj.variants.all())
-        return None
+        prices = [v.final_price for v in obj.variants.all()]
+        return max(prices) if prices else None
 
     def get_total_stock(self, obj):
         return sum(v.stock for v in obj.variants.all())
@@ -267,6 +277,27 @@ class ProductSerializer(serializers.ModelSerializer):
 
         return super().update(instance, validated_data)
 
+# -------------------- PRODUCT LISTING --------------------
+class ProductListingSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='product_id', read_only=True)
+    is_low_stock = serializers.SerializerMethodField()
+    is_new = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductListing
+        fields = [
+            'id', 'name', 'slug', 'category_slug', 'is_available', 'featured', 'created_at',
+            'primary_image_url', 'min_price', 'max_price', 'total_stock', 'min_variant_stock',
+            'is_low_stock', 'is_new'
+        ]
+        read_only_fields = fields
+
+    def get_is_low_stock(self, obj):
+        return obj.min_variant_stock is not None and obj.min_variant_stock <= LOW_STOCK_THRESHOLD
+
+    def get_is_new(self, obj):
+        return obj.created_at >= timezone.now() - timedelta(days=NEW_PRODUCT_DAYS)
+
 # -------------------- BANNER --------------------
 import cloudinary.uploader
 class BannerSerializer(serializers.ModelSerializer):
@@ -0,0 +1,57 @@
+# products/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Category, Product, ProductVariant, ProductVariantImage, ProductListing, Banner
+from .utils import schedule_listing_refresh
+from .search import schedule_search_refresh
+from .cache import schedule_catalog_invalidation
+
+
+# -------------------------
+# Listing read model sync
+# -------------------------
+@receiver(post_save, sender=Product)
+def refresh_listing_on_product_save(sender, instance, **kwargs):
+    schedule_listing_refresh(instance.pk)
+    schedule_search_refresh(instance.pk)
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def refresh_listing_on_variant_change(sender, instance, **kwargs):
+    schedule_listing_refresh(instance.product_id)
+    schedule_search_refresh(instance.product_id)
+
+
+@receiver(post_save, sender=ProductVariantImage)
+@receiver(post_delete, sender=ProductVariantImage)
+def refresh_listing_on_variant_image_change(sender, instance, **kwargs):
+    product_id = (
+        ProductVariant.objects.filter(pk=instance.variant_id)
+        .values_list('product_id', flat=True)
+        .first()
+    )
+    schedule_listing_refresh(product_id)
+
+
+@receiver(post_save, sender=Category)
+def sync_listing_category_slug(sender, instance, created, **kwargs):
+    if not created:
+        ProductListing.objects.filter(product__category=instance).update(category_slug=instance.slug)
+
+
+# -------------------------
+# Catalog response cache
+# -------------------------
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=ProductVariantImage)
+@receiver(post_delete, sender=ProductVariantImage)
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def invalidate_catalog_cache(sender, **kwargs):
+    schedule_catalog_invalidation()
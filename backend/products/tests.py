@@ -1,3 +1,85 @@
+from decimal import Decimal
 from django.test import TestCase
+from rest_framework.test import APIClient
+from backend.query_budget import assert_max_queries, get_query_budget
+from .models import Category, Product, ProductVariant, ProductVariantImage
+from .search import refresh_search_documents, search_products
+from .utils import refresh_product_listings
 
-# Create your tests here.
+
+class ProductSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Phones', slug='phones')
+        cls.phone = Product.objects.create(category=category, name='Phone', slug='phone', description='Smartphone')
+        cls.red = ProductVariant.objects.create(
+            product=cls.phone, variant_name='Red', sku='PH-RED', stock=5,
+            base_price=Decimal('100'), offer_price=Decimal('90'),
+        )
+        ProductVariant.objects.create(
+            product=cls.phone, variant_name='Blue', sku='PH-BLUE', stock=5,
+            base_price=Decimal('100'), offer_price=Decimal('90'),
+        )
+        cls.case = Product.objects.create(category=category, name='Case', slug='case', description='Red case')
+        # Documents are refreshed after commit, which TestCase never reaches
+        refresh_search_documents()
+
+    def test_terms_can_match_different_documents_of_a_product(self):
+        results = list(search_products(Product.objects.all(), 'phone red'))
+        self.assertEqual(results, [self.phone])
+        self.assertEqual(results[0].search_variant_id, self.red.id)
+
+    def test_every_term_must_match(self):
+        self.assertFalse(search_products(Product.objects.all(), 'phone green').exists())
+        self.assertEqual(list(search_products(Product.objects.all(), 'red case')), [self.case])
+
+    def test_product_list_search_returns_matched_variant(self):
+        response = APIClient().get('/api/products/', {'search': 'phone red'})
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([row['slug'] for row in results], ['phone'])
+        self.assertEqual(results[0]['matched_variant']['id'], self.red.id)
+
+
+class CatalogQueryBudgetTests(TestCase):
+    """Catalog listings stay within settings.QUERY_BUDGETS whatever the page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for slug in ('phones', 'laptops'):
+            category = Category.objects.create(name=slug.title(), slug=slug)
+            for i in range(50):
+                product = Product.objects.create(
+                    category=category, name=f'{slug} {i}', slug=f'{slug}-{i}', description='Catalog item',
+                )
+                for j in range(2):
+                    variant = ProductVariant.objects.create(
+                        product=product, variant_name=f'V{j}', sku=f'{slug}-{i}-{j}', stock=10 + j,
+                        base_price=Decimal('100'), offer_price=Decimal('90'),
+                    )
+                    ProductVariantImage.objects.create(variant=variant, image_url=f'https://img/{slug}/{i}/{j}.jpg')
+        # Listings are refreshed after commit, which TestCase never reaches
+        refresh_product_listings()
+
+    def assert_within_budget(self, path, **params):
+        budget = get_query_budget(path)
+        self.assertIsNotNone(budget, f"{path} has no query budget")
+        for page_size in (1, 50):
+            with self.subTest(path=path, page_size=page_size, **params):
+                with assert_max_queries(budget):
+                    response = APIClient().get(path, {**params, 'page_size': page_size})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), page_size)
+
+    def test_product_list(self):
+        self.assert_within_budget('/api/products/')
+
+    def test_product_listing(self):
+        self.assert_within_budget('/api/products/listing/')
+
+    def test_category_pages(self):
+        self.assert_within_budget('/api/products/', category_slug='phones')
+        self.assert_within_budget('/api/products/listing/', category_slug='laptops')
+
+    def test_variant_list(self):
+        self.assert_within_budget('/api/variants/')
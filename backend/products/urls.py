@@ -10,7 +10,8 @@ from .views import (
     ProductVariantImageListCreateAPIView,
     ProductVariantImageRetrieveUpdateDestroyAPIView,
     CustomerBannerListAPIView,
-    BulkProductVariantCreateAPIView
+    BulkProductVariantCreateAPIView,
+    ProductListingAPIView
 
 )
 from django.urls import path
@@ -22,6 +23,7 @@ urlpatterns = [
 
     # -------------------- PRODUCTS --------------------
     path('products/', ProductListCreateAPIView.as_view(), name='product-list-create'),
+    path('products/listing/', ProductListingAPIView.as_view(), name='product-listing'),
     path('products/featured/', FeaturedProductsAPIView.as_view(), name='product-featured-list'),
     path('products/<slug:slug>/related/', RelatedProductsAPIView.as_view(), name='product-related-list'),
     path('products/<slug:slug>/', ProductRetrieveUpdateDestroyAPIView.as_view(), name='product-detail'),
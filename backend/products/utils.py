@@ -0,0 +1,69 @@
+# products/utils.py
+from django.db import transaction
+from django.db.models import Min, Max, Sum, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import Product, ProductVariantImage, ProductListing
+
+LISTING_UPDATE_FIELDS = [
+    'name', 'slug', 'category_slug', 'is_available', 'featured', 'created_at',
+    'min_price', 'max_price', 'total_stock', 'min_variant_stock',
+    'primary_image_url', 'refreshed_at',
+]
+
+
+def refresh_product_listings(product_ids=None):
+    """
+    Recompute ProductListing rows for the given products (all products if None)
+    with one aggregate query and one upsert. Rows of deleted products go away
+    through the cascade on ProductListing.product.
+    """
+    products = Product.objects.select_related('category')
+    if product_ids is not None:
+        product_ids = set(product_ids)
+        if not product_ids:
+            return 0
+        products = products.filter(id__in=product_ids)
+
+    first_image_url = ProductVariantImage.objects.filter(
+        variant__product=OuterRef('pk'), image_url__isnull=False
+    ).order_by('variant_id', 'id').values('image_url')[:1]
+
+    products = products.annotate(
+        listing_min_price=Min(Coalesce('variants__offer_price', 'variants__base_price')),
+        listing_max_price=Max(Coalesce('variants__offer_price', 'variants__base_price')),
+        listing_total_stock=Sum('variants__stock'),
+        listing_min_variant_stock=Min('variants__stock'),
+        listing_image_url=Subquery(first_image_url),
+    )
+
+    listings = [
+        ProductListing(
+            product_id=product.id,
+            name=product.name,
+            slug=product.slug,
+            category_slug=product.category.slug,
+            is_available=product.is_available,
+            featured=product.featured,
+            created_at=product.created_at,
+            min_price=product.listing_min_price,
+            max_price=product.listing_max_price,
+            total_stock=product.listing_total_stock or 0,
+            min_variant_stock=product.listing_min_variant_stock,
+            primary_image_url=product.listing_image_url or product.image_url,
+        )
+        for product in products
+    ]
+
+    ProductListing.objects.bulk_create(
+        listings,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=LISTING_UPDATE_FIELDS,
+    )
+    return len(listings)
+
+
+def schedule_listing_refresh(product_id):
+    """Refresh a product's listing row once the surrounding transaction commits."""
+    if product_id:
+        transaction.on_commit(lambda: refresh_product_listings([product_id]))
@@ -1,9 +1,9 @@
 from rest_framework import generics, permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Product, ProductVariant, Category, ProductVariantImage,Banner
+from .models import Product, ProductVariant, Category, ProductVariantImage,Banner,ProductListing
 from .serializers import (
     ProductSerializer, CategorySerializer,BannerSerializer,
-    ProductVariantSerializer, ProductVariantImageSerializer
+    ProductVariantSerializer, ProductVariantImageSerializer, ProductListingSerializer
 )
 from django.utils import timezone
 from datetime import timedelta
@@ -13,9 +13,12 @@ from rest_framework.views import APIView
 from accounts.permissions import IsAdmin, IsAdminOrReadOnly
 from rest_framework.exceptions import ValidationError
 from django.db.models import F,Q,Min,Max,Sum
+from .search import search_products
+from .cache import CatalogCacheMixin
+from .pagination import CatalogPagination
 
 # -------------------- CATEGORIES --------------------
-class CategoryListCreateAPIView(generics.ListCreateAPIView):
+class CategoryListCreateAPIView(CatalogCacheMixin, generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
@@ -48,14 +51,12 @@ class CategoryRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView
 
 # -------------------- PRODUCTS --------------------
 class ProductListCreateAPIView(generics.ListCreateAPIView):
+    pagination_class = CatalogPagination
     permission_classes = [permissions.AllowAny]
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # `search` is served by the ProductSearchDocument index (products.search), not SearchFilter
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['featured', 'is_available']
-    search_fields = [
-        'name', 'description', 'slug',
-        'variants__variant_name', 'variants__description', 'variants__sku'
-    ]
     ordering_fields = ['created_at', 'name']
 
     def get_permissions(self):
@@ -79,7 +80,10 @@ class ProductListCreateAPIView(generics.ListCreateAPIView):
         if category_slug:
             qs = qs.filter(category__slug=category_slug)
 
-        qs = qs.prefetch_related('variants', 'variants__images').annotate(
+        if search_query:
+            qs = search_products(qs, search_query)
+
+        qs = ProductSerializer.setup_eager_loading(qs).annotate(
             total_stock=Sum('variants__stock'),
             min_variant_stock=Min('variants__stock'),
             min_variant_price=Min('variants__offer_price', filter=Q(variants__offer_price__isnull=False)),
@@ -128,9 +132,77 @@ class ProductListCreateAPIView(generics.ListCreateAPIView):
             qs = qs.order_by("min_variant_price")
         elif ordering == "price-desc":
             qs = qs.order_by("-max_variant_price")
+        elif search_query:
+            qs = qs.order_by("-search_rank", "-created_at")
 
         return qs.distinct()
 
+class ProductListingAPIView(generics.ListAPIView):
+    """
+    Catalog listing served from the denormalized ProductListing table.
+    Accepts the same filter/sort params as ProductListCreateAPIView but never
+    joins or aggregates variants.
+    """
+    pagination_class = CatalogPagination
+    permission_classes = [permissions.AllowAny]
+    serializer_class = ProductListingSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['featured', 'is_available']
+
+    def get_queryset(self):
+        params = self.request.query_params
+        qs = ProductListing.objects.all()
+
+        category_slug = params.get('category_slug')
+        if category_slug:
+            qs = qs.filter(category_slug=category_slug)
+
+        availability = params.get('availability', 'all')
+        user_is_admin = self.request.user.is_authenticated and self.request.user.role == 'admin'
+        if availability == "available":
+            qs = qs.filter(is_available=True)
+        elif availability == "unavailable":
+            qs = qs.filter(is_available=False) if user_is_admin else qs.none()
+        elif availability == "all" and not user_is_admin:
+            qs = qs.filter(is_available=True)
+
+        stock_filter = params.get('stock')
+        if stock_filter == 'low-stock':
+            qs = qs.filter(min_variant_stock__gt=0, min_variant_stock__lte=5)
+        elif stock_filter == 'in-stock':
+            qs = qs.filter(total_stock__gt=0)
+        elif stock_filter == 'out-of-stock':
+            qs = qs.filter(total_stock=0)
+
+        min_price = params.get('min_price')
+        max_price = params.get('max_price')
+        if min_price:
+            qs = qs.filter(min_price__gte=min_price)
+        if max_price:
+            qs = qs.filter(max_price__lte=max_price)
+
+        is_new = params.get('is_new')
+        if is_new and is_new.lower() == 'true':
+            new_threshold = timezone.now() - timedelta(days=7)
+            qs = qs.filter(created_at__gte=new_threshold)
+
+        ordering = params.get('ordering')
+        if ordering == "oldest":
+            qs = qs.order_by("created_at", "product_id")
+        elif ordering == "name-asc":
+            qs = qs.order_by("name", "product_id")
+        elif ordering == "name-desc":
+            qs = qs.order_by("-name", "-product_id")
+        elif ordering == "price-asc":
+            qs = qs.order_by("min_price", "product_id")
+        elif ordering == "price-desc":
+            qs = qs.order_by("-max_price", "-product_id")
+        else:
+            qs = qs.order_by("-created_at", "-product_id")
+
+        return qs
+
+
 class ProductRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProductSerializer
     lookup_field = 'slug'
@@ -141,7 +213,7 @@ class ProductRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView)
         return [permissions.AllowAny()]
 
     def get_queryset(self):
-        qs = Product.objects.select_related('category')
+        qs = ProductSerializer.setup_eager_loading(Product.objects.all())
         if not self.request.user.is_authenticated or  (self.request.user.role != 'admin'):
             qs = qs.filter(is_available=True)
         return qs
@@ -151,13 +223,14 @@ class ProductRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView)
 
 class ProductVariantListAPIView(generics.ListAPIView):
     serializer_class = ProductVariantSerializer
+    pagination_class = CatalogPagination
     permission_classes = [permissions.AllowAny]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['variant_name', 'sku', 'description', 'product__name']
     ordering_fields = ['base_price', 'offer_price', 'stock', 'product__created_at', 'product__name']
 
     def get_queryset(self):
-        qs = ProductVariant.objects.select_related('product').prefetch_related('images')
+        qs = ProductVariantSerializer.setup_eager_loading(ProductVariant.objects.all())
         params = self.request.query_params
 
         # ✅ Variant-level featured filter
@@ -185,7 +258,7 @@ class ProductVariantListAPIView(generics.ListAPIView):
 class ProductVariantUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProductVariantSerializer
     lookup_field = 'id'
-    queryset = ProductVariant.objects.select_related('product')
+    queryset = ProductVariantSerializer.setup_eager_loading(ProductVariant.objects.all())
 
     def get_permissions(self):
         if self.request.method in ['PUT', 'PATCH', 'DELETE']:
@@ -238,19 +311,22 @@ class BulkProductVariantCreateAPIView(APIView):
         return Response({"created": created_variants}, status=status.HTTP_201_CREATED)
 
 # -------------------- FEATURED & RELATED --------------------
-class FeaturedProductsAPIView(generics.ListAPIView):
+class FeaturedProductsAPIView(CatalogCacheMixin, generics.ListAPIView):
     permission_classes = [permissions.AllowAny]
     serializer_class = ProductVariantSerializer
+    catalog_product_field = 'product_id'
+
     def get_queryset(self):
-        return ProductVariant.objects.select_related('product').prefetch_related('images')\
+        return ProductVariantSerializer.setup_eager_loading(ProductVariant.objects.all())\
             .filter(featured=True, product__is_available=True)\
             .order_by('-product__created_at')
 
 
 
-class RelatedProductsAPIView(generics.ListAPIView):
+class RelatedProductsAPIView(CatalogCacheMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
+    catalog_product_field = 'id'
 
     def get_queryset(self):
         slug = self.kwargs.get('slug')
@@ -258,7 +334,8 @@ class RelatedProductsAPIView(generics.ListAPIView):
             product = Product.objects.get(slug=slug)
         except Product.DoesNotExist:
             raise ValidationError("Product not found")
-        return Product.objects.filter(category=product.category, is_available=True).exclude(id=product.id).order_by('created_at')[:6]
+        qs = Product.objects.filter(category_id=product.category_id, is_available=True).exclude(id=product.id)
+        return ProductSerializer.setup_eager_loading(qs).order_by('created_at')[:6]
 
 
 # -------------------- VARIANT IMAGES --------------------
@@ -284,7 +361,7 @@ class ProductVariantImageRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDes
         return ProductVariantImage.objects.all()
 
 # CUSTOMER: list only active banners (no filters, no search)
-class CustomerBannerListAPIView(generics.ListAPIView):
+class CustomerBannerListAPIView(CatalogCacheMixin, generics.ListAPIView):
     queryset = Banner.objects.filter(is_active=True).order_by("order")
     serializer_class = BannerSerializer
     permission_classes = [permissions.AllowAny]
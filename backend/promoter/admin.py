@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Promoter,PromoterCommission,WithdrawalRequest
+from .models import Promoter,PromoterCommission,WithdrawalRequest,PromoterDailyStats
 
 @admin.register(Promoter)
 class PromoterAdmin(admin.ModelAdmin):
@@ -51,3 +51,12 @@ class PromoterCommissionAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     autocomplete_fields = ['promoter', 'order']
     list_editable = ('is_paid',)
+
+
+@admin.register(PromoterDailyStats)
+class PromoterDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('promoter', 'date', 'orders', 'gmv', 'delivered_orders', 'delivered_gmv', 'cancelled_orders', 'commission')
+    list_filter = ('date',)
+    search_fields = ('promoter__user__email', 'promoter__referral_code')
+    ordering = ('-date',)
+    readonly_fields = ('updated_at',)
@@ -0,0 +1,234 @@
+# promoter/analytics.py
+"""
+Per-promoter daily rollups behind the promoter performance endpoints.
+
+Writes to referred orders queue the order's promoter day after commit (see
+promoter.signals): one conflict-ignoring INSERT into StalePromoterDay, for
+the previous promoter too when an order is reassigned. `refresh_stale_promoter_stats`
+(the `refresh_promoter_stats` command, run from cron) claims queued promoter
+days and re-aggregates only that promoter's referred orders for the day, so
+rows are exact once the queue drains. `rebuild_promoter_stats` backfills
+whole ranges and repairs drift (see the `rebuild_promoter_stats` command),
+and `promoter_summary` folds the rollups for a date range.
+"""
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, Sum, Q, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from orders.models import Order
+from .models import PromoterDailyStats, StalePromoterDay
+
+STAT_FIELDS = ['orders', 'gmv', 'delivered_orders', 'delivered_gmv', 'cancelled_orders', 'commission']
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def _day_bounds(start, end):
+    """Aware [start 00:00, end+1 00:00) in the current timezone for inclusive dates."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def compute_promoter_stats(start, end, promoter_id=None):
+    """
+    Aggregate referred orders into {(promoter_id, date): fields} for the
+    inclusive range, optionally for one promoter only (1 query).
+    """
+    lower, upper = _day_bounds(start, end)
+    delivered = Q(status='delivered')
+    orders = Order.objects.filter(promoter__isnull=False, created_at__gte=lower, created_at__lt=upper)
+    if promoter_id is not None:
+        orders = orders.filter(promoter_id=promoter_id)
+    rows = (
+        orders
+        .annotate(day=TruncDate('created_at'))
+        .values('promoter_id', 'day')
+        .annotate(
+            order_count=Count('id'),
+            gmv_total=Sum('total'),
+            delivered_count=Count('id', filter=delivered),
+            delivered_total=Sum('total', filter=delivered),
+            cancelled_count=Count('id', filter=Q(status='cancelled')),
+            commission_total=Sum('commission', filter=Q(commission_applied=True)),
+        )
+        .order_by()
+    )
+    return {
+        (row['promoter_id'], row['day']): {
+            'orders': row['order_count'],
+            'gmv': row['gmv_total'] or Decimal('0'),
+            'delivered_orders': row['delivered_count'],
+            'delivered_gmv': row['delivered_total'] or Decimal('0'),
+            'cancelled_orders': row['cancelled_count'],
+            'commission': row['commission_total'] or Decimal('0'),
+        }
+        for row in rows
+    }
+
+
+def rebuild_promoter_stats(start, end, promoter_id=None):
+    """
+    Recompute and upsert the rollups for the inclusive date range (of one
+    promoter if given); promoter days that no longer have referred orders
+    lose their row. Returns the rows written.
+    """
+    computed = compute_promoter_stats(start, end, promoter_id)
+    existing = PromoterDailyStats.objects.filter(date__gte=start, date__lte=end)
+    if promoter_id is not None:
+        existing = existing.filter(promoter_id=promoter_id)
+    with transaction.atomic():
+        PromoterDailyStats.objects.bulk_create(
+            [PromoterDailyStats(promoter_id=row_promoter_id, date=day, **fields)
+             for (row_promoter_id, day), fields in computed.items()],
+            update_conflicts=True,
+            unique_fields=['promoter', 'date'],
+            update_fields=STAT_FIELDS + ['updated_at'],
+        )
+        stale = [
+            row_id for row_id, row_promoter_id, day in
+            existing.values_list('id', 'promoter_id', 'date')
+            if (row_promoter_id, day) not in computed
+        ]
+        PromoterDailyStats.objects.filter(id__in=stale).delete()
+    return len(computed)
+
+
+def refresh_promoter_stats(keys):
+    """Recompute the given (promoter_id, date) rollups."""
+    for promoter_id, day in sorted(set(keys)):
+        rebuild_promoter_stats(day, day, promoter_id)
+
+
+def refresh_stale_promoter_stats(batch_size=200):
+    """
+    Drain the StalePromoterDay queue: claim up to `batch_size` promoter days at
+    a time (skipping ones another worker holds), recompute them and dequeue
+    them in the same transaction. Returns the number of promoter days refreshed.
+    """
+    refreshed = 0
+    while True:
+        with transaction.atomic():
+            queued = StalePromoterDay.objects.order_by('date', 'promoter_id')
+            if connection.features.has_select_for_update_skip_locked:
+                queued = queued.select_for_update(skip_locked=True)
+            claimed = list(queued.values_list('id', 'promoter_id', 'date')[:batch_size])
+            if not claimed:
+                break
+            # Dequeue first: a write committing during the recompute re-queues its day
+            StalePromoterDay.objects.filter(id__in=[row_id for row_id, _, _ in claimed]).delete()
+            refresh_promoter_stats((promoter_id, day) for _, promoter_id, day in claimed)
+        refreshed += len(claimed)
+        if len(claimed) < batch_size:
+            break
+    return refreshed
+
+
+def first_referral_date():
+    first = Order.objects.filter(promoter__isnull=False).aggregate(first=Min('created_at'))['first']
+    return _as_date(first) if first else None
+
+
+# -----------------------------
+# Signal-driven maintenance
+# -----------------------------
+_pending = threading.local()
+
+
+def _pending_keys():
+    if not hasattr(_pending, 'keys'):
+        _pending.keys = set()
+    return _pending.keys
+
+
+def _flush_pending_keys():
+    pending = _pending_keys()
+    if not pending:
+        return  # an earlier callback of the same commit already did the work
+    keys = set(pending)
+    pending.clear()
+    StalePromoterDay.objects.bulk_create(
+        [StalePromoterDay(promoter_id=promoter_id, date=day) for promoter_id, day in keys],
+        ignore_conflicts=True,
+    )
+
+
+def schedule_promoter_stats_refresh(*pairs):
+    """
+    Queue the given (promoter_id, day/datetime) pairs for
+    refresh_stale_promoter_stats once the current transaction commits, one row
+    per promoter day however many of its orders changed. A failure here is
+    logged and never fails the committed write.
+    """
+    keys = {(promoter_id, _as_date(value)) for promoter_id, value in pairs if promoter_id and value}
+    if not keys:
+        return
+    _pending_keys().update(keys)
+    transaction.on_commit(_flush_pending_keys, robust=True)
+
+
+def schedule_promoter_stats_refresh_for_orders(order_ids):
+    """For set-based Order updates that bypass post_save."""
+    rows = Order.objects.filter(id__in=order_ids, promoter__isnull=False).values_list('promoter_id', 'created_at')
+    schedule_promoter_stats_refresh(*rows)
+
+
+# -----------------------------
+# Read side
+# -----------------------------
+def _rates(totals):
+    orders = totals['orders']
+    totals['cancellation_rate'] = round(totals['cancelled_orders'] / orders * 100, 2) if orders else 0.0
+    totals['delivery_rate'] = round(totals['delivered_orders'] / orders * 100, 2) if orders else 0.0
+    return totals
+
+
+def _empty_totals():
+    return {
+        'orders': 0, 'gmv': Decimal('0'), 'delivered_orders': 0,
+        'delivered_gmv': Decimal('0'), 'cancelled_orders': 0, 'commission': Decimal('0'),
+    }
+
+
+def promoter_summary(promoter, start, end):
+    """Funnel totals plus the daily series for one promoter over the inclusive range (1 query)."""
+    totals = _empty_totals()
+    daily = []
+    for row in PromoterDailyStats.objects.filter(promoter=promoter, date__gte=start, date__lte=end):
+        day = {field: getattr(row, field) for field in STAT_FIELDS}
+        for field, value in day.items():
+            totals[field] += value
+        daily.append(_rates({'date': row.date, **day}))
+    return {'start': start, 'end': end, 'totals': _rates(totals), 'daily': daily}
+
+
+def promoter_leaderboard(start, end, ordering='delivered_gmv'):
+    """
+    Funnel totals per promoter over the inclusive range, from one GROUP BY
+    over the rollups, best first by `ordering` (one of STAT_FIELDS).
+    """
+    rows = (
+        PromoterDailyStats.objects.filter(date__gte=start, date__lte=end)
+        .values('promoter_id', 'promoter__referral_code', 'promoter__user__email')
+        .annotate(**{f'total_{field}': Sum(field) for field in STAT_FIELDS})
+        .order_by(f'-total_{ordering}', 'promoter_id')
+    )
+    results = []
+    for row in rows:
+        totals = {field: row[f'total_{field}'] for field in STAT_FIELDS}
+        results.append({
+            'promoter_id': row['promoter_id'],
+            'referral_code': row['promoter__referral_code'],
+            'email': row['promoter__user__email'],
+            **_rates(totals),
+        })
+    return results
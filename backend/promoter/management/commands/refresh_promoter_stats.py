@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from promoter.analytics import refresh_stale_promoter_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the PromoterDailyStats days queued by referred order writes (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="Promoter days claimed per transaction")
+
+    def handle(self, *args, **options):
+        refreshed = refresh_stale_promoter_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed promoter stats for {refreshed} queued promoter days"))
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from promoter.utils import pending_commission_orders, settle_delivered_commissions
+
+
+class Command(BaseCommand):
+    help = "Settle promoter commission for delivered orders that have not had it applied yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Only orders delivered in the last N days (default: all).")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Only count the orders that would be settled")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        since = None
+        if options['days'] is not None:
+            if options['days'] < 1:
+                raise CommandError("--days must be at least 1")
+            since = timezone.now() - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            pending = pending_commission_orders(since).count()
+            self.stdout.write(f"Would settle commission for {pending} delivered orders")
+            return
+
+        settled, total = settle_delivered_commissions(since=since, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Settled commission for {settled} orders ({total} total)"))
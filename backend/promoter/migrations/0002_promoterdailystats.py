@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promoter', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromoterDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('gmv', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('delivered_orders', models.PositiveIntegerField(default=0)),
+                ('delivered_gmv', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cancelled_orders', models.PositiveIntegerField(default=0)),
+                ('commission', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('promoter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='promoter.promoter')),
+            ],
+            options={
+                'verbose_name_plural': 'Promoter daily stats',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['date'], name='promoter_pr_date_37f752_idx')],
+                'constraints': [models.UniqueConstraint(fields=('promoter', 'date'), name='unique_promoter_daily_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promoter', '0002_promoterdailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StalePromoterDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+                ('promoter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stale_days', to='promoter.promoter')),
+            ],
+            options={
+                'ordering': ['date', 'promoter'],
+                'constraints': [models.UniqueConstraint(fields=('promoter', 'date'), name='unique_stale_promoter_day')],
+            },
+        ),
+    ]
@@ -68,3 +68,53 @@ class WithdrawalRequest(models.Model):
     def __str__(self):
         return f"{self.promoter.user.email} - {self.amount} ({self.status})"
     
+
+
+class PromoterDailyStats(models.Model):
+    """
+    One row per promoter per day (referred orders bucketed by created_at),
+    maintained by promoter.analytics from order writes. The promoter and admin
+    analytics endpoints read these rollups instead of scanning orders.
+    """
+    promoter = models.ForeignKey(Promoter, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+
+    orders = models.PositiveIntegerField(default=0)
+    gmv = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    delivered_orders = models.PositiveIntegerField(default=0)
+    delivered_gmv = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+    commission = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+        verbose_name_plural = 'Promoter daily stats'
+        constraints = [
+            models.UniqueConstraint(fields=['promoter', 'date'], name='unique_promoter_daily_stats'),
+        ]
+        indexes = [models.Index(fields=['date'])]
+
+    def __str__(self):
+        return f"{self.promoter.user.email} - {self.date}"
+
+
+class StalePromoterDay(models.Model):
+    """
+    A promoter day whose PromoterDailyStats row is out of date. Referred order
+    writes queue it after commit; `refresh_promoter_stats` (cron) drains the
+    queue and recomputes each promoter day once, off the request path.
+    """
+    promoter = models.ForeignKey(Promoter, on_delete=models.CASCADE, related_name='stale_days')
+    date = models.DateField()
+    queued_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['date', 'promoter']
+        constraints = [
+            models.UniqueConstraint(fields=['promoter', 'date'], name='unique_stale_promoter_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.promoter_id} - {self.date} (queued {self.queued_at})"
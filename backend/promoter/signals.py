@@ -0,0 +1,25 @@
+# promoter/signals.py
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from orders.models import Order
+from .analytics import schedule_promoter_stats_refresh
+
+
+# -------------------------
+# Promoter daily rollups
+# -------------------------
+@receiver(post_init, sender=Order)
+def remember_loaded_promoter(sender, instance, **kwargs):
+    # Skip deferred loads (.only()) so reading the snapshot never queries
+    if 'promoter_id' in instance.__dict__:
+        instance._loaded_promoter_id = instance.promoter_id
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def refresh_promoter_stats_on_order_activity(sender, instance, **kwargs):
+    promoter_ids = {instance.promoter_id, getattr(instance, '_loaded_promoter_id', None)}
+    schedule_promoter_stats_refresh(
+        *((promoter_id, instance.created_at) for promoter_id in promoter_ids)
+    )
+    instance._loaded_promoter_id = instance.promoter_id
@@ -1,9 +1,11 @@
-from .views import PromoterListCreateAPIView,PromoterRetrieveUpdateDestroyAPIView
+from .views import PromoterListCreateAPIView,PromoterRetrieveUpdateDestroyAPIView,PromoterAnalyticsAPIView,PromoterLeaderboardAPIView
 from django.urls import path
 
 urlpatterns = [
     path('promoter/',PromoterListCreateAPIView.as_view()),
     path('promoter/<int:id>/',PromoterRetrieveUpdateDestroyAPIView.as_view()),
+    path('promoter/analytics/',PromoterAnalyticsAPIView.as_view()),
+    path('promoter/analytics/leaderboard/',PromoterLeaderboardAPIView.as_view()),
     
 ]
 
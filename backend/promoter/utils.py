@@ -1,42 +1,132 @@
-from promoter.models import PromoterCommission
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Q, Case, When, Value, DecimalField, IntegerField, BooleanField, ExpressionWrapper
+from promoter.models import Promoter, PromoterCommission
+from orders.models import Order, OrderItem
+from promoter.analytics import schedule_promoter_stats_refresh_for_orders
+
+WITHDRAWAL_THRESHOLD = Decimal('500')
+CENTS = Decimal('0.01')
+MONEY = DecimalField(max_digits=10, decimal_places=2)
+
+
+def _commission_lines(order_ids):
+    """(order_id, promoter_id, variant_id, amount) for every commissionable line, in one query."""
+    rows = (
+        OrderItem.objects.filter(order_id__in=order_ids, product_variant__promoter_commission_rate__gt=0)
+        .order_by('order_id', 'id')
+        .values_list('order_id', 'order__promoter_id', 'product_variant_id',
+                     'quantity', 'price', 'product_variant__promoter_commission_rate')
+    )
+    return [
+        (order_id, promoter_id, variant_id, (quantity * price * rate / 100).quantize(CENTS))
+        for order_id, promoter_id, variant_id, quantity, price, rate in rows
+    ]
+
+
+def apply_commissions(order_ids):
+    """
+    Settle promoter commission for many orders at once.
+
+    Orders that already have commission applied, or whose promoter is not
+    approved, are skipped. The orders are row-locked and claimed before any
+    commission is written, so concurrent callers never settle an order twice,
+    and promoter counters move with F() expressions rather than read-modify-write.
+    Returns {order_id: commission} for the orders settled.
+    """
+    with transaction.atomic():
+        claimed = dict(
+            Order.objects.select_for_update(of=('self',))
+            .filter(id__in=list(order_ids), commission_applied=False, promoter__application_status__iexact='approved')
+            .order_by('id')
+            .values_list('id', 'promoter_id')
+        )
+        if not claimed:
+            return {}
+
+        lines = _commission_lines(list(claimed))
+        PromoterCommission.objects.bulk_create([
+            PromoterCommission(promoter_id=promoter_id, order_id=order_id, product_variant_id=variant_id, amount=amount)
+            for order_id, promoter_id, variant_id, amount in lines
+        ])
+
+        per_order = {order_id: Decimal('0.00') for order_id in claimed}
+        for order_id, _, _, amount in lines:
+            per_order[order_id] += amount
+        Order.objects.filter(id__in=list(claimed)).update(
+            commission_applied=True,
+            commission=Case(
+                *[When(id=order_id, then=Value(amount)) for order_id, amount in per_order.items()],
+                default=Value(Decimal('0.00')),
+                output_field=MONEY,
+            ),
+        )
+
+        sales = defaultdict(int)
+        earned = defaultdict(Decimal)
+        for order_id, promoter_id in claimed.items():
+            sales[promoter_id] += 1
+            earned[promoter_id] += per_order[order_id]
+        _add_to_promoters(sales, earned)
+        schedule_promoter_stats_refresh_for_orders(list(claimed))
+    return per_order
+
+
+def _add_to_promoters(sales, earned):
+    """Bump every promoter's counters in one UPDATE, then refresh withdrawal eligibility."""
+    promoter_ids = list(sales)
+    earned_case = Case(
+        *[When(id=promoter_id, then=Value(amount)) for promoter_id, amount in earned.items()],
+        default=Value(Decimal('0.00')),
+        output_field=MONEY,
+    )
+    Promoter.objects.filter(id__in=promoter_ids).update(
+        total_sales_count=F('total_sales_count') + Case(
+            *[When(id=promoter_id, then=Value(count)) for promoter_id, count in sales.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        total_commission_earned=F('total_commission_earned') + earned_case,
+        wallet_balance=F('wallet_balance') + earned_case,
+    )
+    # A separate statement so the check sees the new balance
+    Promoter.objects.filter(id__in=promoter_ids).update(
+        is_eligible_for_withdrawal=ExpressionWrapper(
+            Q(wallet_balance__gte=WITHDRAWAL_THRESHOLD), output_field=BooleanField()
+        )
+    )
+
 
 def apply_promoter_commission(order):
-    promoter = order.promoter
-
-    if not promoter or order.commission_applied or promoter.application_status.lower() != 'approved':
-        return
-
-    total_commission = 0
-
-    for item in order.orderitem_set.all():
-        variant = item.product_variant
-        rate = variant.promoter_commission_rate or 0  # Correct source
-
-        if rate > 0:
-            commission_amount = item.quantity * item.price * (rate / 100)
-
-            PromoterCommission.objects.create(
-                promoter=promoter,
-                order=order,
-                product_variant=variant,
-                amount=commission_amount
-            )
-
-            total_commission += commission_amount
-
-    # Update promoter stats
-    promoter.total_sales_count += 1
-    promoter.total_commission_earned += total_commission
-    promoter.wallet_balance += total_commission
-    promoter.is_eligible_for_withdrawal = promoter.wallet_balance >= 500
-    promoter.save(update_fields=[
-        'total_sales_count',
-        'total_commission_earned',
-        'wallet_balance',
-        'is_eligible_for_withdrawal'
-    ])
-
-    # Mark commission as applied
-    order.commission_applied = True
-    order.commission = total_commission
-    order.save(update_fields=['commission_applied', 'commission'])
+    settled = apply_commissions([order.id])
+    if order.id in settled:
+        # Keep the caller's instance in step with the row
+        order.commission_applied = True
+        order.commission = settled[order.id]
+    return settled.get(order.id)
+
+
+def pending_commission_orders(since=None):
+    """Delivered orders of approved promoters still waiting for commission (delivered on/after `since`)."""
+    pending = Order.objects.filter(
+        status='delivered', commission_applied=False, promoter__application_status__iexact='approved'
+    )
+    if since is not None:
+        pending = pending.filter(delivered_at__gte=since)
+    return pending
+
+
+def settle_delivered_commissions(since=None, batch_size=500):
+    """
+    Batch mode: settle commission for every order in pending_commission_orders(),
+    `batch_size` orders per transaction. Returns (orders settled, total commission).
+    """
+    order_ids = list(pending_commission_orders(since).order_by('id').values_list('id', flat=True))
+
+    settled, total = 0, Decimal('0.00')
+    for start in range(0, len(order_ids), batch_size):
+        result = apply_commissions(order_ids[start:start + batch_size])
+        settled += len(result)
+        total += sum(result.values(), Decimal('0.00'))
+    return settled, total
@@ -14,6 +14,10 @@ from rest_framework.response import Response
 from rest_framework import status
 from .utils import apply_promoter_commission
 from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from .analytics import STAT_FIELDS, promoter_summary, promoter_leaderboard
 # Create your views here.
 
 
@@ -93,3 +97,56 @@ class WithdrawalRequestAdminManageView(RetrieveUpdateDestroyAPIView):
     serializer_class = WithdrawalRequestSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
 
+
+def _analytics_range(params, default_days=30):
+    """Inclusive ?start=/&end= dates (YYYY-MM-DD); defaults to the last `default_days` days."""
+    dates = {}
+    for name in ('start', 'end'):
+        value = params.get(name)
+        if value:
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                raise ValidationError({name: "Must be a date in YYYY-MM-DD format."})
+    end = dates.get('end') or timezone.localdate()
+    start = dates.get('start') or end - timedelta(days=default_days - 1)
+    if start > end:
+        raise ValidationError({"start": "Must not be after end."})
+    return start, end
+
+
+# Referral funnel (orders -> delivered -> commission) served from PromoterDailyStats
+class PromoterAnalyticsAPIView(APIView):
+    permission_classes=[IsAuthenticated,IsAdminOrPromoter]
+
+    def get(self,request):
+        user=request.user
+        start,end=_analytics_range(request.query_params)
+        if user.is_staff or user.role == 'admin':
+            promoter_id=request.query_params.get('promoter')
+            if not promoter_id:
+                raise ValidationError({"promoter": "This query parameter is required."})
+            promoter=get_object_or_404(Promoter,id=promoter_id)
+        else:
+            promoter=get_object_or_404(Promoter,user=user)
+        data=promoter_summary(promoter,start,end)
+        data['promoter_id']=promoter.id
+        data['referral_code']=promoter.referral_code
+        return Response(data)
+
+
+class PromoterLeaderboardAPIView(APIView):
+    permission_classes=[IsAuthenticated,IsAdmin]
+
+    def get(self,request):
+        start,end=_analytics_range(request.query_params)
+        ordering=request.query_params.get('ordering','delivered_gmv')
+        if ordering not in STAT_FIELDS:
+            raise ValidationError({"ordering": f"Must be one of: {', '.join(STAT_FIELDS)}."})
+        return Response({
+            "start": start,
+            "end": end,
+            "results": promoter_leaderboard(start,end,ordering=ordering),
+        })
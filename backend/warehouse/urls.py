@@ -4,6 +4,9 @@ from .views import (
     PickOrderItemAPIView,
     PackOrderItemAPIView,
     ShipOrderItemAPIView,
+    BatchPickOrderItemsAPIView,
+    BatchPackOrderItemsAPIView,
+    BatchShipOrderItemsAPIView,
     AssignOrdersToDeliverymanAPIView,
     WarehouseOrderItemStatusAPIView,
     WarehouseAssignedOrdersAPIView,
@@ -22,6 +25,11 @@ urlpatterns = [
     path("warehouse/items/<int:id>/pack/", PackOrderItemAPIView.as_view(), name="items-pack"),
     path("warehouse/items/<int:id>/ship/", ShipOrderItemAPIView.as_view(), name="items-ship"),
 
+    # Pick, Pack, Ship a wave of scanned items
+    path("warehouse/items/batch/pick/", BatchPickOrderItemsAPIView.as_view(), name="items-batch-pick"),
+    path("warehouse/items/batch/pack/", BatchPackOrderItemsAPIView.as_view(), name="items-batch-pack"),
+    path("warehouse/items/batch/ship/", BatchShipOrderItemsAPIView.as_view(), name="items-batch-ship"),
+
     # Assign multiple orders to a deliveryman
     path("warehouse/orders/assign/deliveryman/", AssignOrdersToDeliverymanAPIView.as_view(), name="assign-order-deliveryman"),
     path("warehouse/orders/assigned-orders/", WarehouseAssignedOrdersAPIView.as_view(), name="warehouse-assigned-orders"),
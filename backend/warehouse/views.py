@@ -1,19 +1,17 @@
-from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from delivery.models import DeliveryMan
 from orders.models import Order, OrderItem
 from accounts.permissions import IsWarehouseStaffOrAdmin,IsWarehouseStaff
-from orders.utils import update_item_status,update_order_status_from_items
+from orders.utils import update_item_status
+from orders.stats import cached_warehouse_stats, MAX_TREND_DAYS
+from orders.fulfillment import assign_orders_to_deliveryman, transition_items
 from rest_framework.generics import ListAPIView
 from .serializers import WarehouseOrderSerializer,WarehouseOrderItemSerializer
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Q
-from django.db.models.functions import TruncDate
-from datetime import timedelta, date
 from .pagination import WarehouseOrderPagination
 from delivery.serializers import DeliveryManSerializer
 
@@ -71,6 +69,75 @@ class ShipOrderItemAPIView(APIView):
         update_item_status(item_id=id, expected_status='packed', new_status='shipped', user=request.user, timestamp_field='shipped_at',comment="Item shipped by warehouse staff")
         return Response({'message': 'Item marked as shipped'}, status=200)
 
+class BatchOrderItemTransitionAPIView(APIView):
+    """
+    Move a wave of scanned items in one call. Body: {"item_ids": [...]}; scanner
+    input may send ids as strings. Responds with a per-item result map.
+    """
+    permission_classes = [IsWarehouseStaffOrAdmin]
+    max_items = 500
+    expected_status = None
+    new_status = None
+    timestamp_field = None
+    comment = None
+
+    def post(self, request):
+        raw_ids = request.data.get("item_ids")
+        if isinstance(raw_ids, (str, int)):
+            raw_ids = [raw_ids]
+        if not isinstance(raw_ids, list) or not raw_ids:
+            raise ValidationError({"item_ids": "A non-empty list of item ids is required."})
+        if len(raw_ids) > self.max_items:
+            raise ValidationError({"item_ids": f"At most {self.max_items} items per batch."})
+
+        results = {}
+        item_ids = []
+        for raw in raw_ids:
+            try:
+                item_ids.append(int(str(raw).strip()))
+            except ValueError:
+                results[str(raw)] = {"success": False, "error": "Invalid item id"}
+
+        updated, errors = transition_items(
+            item_ids,
+            expected_status=self.expected_status,
+            new_status=self.new_status,
+            user=request.user,
+            timestamp_field=self.timestamp_field,
+            comment=self.comment,
+        )
+        for item_id in updated:
+            results[str(item_id)] = {"success": True, "status": self.new_status}
+        for item_id, error in errors.items():
+            results[str(item_id)] = {"success": False, "error": error}
+
+        return Response({
+            "updated": len(updated),
+            "failed": len(results) - len(updated),
+            "results": results,
+            "message": f"{len(updated)} items marked as {self.new_status}",
+        }, status=status.HTTP_200_OK)
+
+
+class BatchPickOrderItemsAPIView(BatchOrderItemTransitionAPIView):
+    expected_status = 'pending'
+    new_status = 'picked'
+    comment = "Item picked by warehouse staff"
+
+
+class BatchPackOrderItemsAPIView(BatchOrderItemTransitionAPIView):
+    expected_status = 'picked'
+    new_status = 'packed'
+    timestamp_field = 'packed_at'
+    comment = "Item packed by warehouse staff"
+
+
+class BatchShipOrderItemsAPIView(BatchOrderItemTransitionAPIView):
+    expected_status = 'packed'
+    new_status = 'shipped'
+    timestamp_field = 'shipped_at'
+    comment = "Item shipped by warehouse staff"
+
 class AssignOrdersToDeliverymanAPIView(APIView):
     permission_classes = [IsWarehouseStaffOrAdmin]
 
@@ -94,58 +161,13 @@ class AssignOrdersToDeliverymanAPIView(APIView):
             )
 
         try:
-            deliveryman = DeliveryMan.objects.get(id=deliveryman_id)
+            deliveryman = DeliveryMan.objects.select_related('user').get(id=deliveryman_id)
         except DeliveryMan.DoesNotExist:
             raise NotFound("Deliveryman not found.")
 
-        assigned_orders = []
-        skipped_orders = []
-
-        for number in order_numbers:
-            try:
-                order = Order.objects.get(
-                    order_number=number, status__in=['shipped', 'out_for_delivery']
-                )
-            except Order.DoesNotExist:
-                skipped_orders.append({
-                    "order_number": number,
-                    "reason": "Not found or not in 'shipped'/'out_for_delivery' status"
-                })
-                continue
-
-            if order.delivered_by:
-                skipped_orders.append({
-                    "order_number": order.order_number,
-                    "reason": f"Already assigned to {order.delivered_by.user.email}"
-                })
-                continue
-
-            # Only assign if all items are shipped
-            if order.orderitem_set.exclude(status__in=['shipped', 'out_for_delivery']).exists():
-                skipped_orders.append({
-                    "order_number": order.order_number,
-                    "reason": "Some items are not yet shipped"
-                })
-                continue
-
-            # Assign deliveryman
-            order.delivered_by = deliveryman
-            order.assigned_at = timezone.now()
-            order.save(update_fields=['delivered_by', 'assigned_at'])
-
-            # Update each item via update_item_status
-            for item in order.orderitem_set.all():
-                update_item_status(
-                    item_id=item.id,
-                    expected_status='shipped',
-                    new_status='out_for_delivery',
-                    user=request.user,
-                    timestamp_field='out_for_delivery_at',
-                    comment=f"Assigned to deliveryman ({deliveryman.user.email})"
-                )
-
-            update_order_status_from_items(order)
-            assigned_orders.append(order.order_number)
+        assigned_orders, skipped_orders = assign_orders_to_deliveryman(
+            order_numbers, deliveryman, request.user
+        )
 
         return Response({
             "assigned_orders": assigned_orders,
@@ -207,78 +229,16 @@ class WarehouseStatsWithTrendsAPIView(APIView):
     permission_classes = [IsAuthenticated, IsWarehouseStaff]
 
     def get(self, request):
-        today = date.today()
-        last_7_days = today - timedelta(days=6)
-
-        # 1️⃣ Overall counts
-        pending_orders = Order.objects.filter(status='processing').count()
-        picked_items = OrderItem.objects.filter(status='picked').count()
-        packed_items = OrderItem.objects.filter(status='packed').count()
-        shipped_items = OrderItem.objects.filter(status='shipped', order__delivered_by__isnull=True).count()
-        assigned_orders = Order.objects.filter(delivered_by__isnull=False).count()
-
-        # 2️⃣ Trends (last 7 days)
-        orders_trend = (
-            Order.objects
-            .filter(created_at__date__gte=last_7_days)
-            .annotate(date=TruncDate('created_at'))
-            .values('date')
-            .annotate(count=Count('id'))
-            .order_by('date')
-        )
-
-        picked_trend = (
-            OrderItem.objects
-            .filter(status='picked', order__created_at__date__gte=last_7_days)
-            .annotate(date=TruncDate('order__created_at'))
-            .values('date')
-            .annotate(count=Count('id'))
-            .order_by('date')
-        )
-
-        packed_trend = (
-            OrderItem.objects
-            .filter(status='packed', order__created_at__date__gte=last_7_days)
-            .annotate(date=TruncDate('order__created_at'))
-            .values('date')
-            .annotate(count=Count('id'))
-            .order_by('date')
-        )
-
-        shipped_trend = (
-            OrderItem.objects
-            .filter(status='shipped', order__delivered_by__isnull=True, order__created_at__date__gte=last_7_days)
-            .annotate(date=TruncDate('order__created_at'))
-            .values('date')
-            .annotate(count=Count('id'))
-            .order_by('date')
-        )
-
-        assigned_trend = (
-            Order.objects
-            .filter(delivered_by__isnull=False, assigned_at__date__gte=last_7_days)
-            .annotate(date=TruncDate('assigned_at'))
-            .values('date')
-            .annotate(count=Count('id'))
-            .order_by('date')
-        )
-
-        return Response({
-            "overall": {
-                "pending_orders": pending_orders,
-                "picked_items": picked_items,
-                "packed_items": packed_items,
-                "shipped_items": shipped_items,
-                "assigned_orders": assigned_orders,
-            },
-            "trends": {
-                "orders": list(orders_trend),
-                "picked_items": list(picked_trend),
-                "packed_items": list(packed_trend),
-                "shipped_items": list(shipped_trend),
-                "assigned_orders": list(assigned_trend),
-            }
-        })
+        # Trend window in days (default: last 7 days)
+        try:
+            days = int(request.query_params.get("days", 7))
+        except ValueError:
+            raise ValidationError({"days": "Must be an integer."})
+        if not 1 <= days <= MAX_TREND_DAYS:
+            raise ValidationError({"days": f"Must be between 1 and {MAX_TREND_DAYS}."})
+
+        # Counts and trends are shared by every polling terminal for a few seconds
+        return Response(cached_warehouse_stats(days))
 
 
 class WarehouseUnassignedOrdersAPIView(ListAPIView):